@@ -0,0 +1,56 @@
+"""product full-text search document
+
+Revision ID: 0002_product_search
+Revises: 0001_initial
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.core.search_text import build_search_document
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_product_search"
+down_revision: Union[str, None] = "0001_initial"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+products = sa.table(
+    "products",
+    sa.column("id", sa.Integer),
+    sa.column("title", sa.String),
+    sa.column("description", sa.Text),
+    sa.column("tags", sa.JSON),
+    sa.column("materials", sa.JSON),
+    sa.column("search_document", sa.Text),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # 0001 builds the schema from the current models, so fresh databases already have the column and index.
+    if "search_document" not in {column["name"] for column in inspector.get_columns("products")}:
+        op.add_column("products", sa.Column("search_document", sa.Text(), nullable=True))
+
+    rows = bind.execute(sa.select(products.c.id, products.c.title, products.c.description, products.c.tags, products.c.materials))
+    for row in rows.all():
+        document = build_search_document(row.title, row.description, row.tags, row.materials)
+        bind.execute(products.update().where(products.c.id == row.id).values(search_document=document))
+    if bind.dialect.name != "sqlite":
+        op.alter_column("products", "search_document", existing_type=sa.Text(), nullable=False)
+
+    if bind.dialect.name == "mysql":
+        indexes = {index["name"] for index in inspector.get_indexes("products")}
+        if "ix_products_search_document" not in indexes:
+            op.create_index("ix_products_search_document", "products", ["search_document"], mysql_prefix="FULLTEXT")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "mysql":
+        op.drop_index("ix_products_search_document", table_name="products")
+    op.drop_column("products", "search_document")
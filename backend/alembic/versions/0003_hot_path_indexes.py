@@ -0,0 +1,68 @@
+"""composite indexes for catalog, seller, order, message and notification hot paths
+
+Revision ID: 0003_hot_path_indexes
+Revises: 0002_product_search
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_hot_path_indexes"
+down_revision: Union[str, None] = "0002_product_search"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# InnoDB appends the primary key to every secondary index, so (status, created_at) also serves the
+# (created_at, id) keyset order used by the catalog.
+COMPOSITE_INDEXES = [
+    ("ix_products_status_created_at", "products", ["status", "created_at"]),
+    ("ix_products_status_price", "products", ["status", "price"]),
+    ("ix_products_status_category_created_at", "products", ["status", "category_id", "created_at"]),
+    ("ix_products_seller_created_at", "products", ["seller_id", "created_at"]),
+    ("ix_orders_buyer_created_at", "orders", ["buyer_id", "created_at"]),
+    ("ix_orders_seller_created_at", "orders", ["seller_id", "created_at"]),
+    ("ix_messages_conversation_created_at", "messages", ["conversation_id", "created_at"]),
+    ("ix_messages_conversation_is_read", "messages", ["conversation_id", "is_read"]),
+    ("ix_notifications_user_created_at", "notifications", ["user_id", "created_at"]),
+    ("ix_conversations_buyer_updated_at", "conversations", ["buyer_id", "updated_at"]),
+    ("ix_conversations_seller_updated_at", "conversations", ["seller_id", "updated_at"]),
+]
+
+# Single-column indexes that are now a prefix of a composite one; dropped only after the composite exists so
+# MySQL always has an index backing each foreign key.
+REDUNDANT_INDEXES = [
+    ("ix_products_status", "products", ["status"]),
+    ("ix_products_seller_id", "products", ["seller_id"]),
+    ("ix_orders_buyer_id", "orders", ["buyer_id"]),
+    ("ix_orders_seller_id", "orders", ["seller_id"]),
+    ("ix_messages_conversation_id", "messages", ["conversation_id"]),
+    ("ix_notifications_user_id", "notifications", ["user_id"]),
+    ("ix_conversations_buyer_id", "conversations", ["buyer_id"]),
+    ("ix_conversations_seller_id", "conversations", ["seller_id"]),
+]
+
+
+def _existing_indexes(table: str) -> set[str]:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    for name, table, columns in COMPOSITE_INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+    for name, table, _columns in REDUNDANT_INDEXES:
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
+
+
+def downgrade() -> None:
+    for name, table, columns in REDUNDANT_INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+    for name, table, _columns in COMPOSITE_INDEXES:
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
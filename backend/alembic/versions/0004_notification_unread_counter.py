@@ -0,0 +1,43 @@
+"""per-user unread notification counter
+
+Revision ID: 0004_notification_unread_counter
+Revises: 0003_hot_path_indexes
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_notification_unread_counter"
+down_revision: Union[str, None] = "0003_hot_path_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+users = sa.table("users", sa.column("id", sa.Integer), sa.column("unread_notifications", sa.Integer))
+notifications = sa.table(
+    "notifications",
+    sa.column("user_id", sa.Integer),
+    sa.column("is_read", sa.Boolean),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = {column["name"] for column in sa.inspect(bind).get_columns("users")}
+    if "unread_notifications" not in columns:
+        op.add_column("users", sa.Column("unread_notifications", sa.Integer(), nullable=False, server_default="0"))
+
+    unread = (
+        sa.select(sa.func.count())
+        .select_from(notifications)
+        .where(notifications.c.user_id == users.c.id, notifications.c.is_read.is_(False))
+        .scalar_subquery()
+    )
+    bind.execute(users.update().values(unread_notifications=unread))
+
+
+def downgrade() -> None:
+    op.drop_column("users", "unread_notifications")
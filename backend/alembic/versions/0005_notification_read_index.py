@@ -0,0 +1,33 @@
+"""(user_id, is_read, created_at) index for filtered notification pages and bulk read marking
+
+Revision ID: 0005_notification_read_index
+Revises: 0004_notification_unread_counter
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_notification_read_index"
+down_revision: Union[str, None] = "0004_notification_unread_counter"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_notifications_user_is_read_created_at"
+
+
+def _existing_indexes() -> set[str]:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("notifications")}
+
+
+def upgrade() -> None:
+    if INDEX_NAME not in _existing_indexes():
+        op.create_index(INDEX_NAME, "notifications", ["user_id", "is_read", "created_at"])
+
+
+def downgrade() -> None:
+    if INDEX_NAME in _existing_indexes():
+        op.drop_index(INDEX_NAME, table_name="notifications")
@@ -0,0 +1,43 @@
+"""transactional outbox for side effects drained by app.worker
+
+Revision ID: 0006_outbox_events
+Revises: 0005_notification_read_index
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_outbox_events"
+down_revision: Union[str, None] = "0005_notification_read_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE_NAME = "outbox_events"
+INDEX_NAME = "ix_outbox_events_status_available_at"
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(TABLE_NAME):
+        op.create_table(
+            TABLE_NAME,
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("topic", sa.String(length=100), nullable=False),
+            sa.Column("payload_json", sa.JSON(), nullable=True),
+            sa.Column("status", sa.Enum("PENDING", "DEAD", name="outboxstatus"), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("last_error", sa.Text(), nullable=True),
+            sa.Column("available_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        )
+    if INDEX_NAME not in {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(TABLE_NAME)}:
+        op.create_index(INDEX_NAME, TABLE_NAME, ["status", "available_at"])
+
+
+def downgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table(TABLE_NAME):
+        op.drop_table(TABLE_NAME)
@@ -0,0 +1,44 @@
+"""product rating aggregates maintained from visible reviews
+
+Revision ID: 0007_product_rating_aggregates
+Revises: 0006_outbox_events
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_product_rating_aggregates"
+down_revision: Union[str, None] = "0006_outbox_events"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE_NAME = "products"
+COLUMNS = ("rating_count", "rating_sum")
+
+
+def upgrade() -> None:
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns(TABLE_NAME)}
+    for name in COLUMNS:
+        if name not in existing:
+            op.add_column(TABLE_NAME, sa.Column(name, sa.Integer(), nullable=False, server_default="0"))
+    op.execute(
+        """
+        UPDATE products SET
+            rating_count = (SELECT COUNT(*) FROM reviews WHERE reviews.product_id = products.id AND reviews.is_hidden = 0),
+            rating_sum = (
+                SELECT COALESCE(SUM(reviews.rating), 0) FROM reviews
+                WHERE reviews.product_id = products.id AND reviews.is_hidden = 0
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns(TABLE_NAME)}
+    for name in reversed(COLUMNS):
+        if name in existing:
+            op.drop_column(TABLE_NAME, name)
@@ -0,0 +1,55 @@
+"""product popularity score and job watermarks for the refresh job
+
+Revision ID: 0008_product_popularity
+Revises: 0007_product_rating_aggregates
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_product_popularity"
+down_revision: Union[str, None] = "0007_product_rating_aggregates"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+WATERMARKS_TABLE = "job_watermarks"
+PRODUCTS_TABLE = "products"
+COLUMN_NAME = "popularity_score"
+INDEXES = {
+    "ix_products_status_popularity": ["status", "popularity_score"],
+    "ix_products_status_category_popularity": ["status", "category_id", "popularity_score"],
+}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(WATERMARKS_TABLE):
+        op.create_table(
+            WATERMARKS_TABLE,
+            sa.Column("name", sa.String(length=100), primary_key=True),
+            sa.Column("last_id", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        )
+    if COLUMN_NAME not in {column["name"] for column in inspector.get_columns(PRODUCTS_TABLE)}:
+        # Scores are filled in by the first popularity refresh, which starts from empty watermarks.
+        op.add_column(PRODUCTS_TABLE, sa.Column(COLUMN_NAME, sa.Double(), nullable=False, server_default="0"))
+    existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(PRODUCTS_TABLE)}
+    for name, columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, PRODUCTS_TABLE, columns)
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing = {index["name"] for index in inspector.get_indexes(PRODUCTS_TABLE)}
+    for name in INDEXES:
+        if name in existing:
+            op.drop_index(name, table_name=PRODUCTS_TABLE)
+    if COLUMN_NAME in {column["name"] for column in inspector.get_columns(PRODUCTS_TABLE)}:
+        op.drop_column(PRODUCTS_TABLE, COLUMN_NAME)
+    if inspector.has_table(WATERMARKS_TABLE):
+        op.drop_table(WATERMARKS_TABLE)
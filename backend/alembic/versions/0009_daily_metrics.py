@@ -0,0 +1,39 @@
+"""daily_metrics rollup behind admin stats and the order trend
+
+Revision ID: 0009_daily_metrics
+Revises: 0008_product_popularity
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_daily_metrics"
+down_revision: Union[str, None] = "0008_product_popularity"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE_NAME = "daily_metrics"
+
+
+def upgrade() -> None:
+    # Filled in by the first rollup run, which starts from empty job watermarks and folds in the whole history.
+    if not sa.inspect(op.get_bind()).has_table(TABLE_NAME):
+        op.create_table(
+            TABLE_NAME,
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("orders", sa.Integer(), nullable=False),
+            sa.Column("gmv", sa.Numeric(14, 2), nullable=False),
+            sa.Column("new_users", sa.Integer(), nullable=False),
+            sa.Column("new_sellers", sa.Integer(), nullable=False),
+            sa.Column("new_products", sa.Integer(), nullable=False),
+            sa.Column("reviews", sa.Integer(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table(TABLE_NAME):
+        op.drop_table(TABLE_NAME)
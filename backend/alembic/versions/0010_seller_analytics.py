@@ -0,0 +1,62 @@
+"""per-seller daily rollups behind the seller analytics dashboard
+
+Revision ID: 0010_seller_analytics
+Revises: 0009_daily_metrics
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_seller_analytics"
+down_revision: Union[str, None] = "0009_daily_metrics"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SELLER_TABLE = "seller_daily_stats"
+PRODUCT_TABLE = "seller_product_daily_stats"
+
+
+def _counter(name: str) -> sa.Column:
+    return sa.Column(name, sa.Integer(), nullable=False)
+
+
+def upgrade() -> None:
+    # Rollups start empty: they count order transitions, views and cart adds from this release on.
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(SELLER_TABLE):
+        op.create_table(
+            SELLER_TABLE,
+            sa.Column("seller_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("day", sa.Date(), primary_key=True),
+            _counter("views"),
+            _counter("cart_adds"),
+            _counter("orders_requested"),
+            _counter("orders_accepted"),
+            _counter("orders_completed"),
+            _counter("orders_rejected"),
+            _counter("orders_canceled"),
+            sa.Column("revenue", sa.Numeric(14, 2), nullable=False),
+        )
+    if not inspector.has_table(PRODUCT_TABLE):
+        op.create_table(
+            PRODUCT_TABLE,
+            sa.Column("seller_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id", ondelete="CASCADE"), primary_key=True),
+            _counter("views"),
+            _counter("cart_adds"),
+            _counter("orders"),
+            _counter("units_sold"),
+            sa.Column("revenue", sa.Numeric(14, 2), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for name in (PRODUCT_TABLE, SELLER_TABLE):
+        if inspector.has_table(name):
+            op.drop_table(name)
@@ -0,0 +1,32 @@
+"""per-product version of the visible reviews, the validator of the reviews list
+
+Revision ID: 0011_product_reviews_version
+Revises: 0010_seller_analytics
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0011_product_reviews_version"
+down_revision: Union[str, None] = "0010_seller_analytics"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE_NAME = "products"
+COLUMN_NAME = "reviews_version"
+
+
+def upgrade() -> None:
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns(TABLE_NAME)}
+    if COLUMN_NAME not in existing:
+        op.add_column(TABLE_NAME, sa.Column(COLUMN_NAME, sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns(TABLE_NAME)}
+    if COLUMN_NAME in existing:
+        op.drop_column(TABLE_NAME, COLUMN_NAME)
@@ -0,0 +1,103 @@
+"""live marketplace totals; daily_metrics recounted and kept from outbox events instead of id watermarks
+
+Revision ID: 0012_marketplace_totals
+Revises: 0011_product_reviews_version
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0012_marketplace_totals"
+down_revision: Union[str, None] = "0011_product_reviews_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE_NAME = "marketplace_totals"
+
+users = sa.table("users", sa.column("id"), sa.column("created_at"))
+products = sa.table("products", sa.column("id"), sa.column("seller_id"), sa.column("created_at"))
+orders = sa.table("orders", sa.column("id"), sa.column("total_amount"), sa.column("created_at"))
+reviews = sa.table("reviews", sa.column("id"), sa.column("created_at"))
+daily_metrics = sa.table(
+    "daily_metrics",
+    sa.column("day"),
+    sa.column("orders"),
+    sa.column("gmv"),
+    sa.column("new_users"),
+    sa.column("new_sellers"),
+    sa.column("new_products"),
+    sa.column("reviews"),
+)
+job_watermarks = sa.table("job_watermarks", sa.column("name"))
+
+
+def _as_date(value) -> date:
+    # SQLite's date() returns text.
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def _recount(bind) -> dict:
+    """Rebuild daily_metrics from the source tables and return the current totals.
+
+    The id-watermark rollup could skip rows whose transaction committed after a higher id had been folded in.
+    """
+    daily: dict[date, dict] = defaultdict(lambda: defaultdict(int))
+    for table, field in ((users, "new_users"), (products, "new_products"), (reviews, "reviews")):
+        day = sa.func.date(table.c.created_at)
+        for value, count in bind.execute(sa.select(day, sa.func.count()).group_by(day)):
+            daily[_as_date(value)][field] += count
+    day = sa.func.date(orders.c.created_at)
+    for value, count, amount in bind.execute(sa.select(day, sa.func.count(), sa.func.sum(orders.c.total_amount)).group_by(day)):
+        daily[_as_date(value)]["orders"] += count
+        daily[_as_date(value)]["gmv"] += Decimal(amount or 0)
+    first_listing = sa.select(sa.func.min(products.c.created_at).label("created_at")).group_by(products.c.seller_id).subquery()
+    day = sa.func.date(first_listing.c.created_at)
+    for value, count in bind.execute(sa.select(day, sa.func.count()).group_by(day)):
+        daily[_as_date(value)]["new_sellers"] += count
+
+    bind.execute(sa.delete(daily_metrics))
+    fields = ("orders", "gmv", "new_users", "new_sellers", "new_products", "reviews")
+    if daily:
+        bind.execute(
+            sa.insert(daily_metrics), [{"day": key, **{field: counts[field] for field in fields}} for key, counts in sorted(daily.items())]
+        )
+    return {
+        "id": 1,
+        "users": bind.scalar(sa.select(sa.func.count()).select_from(users)) or 0,
+        "sellers": bind.scalar(sa.select(sa.func.count(sa.distinct(products.c.seller_id)))) or 0,
+        "products": bind.scalar(sa.select(sa.func.count()).select_from(products)) or 0,
+        "orders": bind.scalar(sa.select(sa.func.count()).select_from(orders)) or 0,
+        "reviews": bind.scalar(sa.select(sa.func.count()).select_from(reviews)) or 0,
+    }
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table(TABLE_NAME):
+        return
+    totals = op.create_table(
+        TABLE_NAME,
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("users", sa.Integer(), nullable=False),
+        sa.Column("sellers", sa.Integer(), nullable=False),
+        sa.Column("products", sa.Integer(), nullable=False),
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.Column("reviews", sa.Integer(), nullable=False),
+    )
+    bind.execute(sa.insert(totals).values(**_recount(bind)))
+    bind.execute(sa.delete(job_watermarks).where(job_watermarks.c.name.like("daily_metrics%")))
+
+
+def downgrade() -> None:
+    # The watermark job starts over from empty watermarks, so daily_metrics is cleared for it to refold.
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table(TABLE_NAME):
+        op.drop_table(TABLE_NAME)
+    bind.execute(sa.delete(daily_metrics))
@@ -0,0 +1,56 @@
+"""popularity scores stored in epoch units and added from outbox events; job watermarks dropped
+
+Revision ID: 0013_popularity_epoch_scores
+Revises: 0012_marketplace_totals
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from datetime import UTC, datetime
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = "0013_popularity_epoch_scores"
+down_revision: Union[str, None] = "0012_marketplace_totals"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+WATERMARKS_TABLE = "job_watermarks"
+POPULARITY_JOB = "popularity"
+
+products = sa.table("products", sa.column("popularity_score"))
+job_watermarks = sa.table("job_watermarks", sa.column("name"), sa.column("updated_at"))
+
+
+def _time_weight(at: datetime) -> float:
+    at = at if at.tzinfo else at.replace(tzinfo=UTC)
+    hours = (at - settings.popularity_epoch).total_seconds() / 3600
+    return 2.0 ** (hours / settings.popularity_half_life_hours)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table(WATERMARKS_TABLE):
+        return
+    # Stored scores were decayed to the last refresh; rescaling them to epoch units keeps the ranking.
+    last_run = bind.scalar(sa.select(job_watermarks.c.updated_at).where(job_watermarks.c.name == POPULARITY_JOB))
+    if last_run is not None:
+        bind.execute(sa.update(products).values(popularity_score=products.c.popularity_score * _time_weight(last_run)))
+    op.drop_table(WATERMARKS_TABLE)
+
+
+def downgrade() -> None:
+    # The refresh job starts over from empty watermarks and refolds the whole history, so scores start from zero.
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table(WATERMARKS_TABLE):
+        op.create_table(
+            WATERMARKS_TABLE,
+            sa.Column("name", sa.String(length=100), primary_key=True),
+            sa.Column("last_id", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        )
+    bind.execute(sa.update(products).values(popularity_score=0))
@@ -2,17 +2,16 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.core.deps import require_roles
-from app.db.session import get_db
+from app.core.principal import Principal
+from app.db.session import DbRunner, get_db_runner
 from app.models.role import RoleName
-from app.models.user import User
 from app.schemas.admin import AuditOut
 from app.services.admin_service import list_audit_logs
 
 router = APIRouter()
 
 
-@router.get("", response_model=list[AuditOut])
-def audit_logs(current_admin: User = Depends(require_roles(RoleName.ADMIN)), db: Session = Depends(get_db)):
+def _audit_logs(db: Session) -> list[AuditOut]:
     rows = list_audit_logs(db)
     return [
         AuditOut(
@@ -26,3 +25,8 @@ def audit_logs(current_admin: User = Depends(require_roles(RoleName.ADMIN)), db:
         )
         for row in rows
     ]
+
+
+@router.get("", response_model=list[AuditOut])
+async def audit_logs(current_admin: Principal = Depends(require_roles(RoleName.ADMIN)), db: DbRunner = Depends(get_db_runner)):
+    return await db.run(_audit_logs)
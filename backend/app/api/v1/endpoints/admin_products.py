@@ -1,17 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session, selectinload
 
 from app.core.deps import require_roles
-from app.db.session import get_db
+from app.core.principal import Principal
+from app.core.serialization import typed_json_response_off_loop
+from app.db.session import DbRunner, get_db_runner
 from app.models.notification import NotificationType
 from app.models.product import Product
 from app.models.role import RoleName
-from app.models.user import User
-from app.schemas.common import MessageResponse, PaginationMeta
+from app.schemas.common import MessageResponse, PaginatedResponse, PaginationMeta
 from app.schemas.product import ProductModerationRequest, ProductOut, ProductUpdate
 from app.services.admin_service import log_admin_action
-from app.services.notification_service import create_notification
+from app.services.notification_service import queue_notification
 from app.services.product_service import (
     admin_hide_or_delete_product,
     list_moderation_queue,
@@ -22,36 +23,25 @@ from app.services.product_service import (
 router = APIRouter()
 
 
-@router.get("", response_model=dict)
-def moderation_queue(
-    page: int = Query(default=1, ge=1),
-    page_size: int = Query(default=20, ge=1, le=100),
-    pending_only: bool = Query(default=False),
-    current_admin: User = Depends(require_roles(RoleName.ADMIN)),
-    db: Session = Depends(get_db),
-):
+def _queue_page(db: Session, page: int, page_size: int, pending_only: bool) -> dict:
     if pending_only:
         items, total = list_moderation_queue(db, page, page_size)
     else:
-        stmt = select(Product).options(selectinload(Product.images)).order_by(Product.created_at.desc())
-        total = len(db.scalars(stmt).all())
-        items = db.scalars(stmt.offset((page - 1) * page_size).limit(page_size)).all()
-    return {
-        "items": [ProductOut.model_validate(item).model_dump() for item in items],
-        "meta": PaginationMeta(page=page, page_size=page_size, total=total).model_dump(),
-    }
+        total = db.scalar(select(func.count(Product.id))) or 0
+        items = db.scalars(
+            select(Product)
+            .options(selectinload(Product.images))
+            .order_by(Product.created_at.desc(), Product.id.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        ).all()
+    return {"items": items, "meta": PaginationMeta(page=page, page_size=page_size, total=total)}
 
 
-@router.post("/{product_id}/moderate", response_model=ProductOut)
-def moderate(
-    product_id: int,
-    payload: ProductModerationRequest,
-    current_admin: User = Depends(require_roles(RoleName.ADMIN)),
-    db: Session = Depends(get_db),
-):
+def _moderate(db: Session, admin_id: int, product_id: int, payload: ProductModerationRequest) -> ProductOut:
     product = moderate_product(db, product_id, payload.approve, payload.reason)
 
-    create_notification(
+    queue_notification(
         db,
         user_id=product.seller_id,
         notification_type=(NotificationType.PRODUCT_APPROVED if payload.approve else NotificationType.PRODUCT_REJECTED),
@@ -61,7 +51,7 @@ def moderate(
 
     log_admin_action(
         db,
-        admin_user_id=current_admin.id,
+        admin_user_id=admin_id,
         action="moderate_product",
         target_type="product",
         target_id=product.id,
@@ -70,32 +60,19 @@ def moderate(
     return ProductOut.model_validate(product)
 
 
-@router.delete("/{product_id}", response_model=MessageResponse)
-def delete_or_hide(
-    product_id: int,
-    hard_delete: bool = Query(default=False),
-    current_admin: User = Depends(require_roles(RoleName.ADMIN)),
-    db: Session = Depends(get_db),
-):
+def _hide_or_delete(db: Session, admin_id: int, product_id: int, hard_delete: bool) -> None:
     admin_hide_or_delete_product(db, product_id, hard_delete=hard_delete)
     log_admin_action(
         db,
-        admin_user_id=current_admin.id,
+        admin_user_id=admin_id,
         action="delete_product" if hard_delete else "hide_product",
         target_type="product",
         target_id=product_id,
         details={"hard_delete": hard_delete},
     )
-    return MessageResponse(message="Product updated")
 
 
-@router.put("/{product_id}", response_model=ProductOut)
-def update_any_product(
-    product_id: int,
-    payload: ProductUpdate,
-    current_admin: User = Depends(require_roles(RoleName.ADMIN)),
-    db: Session = Depends(get_db),
-):
+def _update(db: Session, admin_id: int, product_id: int, payload: ProductUpdate) -> ProductOut:
     product = db.scalar(select(Product).options(selectinload(Product.images)).where(Product.id == product_id))
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
@@ -103,10 +80,53 @@ def update_any_product(
     updated = update_product(db, product, payload.model_dump(exclude_unset=True))
     log_admin_action(
         db,
-        admin_user_id=current_admin.id,
+        admin_user_id=admin_id,
         action="update_product",
         target_type="product",
         target_id=product_id,
         details={"fields": sorted(payload.model_dump(exclude_unset=True).keys())},
     )
     return ProductOut.model_validate(updated)
+
+
+@router.get("", response_model=PaginatedResponse[ProductOut])
+async def moderation_queue(
+    page: int = Query(default=1, ge=1),
+    page_size: int = Query(default=20, ge=1, le=100),
+    pending_only: bool = Query(default=False),
+    current_admin: Principal = Depends(require_roles(RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    body = await db.run(_queue_page, page, page_size, pending_only)
+    return await typed_json_response_off_loop(PaginatedResponse[ProductOut], body)
+
+
+@router.post("/{product_id}/moderate", response_model=ProductOut)
+async def moderate(
+    product_id: int,
+    payload: ProductModerationRequest,
+    current_admin: Principal = Depends(require_roles(RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await db.run(_moderate, current_admin.id, product_id, payload)
+
+
+@router.delete("/{product_id}", response_model=MessageResponse)
+async def delete_or_hide(
+    product_id: int,
+    hard_delete: bool = Query(default=False),
+    current_admin: Principal = Depends(require_roles(RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    await db.run(_hide_or_delete, current_admin.id, product_id, hard_delete)
+    return MessageResponse(message="Product updated")
+
+
+@router.put("/{product_id}", response_model=ProductOut)
+async def update_any_product(
+    product_id: int,
+    payload: ProductUpdate,
+    current_admin: Principal = Depends(require_roles(RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await db.run(_update, current_admin.id, product_id, payload)
@@ -1,44 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.deps import require_roles
-from app.db.session import get_db
+from app.core.principal import Principal
+from app.db.session import DbRunner, get_db_runner
 from app.models.review import Review
 from app.models.role import RoleName
-from app.models.user import User
 from app.schemas.review import ReviewOut
+from app.services import review_service
 from app.services.admin_service import log_admin_action
 
 router = APIRouter()
 
 
-@router.get("", response_model=list[ReviewOut])
-def list_reviews(
-    current_admin: User = Depends(require_roles(RoleName.ADMIN)),
-    db: Session = Depends(get_db),
-):
+def _reviews(db: Session) -> list[ReviewOut]:
     rows = db.scalars(select(Review).order_by(Review.created_at.desc())).all()
     return [ReviewOut.model_validate(row) for row in rows]
 
 
-@router.post("/{review_id}/hide", response_model=ReviewOut)
-def hide_review(
-    review_id: int,
-    hidden: bool = True,
-    current_admin: User = Depends(require_roles(RoleName.ADMIN)),
-    db: Session = Depends(get_db),
-):
-    row = db.scalar(select(Review).where(Review.id == review_id))
-    if not row:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
-    row.is_hidden = hidden
-    db.add(row)
-    db.commit()
-    db.refresh(row)
+def _set_hidden(db: Session, admin_id: int, review_id: int, hidden: bool) -> ReviewOut:
+    row = review_service.set_review_hidden(db, review_id, hidden)
     log_admin_action(
         db,
-        admin_user_id=current_admin.id,
+        admin_user_id=admin_id,
         action="hide_review" if hidden else "unhide_review",
         target_type="review",
         target_id=review_id,
@@ -47,23 +32,41 @@ def hide_review(
     return ReviewOut.model_validate(row)
 
 
-@router.delete("/{review_id}")
-def delete_review(
-    review_id: int,
-    current_admin: User = Depends(require_roles(RoleName.ADMIN)),
-    db: Session = Depends(get_db),
-):
-    row = db.scalar(select(Review).where(Review.id == review_id))
-    if not row:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
-    db.delete(row)
-    db.commit()
+def _delete(db: Session, admin_id: int, review_id: int) -> None:
+    review_service.delete_review(db, review_id)
     log_admin_action(
         db,
-        admin_user_id=current_admin.id,
+        admin_user_id=admin_id,
         action="delete_review",
         target_type="review",
         target_id=review_id,
         details={},
     )
+
+
+@router.get("", response_model=list[ReviewOut])
+async def list_reviews(
+    current_admin: Principal = Depends(require_roles(RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await db.run(_reviews)
+
+
+@router.post("/{review_id}/hide", response_model=ReviewOut)
+async def hide_review(
+    review_id: int,
+    hidden: bool = True,
+    current_admin: Principal = Depends(require_roles(RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await db.run(_set_hidden, current_admin.id, review_id, hidden)
+
+
+@router.delete("/{review_id}")
+async def delete_review(
+    review_id: int,
+    current_admin: Principal = Depends(require_roles(RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    await db.run(_delete, current_admin.id, review_id)
     return {"message": "Review deleted"}
@@ -1,21 +1,33 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from app.core.deps import require_roles
-from app.db.session import get_db
+from app.core.principal import Principal
+from app.db.session import DbRunner, get_db_runner
 from app.models.role import RoleName
-from app.models.user import User
 from app.schemas.admin import StatsOut, TrendItem
 from app.services.admin_service import get_stats, orders_trend_by_day
 
 router = APIRouter()
 
 
-@router.get("", response_model=StatsOut)
-def stats(current_admin: User = Depends(require_roles(RoleName.ADMIN)), db: Session = Depends(get_db)):
+def _stats(db: Session) -> StatsOut:
     return StatsOut(**get_stats(db))
 
 
+def _trend(db: Session, days: int) -> list[TrendItem]:
+    return [TrendItem(**row) for row in orders_trend_by_day(db, days)]
+
+
+@router.get("", response_model=StatsOut)
+async def stats(current_admin: Principal = Depends(require_roles(RoleName.ADMIN)), db: DbRunner = Depends(get_db_runner)):
+    return await db.run(_stats)
+
+
 @router.get("/trend", response_model=list[TrendItem])
-def trend(current_admin: User = Depends(require_roles(RoleName.ADMIN)), db: Session = Depends(get_db)):
-    return [TrendItem(**row) for row in orders_trend_by_day(db)]
+async def trend(
+    days: int = Query(default=14, ge=1, le=366),
+    current_admin: Principal = Depends(require_roles(RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await db.run(_trend, days)
@@ -3,7 +3,8 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session, selectinload
 
 from app.core.deps import require_roles
-from app.db.session import get_db
+from app.core.principal import Principal, invalidate_principal
+from app.db.session import DbRunner, get_db_runner
 from app.models.role import RoleName
 from app.models.user import User
 from app.schemas.user import UserOut
@@ -13,37 +14,46 @@ from app.services.auth_service import revoke_all_refresh_tokens_for_user
 router = APIRouter()
 
 
-@router.get("", response_model=list[UserOut])
-def list_users(
-    current_admin: User = Depends(require_roles(RoleName.ADMIN)),
-    db: Session = Depends(get_db),
-):
+def _users(db: Session) -> list[UserOut]:
     rows = db.scalars(select(User).options(selectinload(User.roles)).order_by(User.created_at.desc())).all()
     return [UserOut.model_validate(row) for row in rows]
 
 
-@router.post("/{user_id}/ban", response_model=UserOut)
-def ban_user(
-    user_id: int,
-    is_banned: bool = True,
-    current_admin: User = Depends(require_roles(RoleName.ADMIN)),
-    db: Session = Depends(get_db),
-):
+def _set_banned(db: Session, admin_id: int, user_id: int, is_banned: bool) -> UserOut:
     user = db.scalar(select(User).options(selectinload(User.roles)).where(User.id == user_id))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     user.is_banned = is_banned
     db.add(user)
     db.commit()
+    invalidate_principal(user.id)
     db.refresh(user)
     if is_banned:
         revoke_all_refresh_tokens_for_user(db, user.id)
     log_admin_action(
         db,
-        admin_user_id=current_admin.id,
+        admin_user_id=admin_id,
         action="ban_user" if is_banned else "unban_user",
         target_type="user",
         target_id=user_id,
         details={"is_banned": is_banned},
     )
     return UserOut.model_validate(user)
+
+
+@router.get("", response_model=list[UserOut])
+async def list_users(
+    current_admin: Principal = Depends(require_roles(RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await db.run(_users)
+
+
+@router.post("/{user_id}/ban", response_model=UserOut)
+async def ban_user(
+    user_id: int,
+    is_banned: bool = True,
+    current_admin: Principal = Depends(require_roles(RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await db.run(_set_banned, current_admin.id, user_id, is_banned)
@@ -2,19 +2,24 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends, Request, Response, status
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
-from app.core.deps import get_client_ip, get_current_user, get_user_agent
-from app.db.session import get_db
+from app.core.config import settings
+from app.core.deps import get_access_claims, get_client_ip, get_current_user, get_user_agent
+from app.core.principal import Principal, invalidate_principal
+from app.core.security import create_stream_ticket
+from app.db.session import DbRunner, get_db, get_db_runner
 from app.models.role import Role, RoleName
 from app.models.user import User
-from app.schemas.auth import LoginRequest, RefreshResponse, RegisterRequest, TokenResponse, UserMe
+from app.schemas.auth import LoginRequest, RefreshResponse, RegisterRequest, StreamTicketResponse, TokenResponse, UserMe
 from app.schemas.common import MessageResponse
 from app.services import auth_service
 
 router = APIRouter()
 
 
+# Registration and login stay sync endpoints on get_db: they wait for the bcrypt pool, which on the async driver would
+# block the event loop for the whole hash.
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
 def register(payload: RegisterRequest, response: Response, request: Request, db: Session = Depends(get_db)):
     user = auth_service.register_user(db, payload.email, payload.password)
@@ -42,51 +47,65 @@ def login(payload: LoginRequest, response: Response, request: Request, db: Sessi
 
 
 @router.post("/refresh", response_model=RefreshResponse)
-def refresh(request: Request, response: Response, db: Session = Depends(get_db)):
+async def refresh(request: Request, response: Response, db: DbRunner = Depends(get_db_runner)):
     token = request.cookies.get("refresh_token")
-    access_token = auth_service.refresh_access_token(db, token, response)
+    access_token = await db.run(auth_service.refresh_access_token, token, response)
     return RefreshResponse(access_token=access_token)
 
 
 @router.post("/logout", response_model=MessageResponse)
-def logout(request: Request, response: Response, db: Session = Depends(get_db)):
+async def logout(request: Request, response: Response, db: DbRunner = Depends(get_db_runner)):
     token = request.cookies.get("refresh_token")
-    auth_service.revoke_refresh_token(db, token)
+    await db.run(auth_service.revoke_refresh_token, token)
     response.delete_cookie("refresh_token", path="/api/v1/auth")
     return MessageResponse(message="Logged out")
 
 
 @router.get("/me", response_model=UserMe)
-def me(current_user: User = Depends(get_current_user)):
+async def me(current_user: Principal = Depends(get_current_user)):
     return UserMe(
         id=current_user.id,
         email=current_user.email,
-        roles=[role.name for role in current_user.roles],
+        roles=sorted(current_user.roles),
         is_banned=current_user.is_banned,
         is_active=current_user.is_active,
     )
 
 
-@router.post("/roles/seller", response_model=UserMe)
-def toggle_seller_role(
-    enabled: bool = True,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
+@router.post("/stream-ticket", response_model=StreamTicketResponse)
+async def stream_ticket(claims: dict = Depends(get_access_claims), current_user: Principal = Depends(get_current_user)):
+    """Ticket for ``?ticket=`` on the event stream endpoints; the stream ends when this access token expires."""
+    return StreamTicketResponse(
+        ticket=create_stream_ticket(str(current_user.id), claims["exp"]), expires_in=settings.stream_ticket_expire_seconds
+    )
+
+
+def _set_seller_role(db: Session, user_id: int, enabled: bool) -> UserMe:
     auth_service.ensure_system_roles(db)
-    seller_role = next((role for role in current_user.roles if role.name == RoleName.SELLER), None)
+    user = db.scalar(select(User).options(selectinload(User.roles)).where(User.id == user_id))
+    seller_role = next((role for role in user.roles if role.name == RoleName.SELLER), None)
     if enabled and not seller_role:
         role_row = db.scalar(select(Role).where(Role.name == RoleName.SELLER))
-        current_user.roles.append(role_row)
+        user.roles.append(role_row)
     elif not enabled and seller_role:
-        current_user.roles = [role for role in current_user.roles if role.name != RoleName.SELLER]
-    db.add(current_user)
+        user.roles = [role for role in user.roles if role.name != RoleName.SELLER]
+    db.add(user)
     db.commit()
-    db.refresh(current_user)
+    invalidate_principal(user.id)
+    db.refresh(user)
     return UserMe(
-        id=current_user.id,
-        email=current_user.email,
-        roles=[role.name for role in current_user.roles],
-        is_banned=current_user.is_banned,
-        is_active=current_user.is_active,
+        id=user.id,
+        email=user.email,
+        roles=[role.name for role in user.roles],
+        is_banned=user.is_banned,
+        is_active=user.is_active,
     )
+
+
+@router.post("/roles/seller", response_model=UserMe)
+async def toggle_seller_role(
+    enabled: bool = True,
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await db.run(_set_seller_role, current_user.id, enabled)
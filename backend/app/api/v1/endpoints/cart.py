@@ -1,82 +1,73 @@
-from decimal import Decimal
-
 from fastapi import APIRouter, Depends, status
-from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_current_user
-from app.db.session import get_db
-from app.models.product import Product
-from app.models.user import User
+from app.core.idempotency import Idempotency, idempotent
+from app.core.principal import Principal
+from app.db.session import DbRunner, get_db_runner
 from app.schemas.cart import CartItemCreate, CartItemOut, CartItemUpdate, CartOut
-from app.services.cart_service import add_to_cart, get_or_create_cart, remove_cart_item, update_cart_item
+from app.services.cart_service import CartView, add_to_cart, load_cart_view, remove_cart_item, update_cart_item
 
 router = APIRouter()
 
 
-def serialize_cart(cart) -> CartOut:
-    items: list[CartItemOut] = []
-    total = Decimal("0.00")
-    for item in cart.items:
-        product = item.product
-        if not product:
-            continue
-        subtotal = Decimal(product.price) * item.qty
-        total += subtotal
-        items.append(
-            CartItemOut(
-                id=item.id,
-                product_id=item.product_id,
-                qty=item.qty,
-                title=product.title,
-                price=product.price,
-                seller_id=product.seller_id,
-            )
+def serialize_cart(cart: CartView) -> CartOut:
+    items = [
+        CartItemOut(
+            id=line.id,
+            product_id=line.product_id,
+            qty=line.qty,
+            title=line.title,
+            price=line.price,
+            seller_id=line.seller_id,
+            image_url=line.image_url,
         )
-    return CartOut(id=cart.id, user_id=cart.user_id, items=items, total_amount=total)
+        for line in cart.lines
+    ]
+    return CartOut(id=cart.id, user_id=cart.user_id, items=items, total_amount=cart.total_amount)
+
+
+def _cart(db: Session, user_id: int) -> CartOut:
+    return serialize_cart(load_cart_view(db, user_id))
+
+
+def _add_item(db: Session, user_id: int, payload: CartItemCreate) -> CartOut:
+    return serialize_cart(add_to_cart(db, user_id, payload.product_id, payload.qty))
+
+
+def _update_item(db: Session, user_id: int, item_id: int, qty: int) -> CartOut:
+    return serialize_cart(update_cart_item(db, user_id, item_id, qty))
+
+
+def _remove_item(db: Session, user_id: int, item_id: int) -> CartOut:
+    return serialize_cart(remove_cart_item(db, user_id, item_id))
 
 
 @router.get("", response_model=CartOut)
-def get_cart(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    cart = get_or_create_cart(db, current_user.id)
-    db.refresh(cart)
-    for item in cart.items:
-        db.refresh(item)
-        item.product = db.scalar(select(Product).where(Product.id == item.product_id))
-    return serialize_cart(cart)
+async def get_cart(current_user: Principal = Depends(get_current_user), db: DbRunner = Depends(get_db_runner)):
+    return await db.run(_cart, current_user.id)
 
 
 @router.post("/items", response_model=CartOut, status_code=status.HTTP_201_CREATED)
-def add_item(
+async def add_item(
     payload: CartItemCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    idempotency: Idempotency = Depends(idempotent("cart.add")),
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    cart = add_to_cart(db, current_user.id, payload.product_id, payload.qty)
-    db.refresh(cart)
-    for item in cart.items:
-        item.product = db.scalar(select(Product).where(Product.id == item.product_id))
-    return serialize_cart(cart)
+    return await idempotency.run(lambda: db.run(_add_item, current_user.id, payload), payload)
 
 
 @router.put("/items/{item_id}", response_model=CartOut)
-def update_item(
+async def update_item(
     item_id: int,
     payload: CartItemUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    cart = update_cart_item(db, current_user.id, item_id, payload.qty)
-    db.refresh(cart)
-    for item in cart.items:
-        item.product = db.scalar(select(Product).where(Product.id == item.product_id))
-    return serialize_cart(cart)
+    return await db.run(_update_item, current_user.id, item_id, payload.qty)
 
 
 @router.delete("/items/{item_id}", response_model=CartOut)
-def delete_item(item_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    cart = remove_cart_item(db, current_user.id, item_id)
-    db.refresh(cart)
-    for item in cart.items:
-        item.product = db.scalar(select(Product).where(Product.id == item.product_id))
-    return serialize_cart(cart)
+async def delete_item(item_id: int, current_user: Principal = Depends(get_current_user), db: DbRunner = Depends(get_db_runner)):
+    return await db.run(_remove_item, current_user.id, item_id)
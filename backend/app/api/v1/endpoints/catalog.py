@@ -1,20 +1,49 @@
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session, selectinload
 
-from app.db.session import get_db
-from app.models.product import Product
-from app.schemas.common import PaginationMeta
+from app.core.response_cache import CATALOG_NAMESPACE, POPULAR_NAMESPACE, CachedResponse, cached_json
+from app.core.serialization import dump_json_off_loop
+from app.db.session import DbRunner, get_db_runner
+from app.models.product import Product, ProductStatus
+from app.schemas.common import PaginatedResponse, PaginationMeta
 from app.schemas.product import ProductOut
 from app.services.product_service import list_public_products
+from app.services.seller_analytics_service import record_product_activity
 
 router = APIRouter()
 
 
-@router.get("", response_model=dict)
-def catalog_list(
+def _catalog_page(db: Session, params: dict) -> dict:
+    page, page_size = params["page"], params["page_size"]
+    items, total, next_cursor = list_public_products(
+        db,
+        params["q"],
+        params["category_id"],
+        params["min_price"],
+        params["max_price"],
+        params["sort"],
+        page,
+        page_size,
+        cursor=params["cursor"],
+        include_total=params["with_total"],
+    )
+    meta = PaginationMeta(page=page, page_size=page_size, total=total, next_cursor=next_cursor)
+    return {"items": items, "meta": meta}
+
+
+def _load_product(db: Session, product_id: int) -> Product:
+    product = db.scalar(select(Product).options(selectinload(Product.images)).where(Product.id == product_id))
+    if not product:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    return product
+
+
+@router.get("", response_model=PaginatedResponse[ProductOut])
+async def catalog_list(
+    request: Request,
     q: str | None = Query(default=None),
     category_id: int | None = Query(default=None),
     min_price: Decimal | None = Query(default=None),
@@ -22,19 +51,41 @@ def catalog_list(
     sort: str = Query(default="new"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(default=None),
+    with_total: bool = Query(default=True),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    items, total = list_public_products(db, q, category_id, min_price, max_price, sort, page, page_size)
-    return {
-        "items": [ProductOut.model_validate(item).model_dump() for item in items],
-        "meta": PaginationMeta(page=page, page_size=page_size, total=total).model_dump(),
+    params = {
+        "q": q,
+        "category_id": category_id,
+        "min_price": min_price,
+        "max_price": max_price,
+        "sort": sort,
+        "page": page,
+        "page_size": page_size,
+        "cursor": cursor,
+        "with_total": with_total,
     }
 
+    # The rows are loaded through the runner and encoded on a worker thread, so the event loop never encodes a page.
+    async def build() -> CachedResponse:
+        page = await db.run(_catalog_page, params)
+        return CachedResponse(await dump_json_off_loop(PaginatedResponse[ProductOut], page))
+
+    namespaces = (CATALOG_NAMESPACE, POPULAR_NAMESPACE) if sort == "popular" else (CATALOG_NAMESPACE,)
+    response, _entry = await cached_json(request, "catalog_list", params, build, namespaces)
+    return response
+
 
 @router.get("/{product_id}", response_model=ProductOut)
-def product_detail(product_id: int, db: Session = Depends(get_db)):
-    stmt = select(Product).options(selectinload(Product.images)).where(Product.id == product_id)
-    product = db.scalar(stmt)
-    if not product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    return ProductOut.model_validate(product)
+async def product_detail(product_id: int, request: Request, db: DbRunner = Depends(get_db_runner)):
+    async def build() -> CachedResponse:
+        product = await db.run(_load_product, product_id)
+        context = {"seller_id": product.seller_id, "active": product.status == ProductStatus.ACTIVE}
+        return CachedResponse(await dump_json_off_loop(ProductOut, product), context)
+
+    response, entry = await cached_json(request, "product_detail", {"product_id": product_id}, build)
+    # Views are counted on hits too, from the ids kept next to the cached body.
+    if entry.context["active"]:
+        record_product_activity(entry.context["seller_id"], product_id, "views")
+    return response
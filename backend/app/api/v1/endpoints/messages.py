@@ -1,78 +1,186 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_current_user
-from app.db.session import get_db
+from app.core.broker import get_broker
+from app.core.deps import StreamUser, get_current_user, get_stream_user
+from app.core.idempotency import Idempotency, idempotent
+from app.core.principal import Principal
+from app.core.sse import event_stream, sse_response
+from app.db.session import DbRunner, get_db_runner
 from app.models.conversation import Conversation
-from app.models.user import User
 from app.schemas.common import MessageResponse
-from app.schemas.message import ConversationCreate, ConversationOut, MessageCreate, MessageOut
+from app.schemas.message import ConversationCreate, ConversationOut, InboxEntryOut, InboxMessageOut, MessageCreate, MessageOut
 from app.services.message_service import (
+    InboxEntry,
     create_message,
     get_or_create_conversation,
+    list_inbox,
     list_messages,
+    list_messages_since,
     list_user_conversations,
     mark_messages_read,
+    message_channel,
+    message_event,
 )
 
 router = APIRouter()
 
+SNIPPET_LENGTH = 140
+
+
+def serialize_inbox_entry(entry: InboxEntry) -> InboxEntryOut:
+    conversation, message = entry.conversation, entry.last_message
+    last_message = None
+    if message is not None:
+        snippet = message.body if len(message.body) <= SNIPPET_LENGTH else message.body[: SNIPPET_LENGTH - 1] + "…"
+        last_message = InboxMessageOut(
+            id=message.id, sender_id=message.sender_id, snippet=snippet, is_read=message.is_read, created_at=message.created_at
+        )
+    return InboxEntryOut(
+        id=conversation.id,
+        buyer_id=conversation.buyer_id,
+        seller_id=conversation.seller_id,
+        product_id=conversation.product_id,
+        product_title=entry.product_title,
+        counterpart_id=entry.counterpart_id,
+        counterpart_name=entry.counterpart_name,
+        last_message=last_message,
+        unread_count=entry.unread_count,
+        updated_at=conversation.updated_at,
+    )
+
+
+def _inbox_page(db: Session, user_id: int, cursor: str | None, limit: int) -> tuple[list[InboxEntryOut], str | None]:
+    entries, next_cursor = list_inbox(db, user_id, cursor, limit)
+    return [serialize_inbox_entry(entry) for entry in entries], next_cursor
+
+
+def _conversations(db: Session, user_id: int) -> list[ConversationOut]:
+    return [ConversationOut.model_validate(row) for row in list_user_conversations(db, user_id)]
+
+
+def _missed_messages(db: Session, user_id: int, last_event_id: int | None) -> list:
+    try:
+        return [] if last_event_id is None else [message_event(row) for row in list_messages_since(db, user_id, last_event_id)]
+    finally:
+        db.close()
+
+
+def _start_conversation(db: Session, user_id: int, payload: ConversationCreate) -> ConversationOut:
+    return ConversationOut.model_validate(get_or_create_conversation(db, user_id, payload.seller_id, payload.product_id))
+
+
+def _get_conversation(db: Session, conversation_id: int) -> Conversation:
+    conversation = db.scalar(select(Conversation).where(Conversation.id == conversation_id))
+    if not conversation:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
+    return conversation
+
+
+def _messages(
+    db: Session,
+    conversation_id: int,
+    user_id: int,
+    after: datetime | None,
+    before_id: int | None,
+    after_id: int | None,
+    limit: int,
+) -> list[MessageOut]:
+    conversation = _get_conversation(db, conversation_id)
+    rows = list_messages(db, conversation, user_id, after, before_id=before_id, after_id=after_id, limit=limit)
+    return [MessageOut.model_validate(row) for row in rows]
+
+
+def _send_message(db: Session, conversation_id: int, user_id: int, payload: MessageCreate) -> MessageOut:
+    conversation = _get_conversation(db, conversation_id)
+    return MessageOut.model_validate(create_message(db, conversation, user_id, payload.body))
+
+
+def _mark_read(db: Session, conversation_id: int, user_id: int) -> int:
+    return mark_messages_read(db, _get_conversation(db, conversation_id), user_id)
+
+
+@router.get("/inbox", response_model=list[InboxEntryOut])
+async def get_inbox(
+    response: Response,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=30, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
+):
+    entries, next_cursor = await db.run(_inbox_page, current_user.id, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return entries
+
 
 @router.get("/conversations", response_model=list[ConversationOut])
-def get_conversations(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    rows = list_user_conversations(db, current_user.id)
-    return [ConversationOut.model_validate(row) for row in rows]
+async def get_conversations(current_user: Principal = Depends(get_current_user), db: DbRunner = Depends(get_db_runner)):
+    return await db.run(_conversations, current_user.id)
+
+
+@router.get("/stream")
+async def stream_messages(
+    last_event_id: int | None = Header(default=None),
+    stream_user: StreamUser = Depends(get_stream_user),
+    db: DbRunner = Depends(get_db_runner),
+):
+    """Server-sent events with every new message in the caller's conversations.
+
+    Reconnecting clients send ``Last-Event-ID`` and first receive what they missed.
+    """
+    user_id = stream_user.principal.id
+    subscription = get_broker().subscribe(message_channel(user_id))
+    try:
+        backlog = await db.run(_missed_messages, user_id, last_event_id)
+    except BaseException:
+        subscription.close()
+        raise
+    return sse_response(event_stream("messages", subscription, backlog, is_open=stream_user.is_valid))
 
 
 @router.post("/conversations", response_model=ConversationOut)
-def start_conversation(
+async def start_conversation(
     payload: ConversationCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    idempotency: Idempotency = Depends(idempotent("messages.start")),
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    conversation = get_or_create_conversation(db, current_user.id, payload.seller_id, payload.product_id)
-    return ConversationOut.model_validate(conversation)
+    return await idempotency.run(lambda: db.run(_start_conversation, current_user.id, payload), payload)
 
 
 @router.get("/conversations/{conversation_id}", response_model=list[MessageOut])
-def get_messages(
+async def get_messages(
     conversation_id: int,
     after: datetime | None = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    before_id: int | None = Query(default=None),
+    after_id: int | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=200),
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    conversation = db.scalar(select(Conversation).where(Conversation.id == conversation_id))
-    if not conversation:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
-    rows = list_messages(db, conversation, current_user.id, after)
-    return [MessageOut.model_validate(row) for row in rows]
+    return await db.run(_messages, conversation_id, current_user.id, after, before_id, after_id, limit)
 
 
 @router.post("/conversations/{conversation_id}", response_model=MessageOut)
-def send_message(
+async def send_message(
     conversation_id: int,
     payload: MessageCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    idempotency: Idempotency = Depends(idempotent("messages.send")),
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    conversation = db.scalar(select(Conversation).where(Conversation.id == conversation_id))
-    if not conversation:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
-    message = create_message(db, conversation, current_user.id, payload.body)
-    return MessageOut.model_validate(message)
+    return await idempotency.run(lambda: db.run(_send_message, conversation_id, current_user.id, payload), conversation_id, payload)
 
 
 @router.post("/conversations/{conversation_id}/read", response_model=MessageResponse)
-def mark_read(
+async def mark_read(
     conversation_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    conversation = db.scalar(select(Conversation).where(Conversation.id == conversation_id))
-    if not conversation:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
-    count = mark_messages_read(db, conversation, current_user.id)
+    count = await db.run(_mark_read, conversation_id, current_user.id)
     return MessageResponse(message=f"Marked {count} messages as read")
@@ -1,24 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_current_user
-from app.db.session import get_db
-from app.models.user import User
-from app.schemas.notification import NotificationOut
-from app.services.notification_service import list_notifications, mark_notification_read
+from app.core.broker import BrokerEvent, get_broker
+from app.core.deps import StreamUser, get_current_user, get_stream_user
+from app.core.principal import Principal
+from app.core.sse import event_stream, sse_response
+from app.db.session import DbRunner, get_db_runner
+from app.models.notification import NotificationType
+from app.schemas.notification import NotificationBulkRead, NotificationBulkReadOut, NotificationOut, UnreadCountOut
+from app.services.notification_service import (
+    get_unread_count,
+    list_notifications,
+    mark_notification_read,
+    mark_notifications_read,
+    notification_channel,
+)
 
 router = APIRouter()
 
 
-@router.get("", response_model=list[NotificationOut])
-def list_my_notifications(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    rows = list_notifications(db, current_user.id)
-    return [NotificationOut.model_validate(row) for row in rows]
+def _notification_page(
+    db: Session, user_id: int, notification_type: NotificationType | None, is_read: bool | None, cursor: str | None, limit: int
+) -> tuple[list[NotificationOut], str | None]:
+    rows, next_cursor = list_notifications(db, user_id, notification_type, is_read, cursor, limit)
+    return [NotificationOut.model_validate(row) for row in rows], next_cursor
 
 
-@router.post("/{notification_id}/read", response_model=NotificationOut)
-def mark_read(notification_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    row = mark_notification_read(db, current_user.id, notification_id, True)
+def _mark_many_read(db: Session, user_id: int, payload: NotificationBulkRead) -> NotificationBulkReadOut:
+    updated = mark_notifications_read(db, user_id, ids=payload.ids, before=payload.before)
+    return NotificationBulkReadOut(updated=updated, unread=get_unread_count(db, user_id))
+
+
+def _mark_read(db: Session, user_id: int, notification_id: int) -> NotificationOut:
+    row = mark_notification_read(db, user_id, notification_id, True)
     if not row:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
     return NotificationOut.model_validate(row)
+
+
+def _unread_then_release(db: Session, user_id: int) -> int:
+    try:
+        return get_unread_count(db, user_id)
+    finally:
+        db.close()
+
+
+@router.get("", response_model=list[NotificationOut])
+async def list_my_notifications(
+    response: Response,
+    notification_type: NotificationType | None = Query(default=None, alias="type"),
+    is_read: bool | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=200),
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
+):
+    rows, next_cursor = await db.run(_notification_page, current_user.id, notification_type, is_read, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
+@router.post("/read", response_model=NotificationBulkReadOut)
+async def mark_many_read(
+    payload: NotificationBulkRead,
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await db.run(_mark_many_read, current_user.id, payload)
+
+
+@router.get("/unread-count", response_model=UnreadCountOut)
+async def unread_count(current_user: Principal = Depends(get_current_user), db: DbRunner = Depends(get_db_runner)):
+    return UnreadCountOut(unread=await db.run(get_unread_count, current_user.id))
+
+
+@router.get("/stream")
+async def stream_notifications(stream_user: StreamUser = Depends(get_stream_user), db: DbRunner = Depends(get_db_runner)):
+    """Server-sent events: the current unread count on connect, then every new notification as it is committed."""
+    user_id = stream_user.principal.id
+    subscription = get_broker().subscribe(notification_channel(user_id))
+    try:
+        unread = await db.run(_unread_then_release, user_id)
+    except BaseException:
+        subscription.close()
+        raise
+    initial = [BrokerEvent(event="unread", data={"unread": unread})]
+    return sse_response(event_stream("notifications", subscription, initial, is_open=stream_user.is_valid))
+
+
+@router.post("/{notification_id}/read", response_model=NotificationOut)
+async def mark_read(notification_id: int, current_user: Principal = Depends(get_current_user), db: DbRunner = Depends(get_db_runner)):
+    return await db.run(_mark_read, current_user.id, notification_id)
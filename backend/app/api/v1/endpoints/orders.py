@@ -1,59 +1,80 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session, selectinload
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy.orm import Session
 
 from app.core.deps import get_current_user, require_roles
-from app.db.session import get_db
-from app.models.order import Order
+from app.core.idempotency import Idempotency, idempotent
+from app.core.principal import Principal
+from app.db.session import DbRunner, get_db_runner
+from app.models.order import OrderStatus
 from app.models.role import RoleName
-from app.models.user import User
 from app.schemas.order import CheckoutRequest, CheckoutResponse, OrderOut, OrderStatusUpdate
 from app.services.checkout_service import checkout_cart, list_user_orders, update_order_status
 
 router = APIRouter()
 
 
+def _place_orders(db: Session, user_id: int, payload: CheckoutRequest) -> CheckoutResponse:
+    orders = checkout_cart(db, user_id, payload.model_dump())
+    return CheckoutResponse(orders=[OrderOut.model_validate(order) for order in orders], total_orders=len(orders))
+
+
+def _order_page(
+    db: Session, user_id: int, as_seller: bool, status_filter: OrderStatus | None, cursor: str | None, limit: int
+) -> tuple[list[OrderOut], str | None]:
+    orders, next_cursor = list_user_orders(db, user_id, as_seller=as_seller, order_status=status_filter, cursor=cursor, limit=limit)
+    return [OrderOut.model_validate(order) for order in orders], next_cursor
+
+
+def _update_status(db: Session, order_id: int, user_id: int, new_status: OrderStatus, as_seller: bool) -> OrderOut:
+    return OrderOut.model_validate(update_order_status(db, order_id, user_id, new_status, is_seller=as_seller))
+
+
 @router.post("/checkout", response_model=CheckoutResponse, status_code=status.HTTP_201_CREATED)
-def checkout(payload: CheckoutRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    orders = checkout_cart(db, current_user.id, payload.model_dump())
-    hydrated: list[Order] = []
-    for order in orders:
-        row = db.scalar(select(Order).options(selectinload(Order.items)).where(Order.id == order.id))
-        hydrated.append(row)
-    return CheckoutResponse(orders=[OrderOut.model_validate(order) for order in hydrated], total_orders=len(hydrated))
+async def checkout(
+    payload: CheckoutRequest,
+    idempotency: Idempotency = Depends(idempotent("checkout")),
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await idempotency.run(lambda: db.run(_place_orders, current_user.id, payload), payload)
 
 
 @router.get("/my", response_model=list[OrderOut])
-def buyer_orders(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    orders = list_user_orders(db, current_user.id, as_seller=False)
-    result = []
-    for order in orders:
-        row = db.scalar(select(Order).options(selectinload(Order.items)).where(Order.id == order.id))
-        result.append(OrderOut.model_validate(row))
-    return result
+async def buyer_orders(
+    response: Response,
+    status_filter: OrderStatus | None = Query(default=None, alias="status"),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=200),
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
+):
+    orders, next_cursor = await db.run(_order_page, current_user.id, False, status_filter, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return orders
 
 
 @router.get("/seller", response_model=list[OrderOut])
-def seller_orders(
-    current_user: User = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
-    db: Session = Depends(get_db),
+async def seller_orders(
+    response: Response,
+    status_filter: OrderStatus | None = Query(default=None, alias="status"),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=200),
+    current_user: Principal = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    orders = list_user_orders(db, current_user.id, as_seller=True)
-    result = []
-    for order in orders:
-        row = db.scalar(select(Order).options(selectinload(Order.items)).where(Order.id == order.id))
-        result.append(OrderOut.model_validate(row))
-    return result
+    orders, next_cursor = await db.run(_order_page, current_user.id, True, status_filter, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return orders
 
 
 @router.patch("/{order_id}/status", response_model=OrderOut)
-def update_status(
+async def update_status(
     order_id: int,
     payload: OrderStatusUpdate,
     as_seller: bool = False,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    order = update_order_status(db, order_id, current_user.id, payload.status, is_seller=as_seller)
-    row = db.scalar(select(Order).options(selectinload(Order.items)).where(Order.id == order.id))
-    return OrderOut.model_validate(row)
+    return await db.run(_update_status, order_id, current_user.id, payload.status, as_seller)
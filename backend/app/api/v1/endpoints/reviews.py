@@ -1,26 +1,36 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_current_user
-from app.db.session import get_db
-from app.models.user import User
+from app.core.http_cache import conditional_response, not_modified, strong_etag
+from app.core.principal import Principal
+from app.core.serialization import dump_json_off_loop
+from app.db.session import DbRunner, get_db_runner
 from app.schemas.review import ReviewCreate, ReviewOut
-from app.services.review_service import create_review, list_product_reviews
+from app.services.review_service import create_review, list_product_reviews, product_reviews_version
 
 router = APIRouter()
 
 
+def _add_review(db: Session, user_id: int, product_id: int, payload: ReviewCreate) -> ReviewOut:
+    return ReviewOut.model_validate(create_review(db, user_id, product_id, payload.rating, payload.text))
+
+
 @router.get("/product/{product_id}", response_model=list[ReviewOut])
-def list_reviews(product_id: int, db: Session = Depends(get_db)):
-    return [ReviewOut.model_validate(item) for item in list_product_reviews(db, product_id)]
+async def list_reviews(product_id: int, request: Request, db: DbRunner = Depends(get_db_runner)):
+    # The validator is the product's reviews version, so a revalidation that matches never loads or encodes the reviews.
+    etag = strong_etag("reviews", product_id, await db.run(product_reviews_version, product_id))
+    if not_modified(request, etag):
+        return conditional_response(request, "product_reviews", etag)
+    body = await dump_json_off_loop(list[ReviewOut], await db.run(list_product_reviews, product_id))
+    return conditional_response(request, "product_reviews", etag, body)
 
 
 @router.post("/product/{product_id}", response_model=ReviewOut)
-def add_review(
+async def add_review(
     product_id: int,
     payload: ReviewCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    review = create_review(db, current_user.id, product_id, payload.rating, payload.text)
-    return ReviewOut.model_validate(review)
+    return await db.run(_add_review, current_user.id, product_id, payload)
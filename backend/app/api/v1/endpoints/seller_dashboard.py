@@ -1,22 +1,45 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.core.deps import require_roles
-from app.db.session import get_db
+from app.core.principal import Principal
+from app.db.session import DbRunner, get_db_runner
 from app.models.order import Order
 from app.models.product import Product
 from app.models.role import RoleName
-from app.models.user import User
+from app.schemas.seller import SellerAnalyticsOut
+from app.services.seller_analytics_service import get_seller_analytics
 
 router = APIRouter()
 
 
+def _counts(db: Session, seller_id: int) -> dict[str, int]:
+    products = db.scalar(select(func.count(Product.id)).where(Product.seller_id == seller_id)) or 0
+    orders = db.scalar(select(func.count(Order.id)).where(Order.seller_id == seller_id)) or 0
+    return {"products": products, "orders": orders}
+
+
+def _analytics(db: Session, seller_id: int, date_from: date | None, date_to: date | None, top: int) -> SellerAnalyticsOut:
+    return SellerAnalyticsOut(**get_seller_analytics(db, seller_id, date_from, date_to, top)._asdict())
+
+
 @router.get("")
-def seller_dashboard(
-    current_user: User = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
-    db: Session = Depends(get_db),
+async def seller_dashboard(
+    current_user: Principal = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    products = db.scalar(select(func.count(Product.id)).where(Product.seller_id == current_user.id)) or 0
-    orders = db.scalar(select(func.count(Order.id)).where(Order.seller_id == current_user.id)) or 0
-    return {"products": products, "orders": orders}
+    return await db.run(_counts, current_user.id)
+
+
+@router.get("/analytics", response_model=SellerAnalyticsOut)
+async def seller_analytics(
+    date_from: date | None = Query(default=None),
+    date_to: date | None = Query(default=None),
+    top: int = Query(default=10, ge=1, le=50),
+    current_user: Principal = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await db.run(_analytics, current_user.id, date_from, date_to, top)
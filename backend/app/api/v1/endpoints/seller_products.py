@@ -2,16 +2,17 @@ from pathlib import Path
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, File, Query, UploadFile, status
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session, selectinload
 
 from app.core.config import settings
 from app.core.deps import require_roles
-from app.db.session import get_db
+from app.core.principal import Principal
+from app.core.serialization import typed_json_response_off_loop
+from app.db.session import DbRunner, get_db_runner
 from app.models.product import Product
 from app.models.role import RoleName
-from app.models.user import User
-from app.schemas.common import MessageResponse, PaginationMeta
+from app.schemas.common import MessageResponse, PaginatedResponse, PaginationMeta
 from app.schemas.product import ProductCreate, ProductOut, ProductUpdate
 from app.services.product_service import (
     create_product,
@@ -24,85 +25,99 @@ from app.services.product_service import (
 router = APIRouter()
 
 
-@router.get("", response_model=dict)
-def seller_products(
+def _seller_page(db: Session, seller_id: int, page: int, page_size: int) -> dict:
+    stmt = select(Product).where(Product.seller_id == seller_id)
+    total = db.scalar(stmt.with_only_columns(func.count(Product.id))) or 0
+    items = db.scalars(
+        stmt.options(selectinload(Product.images))
+        .order_by(Product.created_at.desc(), Product.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    ).all()
+    return {"items": items, "meta": PaginationMeta(page=page, page_size=page_size, total=total)}
+
+
+def _create(db: Session, seller_id: int, payload: ProductCreate) -> ProductOut:
+    return ProductOut.model_validate(create_product(db, seller_id, payload.model_dump()))
+
+
+def _update(db: Session, seller_id: int, product_id: int, payload: ProductUpdate) -> ProductOut:
+    product = get_seller_product(db, seller_id, product_id)
+    return ProductOut.model_validate(update_product(db, product, payload.model_dump(exclude_unset=True)))
+
+
+def _detail(db: Session, seller_id: int, product_id: int) -> ProductOut:
+    return ProductOut.model_validate(get_seller_product(db, seller_id, product_id))
+
+
+def _submit(db: Session, seller_id: int, product_id: int) -> ProductOut:
+    product = get_seller_product(db, seller_id, product_id)
+    return ProductOut.model_validate(submit_for_moderation(db, product))
+
+
+@router.get("", response_model=PaginatedResponse[ProductOut])
+async def seller_products(
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
-    current_user: User = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    stmt = (
-        select(Product)
-        .options(selectinload(Product.images))
-        .where(Product.seller_id == current_user.id)
-        .order_by(Product.created_at.desc())
-    )
-    total = len(db.scalars(stmt).all())
-    items = db.scalars(stmt.offset((page - 1) * page_size).limit(page_size)).all()
-    return {
-        "items": [ProductOut.model_validate(item).model_dump() for item in items],
-        "meta": PaginationMeta(page=page, page_size=page_size, total=total).model_dump(),
-    }
+    body = await db.run(_seller_page, current_user.id, page, page_size)
+    return await typed_json_response_off_loop(PaginatedResponse[ProductOut], body)
 
 
 @router.post("", response_model=ProductOut, status_code=status.HTTP_201_CREATED)
-def create_product_handler(
+async def create_product_handler(
     payload: ProductCreate,
-    current_user: User = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    product = create_product(db, current_user.id, payload.model_dump())
-    return ProductOut.model_validate(product)
+    return await db.run(_create, current_user.id, payload)
 
 
 @router.put("/{product_id}", response_model=ProductOut)
-def update_product_handler(
+async def update_product_handler(
     product_id: int,
     payload: ProductUpdate,
-    current_user: User = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    product = get_seller_product(db, current_user.id, product_id)
-    updated = update_product(db, product, payload.model_dump(exclude_unset=True))
-    return ProductOut.model_validate(updated)
+    return await db.run(_update, current_user.id, product_id, payload)
 
 
 @router.get("/{product_id}", response_model=ProductOut)
-def seller_product_detail(
+async def seller_product_detail(
     product_id: int,
-    current_user: User = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    product = get_seller_product(db, current_user.id, product_id)
-    return ProductOut.model_validate(product)
+    return await db.run(_detail, current_user.id, product_id)
 
 
 @router.post("/{product_id}/submit", response_model=ProductOut)
-def submit_product(
+async def submit_product(
     product_id: int,
-    current_user: User = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    product = get_seller_product(db, current_user.id, product_id)
-    submitted = submit_for_moderation(db, product)
-    return ProductOut.model_validate(submitted)
+    return await db.run(_submit, current_user.id, product_id)
 
 
 @router.delete("/{product_id}", response_model=MessageResponse)
-def delete_product(
+async def delete_product(
     product_id: int,
     hard_delete: bool = Query(default=False),
-    current_user: User = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    delete_or_archive_product(db, current_user.id, product_id, hard_delete=hard_delete)
+    await db.run(delete_or_archive_product, current_user.id, product_id, hard_delete=hard_delete)
     return MessageResponse(message="Product removed")
 
 
 @router.post("/upload-image", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def upload_product_image(
     file: UploadFile = File(...),
-    current_user: User = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
+    current_user: Principal = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
 ):
     _ = current_user
     suffix = Path(file.filename).suffix.lower() if file.filename else ".jpg"
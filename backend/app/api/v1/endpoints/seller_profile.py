@@ -3,16 +3,16 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.deps import require_roles
-from app.db.session import get_db
+from app.core.principal import Principal
+from app.db.session import DbRunner, get_db_runner
 from app.models.role import RoleName
 from app.models.seller_profile import SellerProfile
-from app.models.user import User
 from app.schemas.seller import SellerProfileOut, SellerProfileUpdate
 
 router = APIRouter()
 
 
-def _get_or_create_profile(db: Session, user: User) -> SellerProfile:
+def _get_or_create_profile(db: Session, user: Principal) -> SellerProfile:
     profile = db.scalar(select(SellerProfile).where(SellerProfile.user_id == user.id))
     if profile:
         return profile
@@ -28,33 +28,33 @@ def _get_or_create_profile(db: Session, user: User) -> SellerProfile:
     return profile
 
 
-@router.get("", response_model=SellerProfileOut)
-def get_seller_profile(
-    current_user: User = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
-    db: Session = Depends(get_db),
-):
-    profile = _get_or_create_profile(db, current_user)
-    return SellerProfileOut(
-        seller_id=current_user.id,
-        display_name=profile.display_name,
-        bio=profile.bio,
-    )
+def _profile_out(db: Session, user: Principal) -> SellerProfileOut:
+    profile = _get_or_create_profile(db, user)
+    return SellerProfileOut(seller_id=user.id, display_name=profile.display_name, bio=profile.bio)
 
 
-@router.put("", response_model=SellerProfileOut)
-def update_seller_profile(
-    payload: SellerProfileUpdate,
-    current_user: User = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
-    db: Session = Depends(get_db),
-):
-    profile = _get_or_create_profile(db, current_user)
+def _update_profile(db: Session, user: Principal, payload: SellerProfileUpdate) -> SellerProfileOut:
+    profile = _get_or_create_profile(db, user)
     profile.display_name = payload.display_name
     profile.bio = payload.bio
     db.add(profile)
     db.commit()
     db.refresh(profile)
-    return SellerProfileOut(
-        seller_id=current_user.id,
-        display_name=profile.display_name,
-        bio=profile.bio,
-    )
+    return SellerProfileOut(seller_id=user.id, display_name=profile.display_name, bio=profile.bio)
+
+
+@router.get("", response_model=SellerProfileOut)
+async def get_seller_profile(
+    current_user: Principal = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await db.run(_profile_out, current_user)
+
+
+@router.put("", response_model=SellerProfileOut)
+async def update_seller_profile(
+    payload: SellerProfileUpdate,
+    current_user: Principal = Depends(require_roles(RoleName.SELLER, RoleName.ADMIN)),
+    db: DbRunner = Depends(get_db_runner),
+):
+    return await db.run(_update_profile, current_user, payload)
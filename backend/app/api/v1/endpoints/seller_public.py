@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session, selectinload
 
-from app.db.session import get_db
+from app.core.response_cache import CachedResponse, cached_json
+from app.core.serialization import dump_json_off_loop
+from app.db.session import DbRunner, get_db_runner
 from app.models.product import Product, ProductStatus
 from app.models.role import RoleName
 from app.models.user import User
@@ -12,16 +14,22 @@ router = APIRouter()
 
 
 @router.get("/{seller_id}", response_model=SellerPublicOut)
-def seller_public_profile(
+async def seller_public_profile(
     seller_id: int,
+    request: Request,
     limit: int = Query(default=24, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: DbRunner = Depends(get_db_runner),
 ):
-    seller = db.scalar(
-        select(User)
-        .options(selectinload(User.roles), selectinload(User.seller_profile))
-        .where(User.id == seller_id)
-    )
+    async def build() -> CachedResponse:
+        profile = await db.run(_seller_profile, seller_id, limit)
+        return CachedResponse(await dump_json_off_loop(SellerPublicOut, profile))
+
+    response, _entry = await cached_json(request, "seller_public_profile", {"seller_id": seller_id, "limit": limit}, build)
+    return response
+
+
+def _seller_profile(db: Session, seller_id: int, limit: int) -> SellerPublicOut:
+    seller = db.scalar(select(User).options(selectinload(User.roles), selectinload(User.seller_profile)).where(User.id == seller_id))
     if not seller:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Seller not found")
 
@@ -50,6 +58,8 @@ def seller_public_profile(
                 description=product.description,
                 price=product.price,
                 stock=product.stock,
+                rating_avg=product.rating_avg,
+                rating_count=product.rating_count,
                 image_url=first_image,
             )
         )
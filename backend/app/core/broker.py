@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+_PENDING_KEY = "pending_broker_events"
+
+
+@dataclass(frozen=True, slots=True)
+class BrokerEvent:
+    """One push event: ``event`` names the SSE event type, ``data`` must be JSON-serialisable."""
+
+    event: str
+    data: dict[str, Any]
+    id: int | None = None
+
+
+class Subscription(Protocol):
+    async def get(self) -> BrokerEvent: ...
+
+    def close(self) -> None: ...
+
+
+class Broker(Protocol):
+    """Pub/sub used for push channels.
+
+    ``publish`` is called from request threads and must be thread-safe; ``subscribe`` is called on the event loop that
+    will consume the events. :class:`LocalBroker` only reaches subscribers in the same process; running several
+    uvicorn workers needs a shared implementation (e.g. Redis pub/sub) installed with :func:`set_broker`.
+    ``shared`` says whether a publish reaches subscribers in other processes.
+    """
+
+    shared: bool
+
+    def publish(self, channel: str, message: BrokerEvent) -> None: ...
+
+    def subscribe(self, *channels: str) -> Subscription: ...
+
+
+@dataclass(eq=False)
+class LocalSubscription:
+    broker: LocalBroker
+    channels: tuple[str, ...]
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue[BrokerEvent] = field(repr=False)
+    dropped: int = 0
+
+    def _put(self, message: BrokerEvent) -> None:
+        # A consumer that cannot keep up loses its oldest events rather than growing without bound.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    def deliver(self, message: BrokerEvent) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            self.close()
+
+    async def get(self) -> BrokerEvent:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.broker._unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process broker: every subscriber gets a bounded asyncio queue on its own event loop."""
+
+    shared = False
+
+    def __init__(self, queue_size: int = 100) -> None:
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[LocalSubscription]] = defaultdict(set)
+
+    def publish(self, channel: str, message: BrokerEvent) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+    def subscribe(self, *channels: str) -> LocalSubscription:
+        subscription = LocalSubscription(self, channels, asyncio.get_running_loop(), asyncio.Queue(maxsize=self.queue_size))
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: LocalSubscription) -> None:
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+_broker: Broker = LocalBroker(settings.push_queue_size)
+
+
+def get_broker() -> Broker:
+    return _broker
+
+
+def set_broker(broker: Broker) -> None:
+    global _broker
+    _broker = broker
+
+
+def publish_after_commit(db: Session, channel: str, message: BrokerEvent) -> None:
+    """Queue ``message`` on the session; it is published only if the surrounding transaction commits."""
+    db.info.setdefault(_PENDING_KEY, []).append((channel, message))
+
+
+@contextmanager
+def discard_pending_on_error(db: Session) -> Iterator[None]:
+    """Forget events queued inside the block if it raises, e.g. for work done in a SAVEPOINT that gets rolled back."""
+    pending = db.info.setdefault(_PENDING_KEY, [])
+    mark = len(pending)
+    try:
+        yield
+    except BaseException:
+        del pending[mark:]
+        raise
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    for channel, message in session.info.pop(_PENDING_KEY, ()):
+        get_broker().publish(channel, message)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -1,9 +1,14 @@
+from datetime import UTC, datetime
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
-from pydantic import field_validator
+from pydantic import field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Shorter half-lives run the popularity scores into float overflow within months of popularity_epoch.
+MIN_POPULARITY_HALF_LIFE_HOURS = 24.0
+
 
 class Settings(BaseSettings):
     app_name: str = "Handmade Marketplace API"
@@ -14,18 +19,91 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 14
 
+    bcrypt_rounds: int = 12
+    # None sizes the hashing pool to the CPU count; 0 hashes inline in the request thread.
+    password_hash_workers: int | None = None
+    password_hash_max_pending: int | None = None
+    password_hash_queue_timeout_seconds: float = 2.0
+
     database_url: str = "mysql+pymysql://app:app@db:3306/handmade"
+    # Serve the async endpoints (every endpoint except register and login) through AsyncSession on aiomysql instead of
+    # pymysql on the thread pool. MySQL only and off by default: on SQLite it was slower in every run (500 clients, full
+    # mix: 46 req/s async against 68 req/s sync), and the MySQL comparison (make bench-async) is still to be run.
+    database_async: bool = False
+    # Connection pool of each engine (app.db.pool). "idle" pings only connections unused for db_pool_ping_idle_seconds,
+    # where "always" pays a round-trip on every checkout; db_pool_recycle_seconds must stay below MySQL's wait_timeout.
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: Literal["always", "idle", "never"] = "idle"
+    db_pool_ping_idle_seconds: float = 30.0
+    db_pool_wait_warning_seconds: float = 0.5
 
     media_root: Path = Path("/app/media")
     media_url: str = "/media"
 
     cors_origins: str = "http://localhost:5173,http://127.0.0.1:5173"
 
+    catalog_count_cache_ttl_seconds: int = 30
+    catalog_count_cache_size: int = 1024
+
+    # Anonymous catalog, product and seller pages, as encoded JSON. Writes in this process retire them at once; other
+    # processes only see them after the TTL unless a shared store is installed (see app.core.response_cache).
+    response_cache_enabled: bool = True
+    response_cache_ttl_seconds: float = 30.0
+    response_cache_max_bytes: int = 64 * 1024 * 1024
+    # Honour `X-Cache-Bypass: 1` (benchmarks, debugging). Any client can send the header, so keep it off in production.
+    response_cache_bypass_header: bool = False
+
+    principal_cache_ttl_seconds: int = 60
+    principal_cache_size: int = 10_000
+
+    idempotency_ttl_seconds: int = 24 * 60 * 60
+    idempotency_cache_size: int = 50_000
+
+    # Drain the outbox on a thread inside the API process. A separate `python -m app.worker` can take over, but it only
+    # starts once a shared push broker is installed (see app.core.broker), since its pushes must reach SSE clients.
+    outbox_inline_worker: bool = True
+    outbox_batch_size: int = 100
+    outbox_poll_seconds: float = 1.0
+    outbox_max_attempts: int = 8
+    outbox_backoff_base_seconds: float = 2.0
+    outbox_backoff_max_seconds: float = 600.0
+
+    # sort=popular reads products.popularity_score: engagement weighted by 2 ** ((t - epoch) / half-life), so it never
+    # needs a decay pass. Scores double every half-life after the epoch and overflow a double after ~1000 half-lives
+    # (about 8 years at 72h, under 3 at the 24h minimum); before then move the epoch with scripts/rebase_popularity.py
+    # (make rebase-popularity), which rescales the stored scores in the same step.
+    popularity_half_life_hours: float = 72.0
+    popularity_epoch: datetime = datetime(2026, 1, 1, tzinfo=UTC)
+    # Each API process buffers product views and cart adds in memory and writes them to the seller rollups this often.
+    seller_activity_flush_seconds: float = 10.0
+
+    push_queue_size: int = 100
+    sse_heartbeat_seconds: float = 15.0
+    sse_retry_ms: int = 3000
+    # EventSource cannot send headers, so streams are opened with a ticket in the URL; it is only accepted this long.
+    stream_ticket_expire_seconds: int = 60
+
     @field_validator("media_root", mode="before")
     @classmethod
     def ensure_path(cls, value: str | Path) -> Path:
         return Path(value)
 
+    @field_validator("popularity_half_life_hours")
+    @classmethod
+    def half_life_leaves_headroom(cls, value: float) -> float:
+        if value < MIN_POPULARITY_HALF_LIFE_HOURS:
+            raise ValueError(f"popularity_half_life_hours must be at least {MIN_POPULARITY_HALF_LIFE_HOURS}")
+        return value
+
+    @model_validator(mode="after")
+    def async_driver_needs_mysql(self) -> "Settings":
+        if self.database_async and not self.database_url.startswith("mysql"):
+            raise ValueError("database_async is only supported with a MySQL database_url")
+        return self
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -1,16 +1,17 @@
 from __future__ import annotations
 
-from collections.abc import Callable
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import select
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session
 
-from app.core.security import decode_token
-from app.db.session import get_db
+from app.core.principal import Principal, cached_principal, load_principal, principal_generation
+from app.core.security import TokenType, decode_token
+from app.db.session import DbRunner, get_db_runner
 from app.models.role import RoleName
-from app.models.user import User
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
@@ -26,35 +27,95 @@ def get_user_agent(request: Request) -> str:
     return request.headers.get("user-agent", "unknown")
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    if not credentials:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-
+def _decode(token: str, token_type: str) -> dict:
     try:
-        payload = decode_token(credentials.credentials)
+        payload = decode_token(token)
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
+    # A stream ticket travels in URLs and must not work as a bearer token, nor an access token as a ticket.
+    if payload.get("type") != token_type:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
+    return payload
+
 
+def _principal_id(payload: dict) -> int:
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
+    return int(user_id)
+
 
-    stmt = select(User).options(selectinload(User.roles)).where(User.id == int(user_id))
-    user = db.scalar(stmt)
-    if not user:
+def _load_then_release(db: Session, user_id: int) -> Principal | None:
+    try:
+        return load_principal(db, user_id)
+    finally:
+        db.close()
+
+
+async def _resolve_principal(payload: dict, db: DbRunner) -> Principal:
+    user_id = _principal_id(payload)
+    # A cold load hands its connection back at once, in the thread that used it: with the sync driver the endpoint's
+    # own call then waits for a thread-pool slot, and requests holding connections meanwhile could take the whole pool.
+    principal = cached_principal(user_id) or await db.run(_load_then_release, user_id)
+    if not principal:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    if user.is_banned:
+    if principal.is_banned:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is banned")
-    return user
+    return principal
+
+
+async def get_access_claims(credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme)) -> dict:
+    if not credentials:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    return _decode(credentials.credentials, TokenType.ACCESS)
+
+
+async def get_current_user(claims: dict = Depends(get_access_claims), db: DbRunner = Depends(get_db_runner)) -> Principal:
+    """Authenticated principal; served from the principal cache, so a warm request does no database work."""
+    return await _resolve_principal(claims, db)
+
+
+@dataclass(frozen=True, slots=True)
+class StreamUser:
+    """The principal behind an event stream, and how long the stream may stay open for them."""
+
+    principal: Principal
+    expires_at: int
+    generation: int
+
+    def is_valid(self) -> bool:
+        """False once the credentials expire or the principal is invalidated (ban, role change) in this process.
+
+        Invalidations made by other processes are only noticed when the credentials expire.
+        """
+        return time.time() < self.expires_at and principal_generation(self.principal.id) == self.generation
+
+
+async def get_stream_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    ticket: str | None = Query(default=None),
+    db: DbRunner = Depends(get_db_runner),
+) -> StreamUser:
+    """Like :func:`get_current_user`, but also accepts ``?ticket=`` from ``POST /auth/stream-ticket``.
+
+    EventSource cannot send headers. An access token in the URL would end up in access logs; a ticket is only
+    accepted for a minute and opens nothing but streams.
+    """
+    if credentials:
+        claims = _decode(credentials.credentials, TokenType.ACCESS)
+        expires_at = claims["exp"]
+    elif ticket:
+        claims = _decode(ticket, TokenType.STREAM)
+        expires_at = claims["stream_exp"]
+    else:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    generation = principal_generation(int(claims.get("sub") or 0))
+    return StreamUser(await _resolve_principal(claims, db), expires_at, generation)
 
 
-def require_roles(*required_roles: RoleName) -> Callable[[User], User]:
-    def dependency(current_user: User = Depends(get_current_user)) -> User:
-        user_roles = {role.name for role in current_user.roles}
-        if not any(role in user_roles for role in required_roles):
+def require_roles(*required_roles: RoleName) -> Callable[[Principal], Awaitable[Principal]]:
+    async def dependency(current_user: Principal = Depends(get_current_user)) -> Principal:
+        if not current_user.has_any_role(*required_roles):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
         return current_user
 
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any
+
+from fastapi import HTTPException, status
+
+from app.core import security
+from app.core.config import settings
+from app.core.metrics import registry
+
+_queue_wait = registry.histogram(
+    "password_hash_queue_wait_seconds",
+    "Time a hashing job waited for a free slot and a pool process before bcrypt started.",
+)
+_duration = registry.histogram("password_hash_duration_seconds", "bcrypt time spent inside the hashing pool.", ["operation"])
+_in_flight = registry.gauge("password_hash_in_flight", "Hashing jobs admitted to the pool (queued or running).")
+_rejected = registry.counter("password_hash_rejected_total", "Hashing jobs refused because the queue stayed full.")
+
+
+def _timed_call(fn: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class PasswordHasher:
+    """Runs bcrypt in a separate process pool behind a bounded queue.
+
+    bcrypt is deliberately CPU-heavy; doing it in the request worker lets a burst of logins starve every other
+    request. Jobs beyond ``max_pending`` wait at most ``queue_timeout`` for a slot and are then refused with 503,
+    so a login storm degrades into fast retries instead of a stalled worker.
+    """
+
+    def __init__(self, workers: int | None = None, max_pending: int | None = None, queue_timeout: float = 2.0) -> None:
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending or max(self.workers, 1) * 4
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor: Executor | None = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> Executor | None:
+        if self.workers == 0:
+            return None
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn, not fork: the API process runs threads, and forking those is unsafe.
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _run(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        submitted = time.perf_counter()
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            _rejected.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        _in_flight.inc()
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                result, elapsed = _timed_call(fn, *args)
+            else:
+                result, elapsed = executor.submit(_timed_call, fn, *args).result()
+        finally:
+            _in_flight.dec()
+            self._slots.release()
+        _duration.labels(operation=operation).observe(elapsed)
+        _queue_wait.observe(max(time.perf_counter() - submitted - elapsed, 0.0))
+        return result
+
+    def hash(self, password: str) -> str:
+        return self._run("hash", security.hash_password, password, settings.bcrypt_rounds)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._run("verify", security.verify_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+    queue_timeout=settings.password_hash_queue_timeout_seconds,
+)
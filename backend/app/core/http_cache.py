@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Mapping
+
+from fastapi import Request, Response, status
+
+# Cache-Control per public read route. Listings and profiles can be reused briefly by browsers and nginx without
+# asking; product detail must be revalidated every time, because each request counts a view for the seller.
+CACHE_CONTROL = {
+    "catalog_list": "public, max-age=30, stale-while-revalidate=30",
+    "product_detail": "public, no-cache",
+    "seller_public_profile": "public, max-age=60, stale-while-revalidate=60",
+    "product_reviews": "public, max-age=30, stale-while-revalidate=30",
+}
+
+
+def strong_etag(*parts: bytes | str | int) -> str:
+    """A strong validator over ``parts``: the encoded body, or version counters that change whenever it would."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\x00")
+    return f'"{digest.hexdigest()}"'
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """Whether ``If-None-Match`` already names ``etag`` (weak comparison, as RFC 9110 specifies for this header)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def conditional_response(
+    request: Request, route: str, etag: str, body: bytes | None = None, headers: Mapping[str, str] | None = None
+) -> Response:
+    """A 304 when the client holds ``etag``, otherwise ``body`` as JSON; both carry the validator and the route policy.
+
+    ``body`` may be omitted only when the caller has already checked :func:`not_modified`.
+    """
+    validators = {"ETag": etag, "Cache-Control": CACHE_CONTROL[route], **(headers or {})}
+    if not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+    if body is None:
+        raise ValueError("body is required unless the request is not modified")
+    return Response(body, media_type="application/json", headers=validators)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import weakref
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass
+from typing import Any, Protocol, TypeVar
+
+import anyio
+from fastapi import Depends, Header, HTTPException, Response, status
+from pydantic import BaseModel
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.deps import get_current_user
+from app.core.metrics import registry
+from app.core.principal import Principal
+
+T = TypeVar("T")
+
+REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+_replays = registry.counter("idempotency_replays_total", "Mutations answered from the idempotency store.", ["scope"])
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResult:
+    fingerprint: str
+    value: Any
+
+
+class IdempotencyStore(Protocol):
+    """Locks and stored results of mutations, keyed by (user, scope, Idempotency-Key).
+
+    Requests with the same key are serialised on that key's lock, so a retry that arrives while the first attempt is
+    still running waits for it and then replays its result instead of running the mutation a second time, and requests
+    with different keys never wait on each other. :class:`LocalIdempotencyStore` is the in-process default and only
+    covers one API process; with several workers install a shared store (e.g. Redis SET NX for the lock plus SETEX for
+    the result) with :func:`set_idempotency_store`.
+    """
+
+    def lock(self, key: tuple) -> AbstractAsyncContextManager[Any]: ...
+
+    def get(self, key: tuple) -> StoredResult | None: ...
+
+    def set(self, key: tuple, result: StoredResult) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class LocalIdempotencyStore:
+    """Results in a :class:`TTLCache` for ``ttl_seconds`` or until evicted, one event-loop lock per key in flight."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._results = TTLCache(max_entries, ttl_seconds)
+        # Weak values: a key's lock goes away once no request holds or waits on it.
+        self._locks: weakref.WeakValueDictionary[tuple, anyio.Lock] = weakref.WeakValueDictionary()
+
+    def lock(self, key: tuple) -> anyio.Lock:
+        # Only called on the event loop, which never switches tasks inside this method.
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = anyio.Lock()
+        return lock
+
+    def get(self, key: tuple) -> StoredResult | None:
+        return self._results.get(key)
+
+    def set(self, key: tuple, result: StoredResult) -> None:
+        self._results.set(key, result)
+
+    def clear(self) -> None:
+        self._results.clear()
+
+
+idempotency_store: IdempotencyStore = LocalIdempotencyStore(settings.idempotency_cache_size, settings.idempotency_ttl_seconds)
+
+
+def set_idempotency_store(store: IdempotencyStore) -> None:
+    global idempotency_store
+    idempotency_store = store
+
+
+def _fingerprint(parts: tuple) -> str:
+    encoded = json.dumps(
+        [part.model_dump(mode="json") if isinstance(part, BaseModel) else part for part in parts],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class Idempotency:
+    scope: str
+    user_id: int
+    key: str | None
+    response: Response
+
+    async def run(self, mutation: Callable[[], Awaitable[T]], *request_parts: Any) -> T:
+        """Await ``mutation()`` once per key; a retry with the same key and request gets the stored result back.
+
+        ``request_parts`` (body, path ids) identify the request: reusing a key for a different request is a 422.
+        Only successful results are stored, so a request that failed can be retried with the same key.
+        """
+        if self.key is None:
+            return await mutation()
+        cache_key = (self.user_id, self.scope, self.key)
+        fingerprint = _fingerprint(request_parts)
+        async with idempotency_store.lock(cache_key):
+            stored = idempotency_store.get(cache_key)
+            if stored is None:
+                value = await mutation()
+                idempotency_store.set(cache_key, StoredResult(fingerprint, value))
+                return value
+        if stored.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        _replays.labels(scope=self.scope).inc()
+        self.response.headers[REPLAY_HEADER] = "true"
+        return stored.value
+
+
+def idempotent(scope: str) -> Callable[..., Awaitable[Idempotency]]:
+    """Dependency factory: ``idempotency: Idempotency = Depends(idempotent("checkout"))``."""
+
+    async def dependency(
+        response: Response,
+        idempotency_key: str | None = Header(default=None),
+        current_user: Principal = Depends(get_current_user),
+    ) -> Idempotency:
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Idempotency-Key")
+        return Idempotency(scope=scope, user_id=current_user.id, key=idempotency_key, response=response)
+
+    return dependency
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.role import RoleName
+from app.models.user import User
+
+_PENDING_KEY = "principal_invalidations"
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """What request handling needs to know about the authenticated user, detached from any session."""
+
+    id: int
+    email: str
+    is_active: bool
+    is_banned: bool
+    roles: frozenset[RoleName]
+
+    @classmethod
+    def from_user(cls, user: User) -> Principal:
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_active=user.is_active,
+            is_banned=user.is_banned,
+            roles=frozenset(role.name for role in user.roles),
+        )
+
+    def has_any_role(self, *roles: RoleName) -> bool:
+        return any(role in self.roles for role in roles)
+
+
+class PrincipalStore(Protocol):
+    """Storage for cached principals; :class:`TTLCache` is the in-process default, a shared store can replace it."""
+
+    def get(self, key: int, default: Principal | None = None) -> Principal | None: ...
+
+    def set(self, key: int, value: Principal, ttl_seconds: float | None = None) -> None: ...
+
+    def delete(self, key: int) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class _Generations:
+    """Per-user invalidation counters for the ``max_entries`` most recently invalidated users.
+
+    Every bump takes the next value of one process-wide counter, and users without an entry (evicted or never
+    invalidated) read the highest value evicted so far, so a user's generation never goes back. Forgetting a user can
+    only make the generation look changed (one uncached load, one stream ended early), never unchanged.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, int] = OrderedDict()
+        self._counter = 0
+        self._floor = 0
+
+    def get(self, user_id: int) -> int:
+        with self._lock:
+            return self._entries.get(user_id, self._floor)
+
+    def bump(self, user_id: int) -> None:
+        with self._lock:
+            self._counter += 1
+            self._entries[user_id] = self._counter
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                _user_id, self._floor = self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+principal_store: PrincipalStore = TTLCache(settings.principal_cache_size, settings.principal_cache_ttl_seconds)
+# Bumped on every invalidation. A load that started before one may have read the old row, so it must not be cached.
+_generations = _Generations(settings.principal_cache_size)
+
+
+def set_principal_store(store: PrincipalStore) -> None:
+    global principal_store
+    principal_store = store
+
+
+def cached_principal(user_id: int) -> Principal | None:
+    """The cached principal, or ``None`` when it has to be loaded; never touches the database."""
+    return principal_store.get(user_id)
+
+
+def load_principal(db: Session, user_id: int) -> Principal | None:
+    principal = principal_store.get(user_id)
+    if principal is not None:
+        return principal
+    generation = _generations.get(user_id)
+    user = db.scalar(select(User).options(selectinload(User.roles)).where(User.id == user_id))
+    if not user:
+        return None
+    principal = Principal.from_user(user)
+    if _generations.get(user_id) == generation:
+        principal_store.set(user_id, principal)
+    return principal
+
+
+def principal_generation(user_id: int) -> int:
+    """Changes whenever the user's principal is invalidated in this process."""
+    return _generations.get(user_id)
+
+
+def invalidate_principal(user_id: int) -> None:
+    _generations.bump(user_id)
+    principal_store.delete(user_id)
+
+
+# Any committed change to a user row drops its cached principal, so updates made outside the explicit
+# invalidation points (ban, role toggle) cannot be served stale for a full TTL.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _queue_invalidation(_mapper, connection, target: User) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_invalidations(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
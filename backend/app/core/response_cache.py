@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.http_cache import conditional_response, strong_etag
+from app.core.metrics import registry
+from app.models.product import Product
+from app.models.product_image import ProductImage
+from app.models.review import Review
+from app.models.seller_profile import SellerProfile
+
+CACHE_HEADER = "X-Cache"
+BYPASS_HEADER = "X-Cache-Bypass"
+CATALOG_NAMESPACE = "catalog"
+# Listings ordered by popularity_score, which the outbox worker moves without touching anything else on the pages.
+POPULAR_NAMESPACE = "catalog_popular"
+
+_PENDING_KEY = "response_cache_bumps"
+
+_requests = registry.counter("response_cache_requests_total", "Cached anonymous read responses by outcome.", ["route", "result"])
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    """An encoded JSON body and its ETag.
+
+    ``context`` carries what the endpoint still needs on a hit, e.g. the ids to count a product view.
+    """
+
+    body: bytes
+    context: dict[str, Any] = field(default_factory=dict)
+    etag: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        # Hashed once when the body is built, so hits and 304s never touch it again.
+        object.__setattr__(self, "etag", strong_etag(self.body))
+
+
+class ResponseStore(Protocol):
+    """Storage for cached responses and their version counters.
+
+    :class:`LocalResponseStore` is the in-process default. Versions only reach the process that bumped them, so with
+    several API workers other processes serve stale pages until the TTL runs out; a shared store (e.g. Redis
+    GET/SETEX plus INCR for the versions) installed with :func:`set_response_store` closes that gap.
+    """
+
+    def get(self, key: str) -> CachedResponse | None: ...
+
+    def set(self, key: str, value: CachedResponse, ttl_seconds: float | None = None) -> None: ...
+
+    def version(self, namespace: str) -> int: ...
+
+    def bump(self, namespace: str) -> int: ...
+
+    def clear(self) -> None: ...
+
+
+class LocalResponseStore:
+    """LRU of encoded responses bounded by total body size, with a TTL per entry."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+        self._bytes = 0
+        self._versions: dict[str, int] = {}
+
+    def get(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse, ttl_seconds: float | None = None) -> None:
+        if len(value.body) > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (expires_at, value)
+            self._bytes += len(value.body)
+            while self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1].body)
+
+    def version(self, namespace: str) -> int:
+        with self._lock:
+            return self._versions.get(namespace, 0)
+
+    def bump(self, namespace: str) -> int:
+        # Entries under the old version are never read again; the LRU evicts them as new pages come in.
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return self._versions[namespace]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._versions.clear()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_store: ResponseStore = LocalResponseStore(settings.response_cache_max_bytes, settings.response_cache_ttl_seconds)
+
+
+def set_response_store(store: ResponseStore) -> None:
+    global response_store
+    response_store = store
+
+
+def bump_catalog_version(namespace: str = CATALOG_NAMESPACE) -> None:
+    response_store.bump(namespace)
+
+
+def queue_catalog_bump(session: Session, namespace: str = CATALOG_NAMESPACE) -> None:
+    """Bump ``namespace``'s version once ``session`` commits; dropped if it rolls back."""
+    session.info.setdefault(_PENDING_KEY, set()).add(namespace)
+
+
+def _cache_key(route: str, versions: list[int], params: dict[str, Any]) -> str:
+    # Keyed by the endpoint's validated parameters, so "?page=01&sort=new" and "?sort=new&page=1" share an entry.
+    version = ".".join(map(str, versions))
+    return f"{route}:{version}:{json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)}"
+
+
+async def cached_json(
+    request: Request,
+    route: str,
+    params: dict[str, Any],
+    build: Callable[[], Awaitable[CachedResponse]],
+    namespaces: tuple[str, ...] = (CATALOG_NAMESPACE,),
+) -> tuple[Response, CachedResponse]:
+    """Serve ``route`` for ``params`` from the response cache, calling ``build`` on a miss.
+
+    Only for anonymous reads whose body depends on nothing but ``params`` and the data versioned by ``namespaces``
+    (catalog data by default; popular listings add ``POPULAR_NAMESPACE``). ``X-Cache`` reports HIT/MISS/BYPASS;
+    ``X-Cache-Bypass: 1`` skips the cache both ways, but only with ``response_cache_bypass_header`` on. The version is
+    read before ``build`` runs, so a page built while a write commits is stored under the version that write retires;
+    hits touch neither the database nor a thread. The response is conditional (see :mod:`app.core.http_cache`): a
+    client that holds the entry's ETag gets a 304.
+    """
+    bypass = settings.response_cache_bypass_header and request.headers.get(BYPASS_HEADER) == "1"
+    if not settings.response_cache_enabled or bypass:
+        result, entry = "BYPASS", await build()
+    else:
+        key = _cache_key(route, [response_store.version(namespace) for namespace in namespaces], params)
+        entry = response_store.get(key)
+        if entry is not None:
+            result = "HIT"
+        else:
+            result, entry = "MISS", await build()
+            response_store.set(key, entry)
+    _requests.labels(route=route, result=result.lower()).inc()
+    return conditional_response(request, route, entry.etag, entry.body, {CACHE_HEADER: result}), entry
+
+
+# Any committed write to what the cached pages show retires them. Bumps wait for the commit so that a reader cannot
+# rebuild a page from the old rows after the bump. Writes that bypass the ORM queue the bump themselves (stock
+# reservations and restores in checkout_service, popularity scores in popularity_service).
+@event.listens_for(Product, "after_insert")
+@event.listens_for(Product, "after_update")
+@event.listens_for(Product, "after_delete")
+@event.listens_for(ProductImage, "after_insert")
+@event.listens_for(ProductImage, "after_update")
+@event.listens_for(ProductImage, "after_delete")
+@event.listens_for(SellerProfile, "after_insert")
+@event.listens_for(SellerProfile, "after_update")
+@event.listens_for(Review, "after_insert")
+@event.listens_for(Review, "after_update")
+@event.listens_for(Review, "after_delete")
+def _queue_bump(_mapper, _connection, target: Any) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        queue_catalog_bump(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_bump(session: Session) -> None:
+    for namespace in sorted(session.info.pop(_PENDING_KEY, ())):
+        bump_catalog_version(namespace)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_bump(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+
+_TOKEN_RE = re.compile(r"[0-9a-zа-я]+")
+
+_VOWELS = "аеиоуыэюя"
+
+_PERFECTIVE_GERUND = (("в", "вши", "вшись"), ("ив", "ивши", "ившись", "ыв", "ывши", "ывшись"))
+_ADJECTIVE = (
+    (),
+    tuple("ее ие ые ое ими ыми ей ий ый ой ем им ым ом его ого ему ому их ых ую юю ая яя ою ею".split()),
+)
+_PARTICIPLE = (("ем", "нн", "вш", "ющ", "щ"), ("ивш", "ывш", "ующ"))
+_REFLEXIVE = ((), ("ся", "сь"))
+_VERB = (
+    ("ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но", "ет", "ют", "ны", "ть", "ешь", "нно"),
+    tuple("ила ыла ена ейте уйте ите или ыли ей уй ил ыл им ым ен ило ыло ено ят ует уют ит ыт ены ить ыть ишь ую ю".split()),
+)
+_NOUN = (
+    (),
+    tuple("а ев ов ие ье е иями ями ами еи ии и ией ей ой ий й иям ям ием ем ам ом о у ах иях ях ы ь ию ью ю ия ья я".split()),
+)
+_DERIVATIONAL = ((), ("ост", "ость"))
+
+STOP_WORDS = frozenset("и в во на с со для из по от до или не а к о об у за the and for of with a an in on".split())
+
+# Colloquial knitwear terms are folded onto the catalog vocabulary after stemming,
+# so "рукавицы" finds "варежки" and "джемпер" finds "свитер".
+_KNITWEAR_SYNONYMS = (
+    ("рукавицы", "варежки"),
+    ("перчатки", "варежки"),
+    ("пуловер", "свитер"),
+    ("джемпер", "свитер"),
+    ("свитеры", "свитер"),
+    ("палантин", "шарф"),
+    ("снуд", "шарф"),
+    ("гольфы", "носки"),
+    ("следки", "носки"),
+    ("кофта", "кардиган"),
+    ("сумочка", "сумка"),
+    ("шоппер", "сумка"),
+    ("юбочка", "юбка"),
+    ("мериносовый", "меринос"),
+    ("шерстяной", "шерсть"),
+    ("кашемировый", "кашемир"),
+    ("хлопковый", "хлопок"),
+)
+
+
+def _regions(word: str) -> tuple[int, int]:
+    rv = len(word)
+    for idx, char in enumerate(word):
+        if char in _VOWELS:
+            rv = idx + 1
+            break
+
+    r1 = len(word)
+    for idx in range(1, len(word)):
+        if word[idx] not in _VOWELS and word[idx - 1] in _VOWELS:
+            r1 = idx + 1
+            break
+    r2 = len(word)
+    for idx in range(r1 + 1, len(word)):
+        if word[idx] not in _VOWELS and word[idx - 1] in _VOWELS:
+            r2 = idx + 1
+            break
+    return rv, r2
+
+
+def _strip_longest(word: str, start: int, groups: tuple[tuple[str, ...], tuple[str, ...]]) -> str | None:
+    # Snowball semantics: pick the longest matching suffix, then check its condition without retrying shorter ones.
+    best: tuple[str, bool] | None = None
+    for needs_a_ya, suffixes in ((True, groups[0]), (False, groups[1])):
+        for suffix in suffixes:
+            if word.endswith(suffix) and len(word) - len(suffix) >= start and (best is None or len(suffix) > len(best[0])):
+                best = (suffix, needs_a_ya)
+    if best is None:
+        return None
+    suffix, needs_a_ya = best
+    cut = len(word) - len(suffix)
+    if needs_a_ya and (cut - 1 < start or word[cut - 1] not in "ая"):
+        return None
+    return word[:cut]
+
+
+def stem_russian(word: str) -> str:
+    """Snowball Russian stemmer; expects a lower-cased word with ё already folded to е."""
+    rv, r2 = _regions(word)
+
+    stripped = _strip_longest(word, rv, _PERFECTIVE_GERUND)
+    if stripped is None:
+        word = _strip_longest(word, rv, _REFLEXIVE) or word
+        stripped = _strip_longest(word, rv, _ADJECTIVE)
+        if stripped is not None:
+            stripped = _strip_longest(stripped, rv, _PARTICIPLE) or stripped
+        else:
+            stripped = _strip_longest(word, rv, _VERB)
+            if stripped is None:
+                stripped = _strip_longest(word, rv, _NOUN)
+    if stripped is not None:
+        word = stripped
+
+    if word.endswith("и") and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    word = _strip_longest(word, max(rv, r2), _DERIVATIONAL) or word
+
+    if word.endswith("нн") and len(word) - 2 >= rv:
+        word = word[:-1]
+    else:
+        superlative = _strip_longest(word, rv, ((), ("ейш", "ейше")))
+        if superlative is not None:
+            word = superlative
+            if word.endswith("нн") and len(word) - 2 >= rv:
+                word = word[:-1]
+        elif word.endswith("ь") and len(word) - 1 >= rv:
+            word = word[:-1]
+    return word
+
+
+def _normalize_token(token: str) -> str:
+    if any("а" <= char <= "я" for char in token):
+        return stem_russian(token)
+    return token
+
+
+_SYNONYMS = {_normalize_token(source): _normalize_token(target) for source, target in _KNITWEAR_SYNONYMS}
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Lower-case, fold ё, split on non-word characters, drop stop words and stem what is left."""
+    if not text:
+        return []
+    terms: list[str] = []
+    for token in _TOKEN_RE.findall(text.lower().replace("ё", "е")):
+        if len(token) < 2 or token in STOP_WORDS:
+            continue
+        term = _normalize_token(token)
+        terms.append(_SYNONYMS.get(term, term))
+    return terms
+
+
+def normalize_query(q: str | None) -> list[str]:
+    """Distinct search terms of a user query, in the order they were typed."""
+    return list(dict.fromkeys(tokenize(q)))
+
+
+def build_search_document(
+    title: str | None,
+    description: str | None,
+    tags: Iterable[str] | None = None,
+    materials: Iterable[str] | None = None,
+) -> str:
+    """Stemmed text stored in ``products.search_document``; title terms are repeated to weigh them higher."""
+    title_terms = tokenize(title)
+    parts = [*title_terms, *title_terms, *tokenize(description)]
+    for value in [*(tags or []), *(materials or [])]:
+        parts.extend(tokenize(value))
+    return " ".join(parts)
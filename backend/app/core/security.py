@@ -12,22 +12,39 @@ from app.core.config import settings
 
 class TokenType:
     ACCESS = "access"
+    STREAM = "stream"
 
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+def hash_password(password: str, rounds: int | None = None) -> str:
+    salt = bcrypt.gensalt(rounds=rounds or settings.bcrypt_rounds)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
 
 
+def password_needs_rehash(hashed_password: str, rounds: int | None = None) -> bool:
+    """True when the stored hash was made with a different bcrypt cost than the configured one."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return True
+    return int(parts[2]) != (rounds or settings.bcrypt_rounds)
+
+
 def create_access_token(subject: str) -> str:
     expire = datetime.now(UTC) + timedelta(minutes=settings.access_token_expire_minutes)
     payload = {"sub": subject, "type": TokenType.ACCESS, "exp": expire}
     return jwt.encode(payload, settings.secret_key, algorithm="HS256")
 
 
+def create_stream_ticket(subject: str, stream_expires_at: int) -> str:
+    """Token that only opens event streams; the stream it opens must end by ``stream_expires_at`` (unix time)."""
+    expire = datetime.now(UTC) + timedelta(seconds=settings.stream_ticket_expire_seconds)
+    payload = {"sub": subject, "type": TokenType.STREAM, "exp": expire, "stream_exp": stream_expires_at}
+    return jwt.encode(payload, settings.secret_key, algorithm="HS256")
+
+
 def decode_token(token: str) -> dict:
     return jwt.decode(token, settings.secret_key, algorithms=["HS256"])
 
@@ -0,0 +1,48 @@
+"""Response bodies encoded once, straight from ORM rows to JSON bytes.
+
+Returning ``model.model_dump()`` dicts from an endpoint makes FastAPI walk the payload again (response model
+validation, ``jsonable_encoder``) before ``json.dumps`` encodes it. :func:`typed_json_response` instead validates the
+rows into the response schema with ``from_attributes`` and lets pydantic-core write the bytes, so every field is
+visited once in Python and encoded in Rust. Keep ``response_model=`` on the route for the OpenAPI schema; FastAPI does
+not touch a ``Response`` that the endpoint returns itself.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from functools import cache
+from typing import Any
+
+import anyio
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@cache
+def _adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def dump_json(schema: Any, value: Any) -> bytes:
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+async def dump_json_off_loop(schema: Any, value: Any) -> bytes:
+    """:func:`dump_json` on a worker thread, for ``async def`` endpoints.
+
+    Encoding a page is CPU work that would otherwise stall the event loop. ``value`` must be fully loaded: with the
+    async driver a lazy load cannot run from the worker thread.
+    """
+    return await anyio.to_thread.run_sync(dump_json, schema, value)
+
+
+def typed_json_response(schema: Any, value: Any, status_code: int = 200, headers: Mapping[str, str] | None = None) -> Response:
+    return Response(dump_json(schema, value), status_code=status_code, headers=headers, media_type="application/json")
+
+
+async def typed_json_response_off_loop(
+    schema: Any, value: Any, status_code: int = 200, headers: Mapping[str, str] | None = None
+) -> Response:
+    """:func:`typed_json_response` encoded by :func:`dump_json_off_loop`."""
+    return Response(await dump_json_off_loop(schema, value), status_code=status_code, headers=headers, media_type="application/json")
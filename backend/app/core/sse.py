@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import AsyncIterator, Callable, Iterable
+
+from fastapi.responses import StreamingResponse
+
+from app.core.broker import BrokerEvent, Subscription
+from app.core.config import settings
+from app.core.metrics import registry
+
+_open_streams = registry.gauge("sse_open_streams", "Server-sent event streams currently connected.", ["stream"])
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_event(message: BrokerEvent) -> str:
+    lines = [f"event: {message.event}"]
+    if message.id is not None:
+        lines.append(f"id: {message.id}")
+    lines.append(f"data: {json.dumps(message.data, ensure_ascii=False, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def event_stream(
+    stream: str,
+    subscription: Subscription,
+    initial: Iterable[BrokerEvent] = (),
+    heartbeat_seconds: float | None = None,
+    is_open: Callable[[], bool] | None = None,
+) -> AsyncIterator[str]:
+    """Yield SSE frames: the ``initial`` backlog, then live events, with a comment line when the stream is idle.
+
+    ``is_open`` is checked before every live frame; the stream ends once it returns False, at the latest one
+    heartbeat later. The subscription is closed when the client disconnects (Starlette cancels the
+    generator) or the stream ends.
+    """
+    heartbeat = settings.sse_heartbeat_seconds if heartbeat_seconds is None else heartbeat_seconds
+    gauge = _open_streams.labels(stream=stream)
+    gauge.inc()
+    try:
+        yield f"retry: {settings.sse_retry_ms}\n\n"
+        for message in initial:
+            yield format_event(message)
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), heartbeat)
+            except TimeoutError:
+                message = None
+            if is_open is not None and not is_open():
+                return
+            yield ": keep-alive\n\n" if message is None else format_event(message)
+    finally:
+        gauge.dec()
+        subscription.close()
+
+
+def sse_response(body: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(body, media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DisconnectionError, TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time to get a connection from the pool, including connecting.", ["engine"], _WAIT_BUCKETS
+)
+_checked_out = registry.gauge("db_pool_checked_out", "Connections currently checked out of the pool.", ["engine"])
+_overflow = registry.gauge("db_pool_overflow", "Connections open beyond db_pool_size.", ["engine"])
+_timeouts = registry.counter("db_pool_timeouts_total", "Checkouts that gave up after db_pool_timeout_seconds.", ["engine"])
+_pings = registry.counter("db_pool_pings_total", "Liveness pings of idle connections on checkout, by result.", ["engine", "result"])
+
+_CHECKED_IN_AT = "checked_in_at"
+
+
+class _InstrumentedPool:
+    """Times every checkout; a wait over ``db_pool_wait_warning_seconds`` is logged with the pool's status."""
+
+    engine_label: str
+
+    def connect(self: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except TimeoutError:
+            _timeouts.labels(engine=self.engine_label).inc()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            _checkout_wait.labels(engine=self.engine_label).observe(waited)
+            if waited >= settings.db_pool_wait_warning_seconds:
+                logger.warning("Waited %.3fs for a %s database connection: %s", waited, self.engine_label, self.status())
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    engine_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+def engine_options(url: str, use_async: bool = False) -> dict[str, Any]:
+    """Pool arguments for ``create_engine``/``create_async_engine`` from the ``db_pool_*`` settings.
+
+    In-memory SQLite keeps SQLAlchemy's single-connection pool, which these options do not apply to.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if use_async else InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping == "always",
+    }
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Keep the pool gauges current and, for ``db_pool_pre_ping="idle"``, ping connections that sat unused.
+
+    Pass ``AsyncEngine.sync_engine`` for an async engine. The idle strategy only pays the round-trip that
+    ``pool_pre_ping`` adds to every checkout when the server may have dropped the connection in the meantime.
+    """
+    pool = engine.pool
+    label = getattr(pool, "engine_label", None)
+    if label is None:
+        return
+
+    def report(current: Pool, returning: bool = False) -> None:
+        checked_out, overflow = current.checkedout(), current.overflow()
+        if returning:
+            # "checkin" fires before the pool takes the connection back, and one returned to a full pool is closed.
+            checked_out -= 1
+            if current.checkedin() >= current.size():
+                overflow -= 1
+        _checked_out.labels(engine=label).set(checked_out)
+        _overflow.labels(engine=label).set(max(overflow, 0))
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, _connection_proxy) -> None:
+        checked_in_at = connection_record.info.pop(_CHECKED_IN_AT, None)
+        idle = checked_in_at is not None and time.monotonic() - checked_in_at >= settings.db_pool_ping_idle_seconds
+        if settings.db_pool_pre_ping == "idle" and idle:
+            try:
+                cursor = dbapi_connection.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+            except Exception as exc:
+                _pings.labels(engine=label, result="stale").inc()
+                # The pool discards this connection and retries the checkout with a fresh one.
+                raise DisconnectionError from exc
+            _pings.labels(engine=label, result="ok").inc()
+        report(engine.pool)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(_dbapi_connection, connection_record) -> None:
+        connection_record.info[_CHECKED_IN_AT] = time.monotonic()
+        report(engine.pool, returning=True)
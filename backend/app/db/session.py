@@ -1,17 +1,97 @@
-from collections.abc import Generator
+from __future__ import annotations
 
+from collections.abc import AsyncGenerator, Callable, Generator
+from functools import partial
+from typing import Any, Protocol, TypeVar
+
+import anyio
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.db.pool import engine_options, instrument_engine
+
+T = TypeVar("T")
 
-engine = create_engine(settings.database_url, future=True, pool_pre_ping=True)
+_ASYNC_DRIVERS = {"mysql": "aiomysql", "sqlite": "aiosqlite"}
+
+engine = create_engine(settings.database_url, future=True, **engine_options(settings.database_url))
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def async_database_url(url: str) -> str:
+    """``database_url`` with its driver swapped for the asyncio one (pymysql -> aiomysql, pysqlite -> aiosqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+async_engine = None
+if settings.database_async:
+    _async_url = async_database_url(settings.database_url)
+    async_engine = create_async_engine(_async_url, **engine_options(_async_url, use_async=True))
+    instrument_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False) if async_engine is not None else None
+
+
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+class DbRunner(Protocol):
+    """How ``async def`` endpoints reach the database.
+
+    ``await db.run(service_fn, *args)`` calls ``service_fn(session, *args)`` with a regular :class:`Session`, so the
+    services in ``app.services`` work unchanged under either driver.
+    """
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T: ...
+
+
+class ThreadedDbRunner:
+    """Sync driver: each call holds a thread-pool thread while it waits on the database."""
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await anyio.to_thread.run_sync(partial(fn, self.session, *args, **kwargs))
+
+
+class AsyncDbRunner:
+    """Async driver: the call runs on the event loop through ``AsyncSession.run_sync``.
+
+    The loop is released on every round-trip, so a request waiting on the database holds no thread.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await self.session.run_sync(fn, *args, **kwargs)
+
+
+async def get_db_runner() -> AsyncGenerator[DbRunner, None]:
+    """Dependency for ``async def`` endpoints; ``database_async`` picks the driver.
+
+    Every endpoint except register and login uses it; those two wait on the bcrypt pool and stay on :func:`get_db`.
+    FastAPI caches it per request, so ``get_current_user`` and the endpoint share one session.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield AsyncDbRunner(session)
+        return
+    db = SessionLocal()
+    try:
+        yield ThreadedDbRunner(db)
+    finally:
+        await anyio.to_thread.run_sync(db.close)
@@ -1,17 +1,41 @@
 from __future__ import annotations
 
+import asyncio
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
 
+import anyio
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.api.v1.router import api_router
 from app.core.config import settings
 from app.core.exceptions import AppException
+from app.core.hashing import password_hasher
+from app.core.metrics import registry
+from app.worker import OutboxWorker, activity_flusher
 
-app = FastAPI(title=settings.app_name)
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    outbox_worker = OutboxWorker() if settings.outbox_inline_worker else None
+    if outbox_worker is not None:
+        outbox_worker.start()
+    activity_flush = asyncio.create_task(activity_flusher.run_forever())
+    yield
+    activity_flush.cancel()
+    with suppress(asyncio.CancelledError):
+        await activity_flush
+    await anyio.to_thread.run_sync(activity_flusher.flush)
+    if outbox_worker is not None:
+        outbox_worker.stop()
+    password_hasher.shutdown()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +43,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -55,6 +80,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             "details": details,
             "request_id": getattr(request.state, "request_id", None),
         },
+        headers=exc.headers,
     )
 
 
@@ -76,6 +102,11 @@ def healthcheck():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.expose(), media_type="text/plain; version=0.0.4")
+
+
 if settings.app_env == "development":
     settings.media_root.mkdir(parents=True, exist_ok=True)
     app.mount(settings.media_url, StaticFiles(directory=settings.media_root), name="media")
@@ -2,16 +2,20 @@ from app.models.admin_audit_log import AdminAuditLog
 from app.models.cart import Cart, CartItem
 from app.models.category import Category
 from app.models.conversation import Conversation
+from app.models.daily_metric import DailyMetric
 from app.models.favorite import Favorite
+from app.models.marketplace_totals import MarketplaceTotals
 from app.models.message import Message
 from app.models.notification import Notification, NotificationType
 from app.models.order import Order, OrderItem, OrderStatus
+from app.models.outbox_event import OutboxEvent, OutboxStatus
 from app.models.product import Product, ProductStatus
 from app.models.product_image import ProductImage
 from app.models.refresh_token import RefreshToken
 from app.models.review import Review
 from app.models.role import Role, RoleName
 from app.models.seller_profile import SellerProfile
+from app.models.seller_stats import SellerDailyStats, SellerProductDailyStats
 from app.models.user import User
 from app.models.user_role import UserRole
 
@@ -21,13 +25,17 @@ __all__ = [
     "CartItem",
     "Category",
     "Conversation",
+    "DailyMetric",
     "Favorite",
+    "MarketplaceTotals",
     "Message",
     "Notification",
     "NotificationType",
     "Order",
     "OrderItem",
     "OrderStatus",
+    "OutboxEvent",
+    "OutboxStatus",
     "Product",
     "ProductImage",
     "ProductStatus",
@@ -35,6 +43,8 @@ __all__ = [
     "Review",
     "Role",
     "RoleName",
+    "SellerDailyStats",
+    "SellerProductDailyStats",
     "SellerProfile",
     "User",
     "UserRole",
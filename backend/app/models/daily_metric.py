@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Date, Integer, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class DailyMetric(Base):
+    """Marketplace activity for one UTC day, applied by ``rollup_service`` from outbox events written with each row.
+
+    Rows count what was created that day; later deletions are not subtracted here but in :class:`MarketplaceTotals`.
+    ``new_sellers`` counts users who went from no products to one that day.
+    """
+
+    __tablename__ = "daily_metrics"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    gmv: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"), nullable=False)
+    new_users: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    new_sellers: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    new_products: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    reviews: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
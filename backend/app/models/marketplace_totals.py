@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from sqlalchemy import Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class MarketplaceTotals(Base):
+    """Live marketplace totals behind admin stats, kept by ``rollup_service`` from the same outbox events as ``daily_metrics``.
+
+    A single row (``id`` 1). Unlike the daily rows these are current counts: deletions are subtracted, and ``sellers``
+    is the number of users who have at least one product right now.
+    """
+
+    __tablename__ = "marketplace_totals"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    users: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sellers: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    products: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    orders: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    reviews: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -4,9 +4,10 @@ import enum
 from datetime import UTC, datetime
 from decimal import Decimal
 
-from sqlalchemy import JSON, DateTime, Enum, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import JSON, DateTime, Double, Enum, ForeignKey, Index, Integer, Numeric, String, Text, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.search_text import build_search_document
 from app.db.base import Base
 
 
@@ -20,9 +21,18 @@ class ProductStatus(str, enum.Enum):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_status_created_at", "status", "created_at"),
+        Index("ix_products_status_price", "status", "price"),
+        Index("ix_products_status_category_created_at", "status", "category_id", "created_at"),
+        Index("ix_products_seller_created_at", "seller_id", "created_at"),
+        Index("ix_products_status_popularity", "status", "popularity_score"),
+        Index("ix_products_status_category_popularity", "status", "category_id", "popularity_score"),
+        Index("ix_products_search_document", "search_document", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    seller_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    seller_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     category_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("categories.id", ondelete="SET NULL"))
 
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -31,8 +41,17 @@ class Product(Base):
     stock: Mapped[int | None] = mapped_column(Integer, nullable=True)
     tags: Mapped[list[str]] = mapped_column(JSON, default=list)
     materials: Mapped[list[str]] = mapped_column(JSON, default=list)
-    status: Mapped[ProductStatus] = mapped_column(Enum(ProductStatus), default=ProductStatus.DRAFT, index=True)
+    status: Mapped[ProductStatus] = mapped_column(Enum(ProductStatus), default=ProductStatus.DRAFT)
     rejection_reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+    search_document: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    # Visible reviews only, kept in step by the Review mapper events; ``recompute_ratings`` rebuilds them.
+    rating_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped by the same events on every change to the visible reviews; the reviews list's ETag is built from it.
+    reviews_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Engagement in popularity_epoch units (see popularity_service.time_weight), added by the outbox worker; backs
+    # sort=popular.
+    popularity_score: Mapped[float] = mapped_column(Double, nullable=False, default=0.0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC), index=True)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC)
@@ -41,3 +60,15 @@ class Product(Base):
     seller = relationship("User")
     category = relationship("Category")
     images = relationship("ProductImage", back_populates="product", cascade="all, delete-orphan")
+
+    @property
+    def rating_avg(self) -> float | None:
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 2)
+
+
+@event.listens_for(Product, "before_insert")
+@event.listens_for(Product, "before_update")
+def _refresh_search_document(_mapper, _connection, target: Product) -> None:
+    target.search_document = build_search_document(target.title, target.description, target.tags, target.materials)
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from datetime import UTC, datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, Text, UniqueConstraint
+from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, Text, UniqueConstraint, event, inspect, update
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
+from app.models.product import Product
 
 
 class Review(Base):
@@ -22,3 +24,47 @@ class Review(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
 
     product = relationship("Product")
+
+
+def _adjust_rating(connection: Connection, product_id: int, count_delta: int, sum_delta: int) -> None:
+    connection.execute(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(
+            rating_count=Product.rating_count + count_delta,
+            rating_sum=Product.rating_sum + sum_delta,
+            reviews_version=Product.reviews_version + 1,
+            updated_at=Product.updated_at,
+        )
+    )
+
+
+# Product rating aggregates and the reviews version follow every ORM write to a visible review, in the same
+# transaction as the write. Callers that can race (moderation) lock the review row first so the "was it visible"
+# check below stays true until commit.
+@event.listens_for(Review, "after_insert")
+def _count_inserted_review(_mapper, connection: Connection, target: Review) -> None:
+    if not target.is_hidden:
+        _adjust_rating(connection, target.product_id, 1, target.rating)
+
+
+@event.listens_for(Review, "after_delete")
+def _uncount_deleted_review(_mapper, connection: Connection, target: Review) -> None:
+    if not target.is_hidden:
+        _adjust_rating(connection, target.product_id, -1, -target.rating)
+
+
+@event.listens_for(Review, "after_update")
+def _recount_updated_review(_mapper, connection: Connection, target: Review) -> None:
+    state = inspect(target)
+    if not any(attr.history.has_changes() for attr in state.attrs):
+        return
+    hidden_history = state.attrs.is_hidden.history
+    rating_history = state.attrs.rating.history
+    was_hidden = hidden_history.deleted[0] if hidden_history.deleted else target.is_hidden
+    if was_hidden and target.is_hidden:
+        return
+    old_rating = rating_history.deleted[0] if rating_history.deleted else target.rating
+    old_count, old_sum = (0, 0) if was_hidden else (1, old_rating)
+    new_count, new_sum = (0, 0) if target.is_hidden else (1, target.rating)
+    _adjust_rating(connection, target.product_id, new_count - old_count, new_sum - old_sum)
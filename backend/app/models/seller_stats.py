@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Date, ForeignKey, Integer, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class SellerDailyStats(Base):
+    """One seller's activity on one UTC day, kept by ``seller_analytics_service``.
+
+    Order counters record transitions into each status on that day; revenue is booked when the seller accepts an order,
+    the point after which it can no longer be canceled. The primary key leads with (seller_id, day), so any window is a
+    single range scan.
+    """
+
+    __tablename__ = "seller_daily_stats"
+
+    seller_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    views: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    cart_adds: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    orders_requested: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    orders_accepted: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    orders_completed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    orders_rejected: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    orders_canceled: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"), nullable=False)
+
+
+class SellerProductDailyStats(Base):
+    """Per-product breakdown of :class:`SellerDailyStats`, behind the seller's top-product ranking."""
+
+    __tablename__ = "seller_product_daily_stats"
+
+    seller_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    views: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    cart_adds: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    orders: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    units_sold: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"), nullable=False)
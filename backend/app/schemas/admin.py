@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from pydantic import BaseModel
 
 
@@ -12,6 +14,10 @@ class StatsOut(BaseModel):
 class TrendItem(BaseModel):
     day: str
     count: int
+    gmv: Decimal
+    new_users: int
+    new_products: int
+    reviews: int
 
 
 class AuditOut(BaseModel):
@@ -25,6 +25,11 @@ class RefreshResponse(BaseModel):
     token_type: str = "bearer"
 
 
+class StreamTicketResponse(BaseModel):
+    ticket: str
+    expires_in: int
+
+
 class UserMe(BaseModel):
     id: int
     email: EmailStr
@@ -19,6 +19,7 @@ class CartItemOut(BaseModel):
     title: str
     price: Decimal
     seller_id: int
+    image_url: str | None = None
 
 
 class CartOut(BaseModel):
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, Generic, TypeVar
 
 from pydantic import BaseModel, ConfigDict
 
@@ -18,11 +18,15 @@ class ErrorResponse(BaseModel):
 class PaginationMeta(BaseModel):
     page: int
     page_size: int
-    total: int
+    total: int | None
+    next_cursor: str | None = None
 
 
-class PaginatedResponse(BaseModel):
-    items: list[Any]
+ItemT = TypeVar("ItemT")
+
+
+class PaginatedResponse(BaseModel, Generic[ItemT]):
+    items: list[ItemT]
     meta: PaginationMeta
 
 
@@ -30,3 +30,24 @@ class MessageOut(BaseSchema):
     body: str
     is_read: bool
     created_at: datetime
+
+
+class InboxMessageOut(BaseSchema):
+    id: int
+    sender_id: int
+    snippet: str
+    is_read: bool
+    created_at: datetime
+
+
+class InboxEntryOut(BaseSchema):
+    id: int
+    buyer_id: int
+    seller_id: int
+    product_id: int | None
+    product_title: str | None
+    counterpart_id: int
+    counterpart_name: str
+    last_message: InboxMessageOut | None
+    unread_count: int
+    updated_at: datetime
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.models.notification import NotificationType
 from app.schemas.common import BaseSchema
@@ -17,3 +17,19 @@ class NotificationOut(BaseSchema):
 
 class NotificationReadRequest(BaseModel):
     is_read: bool = True
+
+
+class UnreadCountOut(BaseModel):
+    unread: int
+
+
+class NotificationBulkRead(BaseModel):
+    """Either explicit ``ids``, or ``before`` (a page cursor) for everything older; neither marks all as read."""
+
+    ids: list[int] | None = Field(default=None, max_length=500)
+    before: str | None = None
+
+
+class NotificationBulkReadOut(BaseModel):
+    updated: int
+    unread: int
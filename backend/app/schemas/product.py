@@ -52,6 +52,8 @@ class ProductOut(BaseSchema):
     status: ProductStatus
     rejection_reason: str | None
     created_at: datetime
+    rating_avg: float | None = None
+    rating_count: int = 0
     images: list[ProductImageOut]
 
 
@@ -1,3 +1,4 @@
+from datetime import date
 from decimal import Decimal
 
 from pydantic import BaseModel, Field
@@ -22,6 +23,8 @@ class SellerPublicProductOut(BaseSchema):
     description: str
     price: Decimal
     stock: int | None
+    rating_avg: float | None = None
+    rating_count: int = 0
     image_url: str | None
 
 
@@ -30,3 +33,46 @@ class SellerPublicOut(BaseSchema):
     display_name: str
     bio: str | None
     products: list[SellerPublicProductOut]
+
+
+class SellerDailyPoint(BaseModel):
+    day: date
+    views: int
+    cart_adds: int
+    orders_requested: int
+    orders_accepted: int
+    orders_completed: int
+    orders_rejected: int
+    orders_canceled: int
+    revenue: Decimal
+
+
+class SellerAnalyticsTotals(BaseModel):
+    views: int
+    cart_adds: int
+    orders_requested: int
+    orders_accepted: int
+    orders_completed: int
+    orders_rejected: int
+    orders_canceled: int
+    revenue: Decimal
+    view_to_cart: float | None
+    cart_to_order: float | None
+
+
+class SellerTopProduct(BaseModel):
+    product_id: int
+    title: str
+    revenue: Decimal
+    units_sold: int
+    orders: int
+    cart_adds: int
+    views: int
+
+
+class SellerAnalyticsOut(BaseModel):
+    date_from: date
+    date_to: date
+    totals: SellerAnalyticsTotals
+    daily: list[SellerDailyPoint]
+    top_products: list[SellerTopProduct]
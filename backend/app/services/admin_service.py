@@ -1,15 +1,15 @@
 from __future__ import annotations
 
-from datetime import date
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
 
-from sqlalchemy import func, select
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models.admin_audit_log import AdminAuditLog
-from app.models.order import Order
-from app.models.product import Product
-from app.models.review import Review
-from app.models.user import User
+from app.models.daily_metric import DailyMetric
+from app.models.marketplace_totals import MarketplaceTotals
+from app.services.rollup_service import TOTALS_ID
 
 
 def log_admin_action(
@@ -34,31 +34,33 @@ def log_admin_action(
 
 
 def get_stats(db: Session) -> dict:
-    users = db.scalar(select(func.count(User.id))) or 0
+    """Current totals from the one ``marketplace_totals`` row, kept on write by ``rollup_service``."""
+    totals = db.get(MarketplaceTotals, TOTALS_ID)
+    fields = ("users", "sellers", "products", "orders", "reviews")
+    # Sellers are users who have at least one product.
+    return {field: getattr(totals, field) if totals else 0 for field in fields}
 
-    # MVP simplification: sellers are users who have at least one product.
-    sellers = db.scalar(select(func.count(func.distinct(Product.seller_id)))) or 0
 
-    products = db.scalar(select(func.count(Product.id))) or 0
-    orders = db.scalar(select(func.count(Order.id))) or 0
-    reviews = db.scalar(select(func.count(Review.id))) or 0
-    return {
-        "users": users,
-        "sellers": sellers,
-        "products": products,
-        "orders": orders,
-        "reviews": reviews,
-    }
-
-
-def orders_trend_by_day(db: Session, days: int = 14) -> list[dict]:
-    rows = db.execute(
-        select(func.date(Order.created_at), func.count(Order.id))
-        .group_by(func.date(Order.created_at))
-        .order_by(func.date(Order.created_at).desc())
-        .limit(days)
-    ).all()
-    return [{"day": str(day), "count": count} for day, count in rows if isinstance(day, date)]
+def orders_trend_by_day(db: Session, days: int = 14, today: date | None = None) -> list[dict]:
+    """Every day of the last ``days`` (newest first, quiet days as zeros), read by primary key from ``daily_metrics``."""
+    today = today or datetime.now(UTC).date()
+    start = today - timedelta(days=days - 1)
+    rows = {row.day: row for row in db.scalars(select(DailyMetric).where(DailyMetric.day >= start, DailyMetric.day <= today))}
+    trend = []
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        row = rows.get(day)
+        trend.append(
+            {
+                "day": day.isoformat(),
+                "count": row.orders if row else 0,
+                "gmv": row.gmv if row else Decimal("0"),
+                "new_users": row.new_users if row else 0,
+                "new_products": row.new_products if row else 0,
+                "reviews": row.reviews if row else 0,
+            }
+        )
+    return trend
 
 
 def list_audit_logs(db: Session, limit: int = 100) -> list[AdminAuditLog]:
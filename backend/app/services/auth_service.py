@@ -7,13 +7,13 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session, selectinload
 
 from app.core.config import settings
+from app.core.hashing import password_hasher
 from app.core.security import (
     create_access_token,
-    hash_password,
     hash_refresh_token,
     new_refresh_token,
+    password_needs_rehash,
     refresh_token_expiry,
-    verify_password,
 )
 from app.models.refresh_token import RefreshToken
 from app.models.role import Role, RoleName
@@ -38,7 +38,7 @@ def register_user(db: Session, email: str, password: str) -> User:
     if not buyer_role:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Role setup failed")
 
-    user = User(email=email, password_hash=hash_password(password), roles=[buyer_role])
+    user = User(email=email, password_hash=password_hasher.hash(password), roles=[buyer_role])
     db.add(user)
     db.commit()
     db.refresh(user)
@@ -48,10 +48,15 @@ def register_user(db: Session, email: str, password: str) -> User:
 def authenticate_user(db: Session, email: str, password: str) -> User:
     stmt = select(User).options(selectinload(User.roles)).where(User.email == email)
     user = db.scalar(stmt)
-    if not user or not verify_password(password, user.password_hash):
+    if not user or not password_hasher.verify(password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     if user.is_banned:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is banned")
+    if password_needs_rehash(user.password_hash):
+        # The plaintext is only available here, so hashes follow bcrypt_rounds as users log in.
+        user.password_hash = password_hasher.hash(password)
+        db.add(user)
+        db.commit()
     return user
 
 
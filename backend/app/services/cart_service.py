@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+from decimal import Decimal
+from typing import NamedTuple
+
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import Row, func, select
 from sqlalchemy.orm import Session, selectinload
 
 from app.models.cart import Cart, CartItem
 from app.models.product import Product, ProductStatus
+from app.models.product_image import ProductImage
+from app.services.seller_analytics_service import record_product_activity
+
+
+class CartView(NamedTuple):
+    """Cart as shown to the buyer: one row per item with product data and the cart total computed in SQL."""
+
+    id: int
+    user_id: int
+    lines: list[Row]
+    total_amount: Decimal
 
 
 def get_or_create_cart(db: Session, user_id: int) -> Cart:
@@ -18,38 +32,89 @@ def get_or_create_cart(db: Session, user_id: int) -> Cart:
     return cart
 
 
-def add_to_cart(db: Session, user_id: int, product_id: int, qty: int) -> Cart:
-    product = db.scalar(select(Product).where(Product.id == product_id, Product.status == ProductStatus.ACTIVE))
-    if not product:
+def _get_or_create_cart_id(db: Session, user_id: int) -> int:
+    cart_id = db.scalar(select(Cart.id).where(Cart.user_id == user_id))
+    if cart_id is None:
+        cart = Cart(user_id=user_id)
+        db.add(cart)
+        db.flush()
+        cart_id = cart.id
+    return cart_id
+
+
+def load_cart_view(db: Session, user_id: int) -> CartView:
+    """Cart, items, product title/price/seller and first image in a single query."""
+    first_image = (
+        select(ProductImage.image_url)
+        .where(ProductImage.product_id == Product.id)
+        .order_by(ProductImage.sort_order, ProductImage.id)
+        .limit(1)
+        .correlate(Product)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            Cart.id.label("cart_id"),
+            CartItem.id,
+            CartItem.product_id,
+            CartItem.qty,
+            Product.title,
+            Product.price,
+            Product.seller_id,
+            first_image.label("image_url"),
+            func.sum(Product.price * CartItem.qty).over().label("cart_total"),
+        )
+        .select_from(Cart)
+        .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+        .outerjoin(Product, Product.id == CartItem.product_id)
+        .where(Cart.user_id == user_id)
+        .order_by(CartItem.id)
+    )
+    rows = db.execute(stmt).all()
+    if not rows:
+        cart_id = _get_or_create_cart_id(db, user_id)
+        db.commit()
+        return CartView(id=cart_id, user_id=user_id, lines=[], total_amount=Decimal("0.00"))
+
+    lines = [row for row in rows if row.id is not None and row.title is not None]
+    total = rows[0].cart_total if lines else None
+    return CartView(id=rows[0].cart_id, user_id=user_id, lines=lines, total_amount=Decimal(total or 0).quantize(Decimal("0.01")))
+
+
+def add_to_cart(db: Session, user_id: int, product_id: int, qty: int) -> CartView:
+    seller_id = db.scalar(select(Product.seller_id).where(Product.id == product_id, Product.status == ProductStatus.ACTIVE))
+    if seller_id is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
-    cart = get_or_create_cart(db, user_id)
-    item = db.scalar(select(CartItem).where(CartItem.cart_id == cart.id, CartItem.product_id == product_id))
+    cart_id = _get_or_create_cart_id(db, user_id)
+    item = db.scalar(select(CartItem).where(CartItem.cart_id == cart_id, CartItem.product_id == product_id))
     if item:
         item.qty = qty
         db.add(item)
     else:
-        db.add(CartItem(cart_id=cart.id, product_id=product_id, qty=qty))
+        db.add(CartItem(cart_id=cart_id, product_id=product_id, qty=qty))
     db.commit()
-    return get_or_create_cart(db, user_id)
+    record_product_activity(seller_id, product_id, "cart_adds")
+    return load_cart_view(db, user_id)
 
 
-def update_cart_item(db: Session, user_id: int, item_id: int, qty: int) -> Cart:
-    cart = get_or_create_cart(db, user_id)
-    item = db.scalar(select(CartItem).where(CartItem.id == item_id, CartItem.cart_id == cart.id))
+def _get_own_item(db: Session, user_id: int, item_id: int) -> CartItem:
+    item = db.scalar(select(CartItem).join(Cart, Cart.id == CartItem.cart_id).where(CartItem.id == item_id, Cart.user_id == user_id))
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart item not found")
+    return item
+
+
+def update_cart_item(db: Session, user_id: int, item_id: int, qty: int) -> CartView:
+    item = _get_own_item(db, user_id, item_id)
     item.qty = qty
     db.add(item)
     db.commit()
-    return get_or_create_cart(db, user_id)
+    return load_cart_view(db, user_id)
 
 
-def remove_cart_item(db: Session, user_id: int, item_id: int) -> Cart:
-    cart = get_or_create_cart(db, user_id)
-    item = db.scalar(select(CartItem).where(CartItem.id == item_id, CartItem.cart_id == cart.id))
-    if not item:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart item not found")
+def remove_cart_item(db: Session, user_id: int, item_id: int) -> CartView:
+    item = _get_own_item(db, user_id, item_id)
     db.delete(item)
     db.commit()
-    return get_or_create_cart(db, user_id)
+    return load_cart_view(db, user_id)
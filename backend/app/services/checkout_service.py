@@ -1,99 +1,199 @@
 from __future__ import annotations
 
 from collections import defaultdict
+from datetime import datetime
 from decimal import Decimal
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, delete, insert, or_, select, update
+from sqlalchemy.orm import Session, selectinload
 
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.response_cache import queue_catalog_bump
 from app.models.cart import Cart, CartItem
 from app.models.notification import NotificationType
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product import Product, ProductStatus
-from app.services.notification_service import create_notification
+from app.services.notification_service import queue_notifications
+from app.services.popularity_service import ORDER_UNIT_WEIGHT, queue_engagement
+from app.services.rollup_service import queue_created_orders
+from app.services.seller_analytics_service import queue_order_transitions
 
 
 def checkout_cart(db: Session, buyer_id: int, payload: dict) -> list[Order]:
-    cart = db.scalar(select(Cart).where(Cart.user_id == buyer_id))
-    if not cart:
+    """Turn the buyer's cart into one order per seller.
+
+    Every step is a set operation, so the statement count does not grow with the number of sellers or items: one
+    read of the cart with its products, one stock reservation, one batched insert each for orders (ids come back via
+    RETURNING, or from one SELECT on MySQL) and items, one outbox insert each for the sellers' notifications, their
+    analytics, the marketplace rollups and the products' popularity, one cart delete and a two-query reload.
+    """
+    lines = db.execute(
+        select(CartItem.id, CartItem.qty, Product)
+        .join(Cart, Cart.id == CartItem.cart_id)
+        .outerjoin(Product, and_(Product.id == CartItem.product_id, Product.status == ProductStatus.ACTIVE))
+        .where(Cart.user_id == buyer_id)
+        .order_by(CartItem.id)
+    ).all()
+    if not lines:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cart is empty")
 
-    cart_items = db.scalars(select(CartItem).where(CartItem.cart_id == cart.id)).all()
-    if not cart_items:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cart is empty")
-
-    product_ids = [item.product_id for item in cart_items]
-    products = db.scalars(select(Product).where(Product.id.in_(product_ids), Product.status == ProductStatus.ACTIVE)).all()
-    product_map = {product.id: product for product in products}
-
-    grouped: dict[int, list[CartItem]] = defaultdict(list)
-    for item in cart_items:
-        product = product_map.get(item.product_id)
-        if not product:
-            continue
-        grouped[product.seller_id].append(item)
-
+    grouped: dict[int, list[tuple[Product, int]]] = defaultdict(list)
+    for line in lines:
+        if line.Product is not None:
+            grouped[line.Product.seller_id].append((line.Product, line.qty))
     if not grouped:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No active products in cart")
 
-    created_orders: list[Order] = []
-    for seller_id, items in grouped.items():
-        order = Order(
-            buyer_id=buyer_id,
-            seller_id=seller_id,
-            status=OrderStatus.REQUESTED,
-            full_name=payload["full_name"],
-            phone=payload["phone"],
-            address=payload["address"],
-            comment=payload.get("comment"),
-            total_amount=Decimal("0.00"),
-        )
-        db.add(order)
-        db.flush()
-
-        total = Decimal("0.00")
-        for item in items:
-            product = product_map[item.product_id]
-            subtotal = Decimal(product.price) * item.qty
-            total += subtotal
-            db.add(
-                OrderItem(
-                    order_id=order.id,
-                    product_id=product.id,
-                    product_title_snapshot=product.title,
-                    product_price_snapshot=product.price,
-                    qty=item.qty,
-                    subtotal=subtotal,
-                )
-            )
-
-        order.total_amount = total
-        db.add(order)
-        create_notification(
-            db,
-            user_id=seller_id,
-            notification_type=NotificationType.NEW_ORDER,
-            payload={"order_id": order.id, "buyer_id": buyer_id},
-        )
-        created_orders.append(order)
-
-    for item in cart_items:
-        db.delete(item)
+    quantities: dict[int, int] = defaultdict(int)
+    for items in grouped.values():
+        for product, qty in items:
+            quantities[product.id] += qty
+    reserve_stock(db, quantities)
+
+    order_rows = [
+        {
+            "buyer_id": buyer_id,
+            "seller_id": seller_id,
+            "status": OrderStatus.REQUESTED,
+            "full_name": payload["full_name"],
+            "phone": payload["phone"],
+            "address": payload["address"],
+            "comment": payload.get("comment"),
+            "total_amount": sum((Decimal(product.price) * qty for product, qty in items), Decimal("0.00")),
+        }
+        for seller_id, items in grouped.items()
+    ]
+    order_ids = _insert_orders(db, order_rows)
+    db.execute(
+        insert(OrderItem),
+        [
+            {
+                "order_id": order_ids[seller_id],
+                "product_id": product.id,
+                "product_title_snapshot": product.title,
+                "product_price_snapshot": product.price,
+                "qty": qty,
+                "subtotal": Decimal(product.price) * qty,
+            }
+            for seller_id, items in grouped.items()
+            for product, qty in items
+        ],
+    )
+    queue_notifications(
+        db,
+        NotificationType.NEW_ORDER,
+        [(seller_id, {"order_id": order_ids[seller_id], "buyer_id": buyer_id}) for seller_id in grouped],
+    )
+    queue_order_transitions(db, [(order_ids[seller_id], OrderStatus.REQUESTED) for seller_id in grouped])
+    queue_created_orders(db, order_rows)
+    queue_engagement(db, {product_id: ORDER_UNIT_WEIGHT * qty for product_id, qty in quantities.items()})
+    db.execute(delete(CartItem).where(CartItem.id.in_([line.id for line in lines])))
 
     db.commit()
-
-    for order in created_orders:
-        db.refresh(order)
-    return created_orders
-
-
-def list_user_orders(db: Session, user_id: int, as_seller: bool = False) -> list[Order]:
-    if as_seller:
-        stmt = select(Order).where(Order.seller_id == user_id)
-    else:
-        stmt = select(Order).where(Order.buyer_id == user_id)
-    return db.scalars(stmt.order_by(Order.created_at.desc())).all()
+    return load_orders_with_items(db, [order_ids[seller_id] for seller_id in grouped])
+
+
+def _insert_orders(db: Session, rows: list[dict]) -> dict[int, int]:
+    """Insert one order per seller in a single multi-row statement and return {seller_id: order_id}.
+
+    A checkout never has two orders for the same seller, so the returned ids are matched by seller_id and RETURNING
+    row order does not matter. MySQL has no RETURNING and a multi-row INSERT only reports LAST_INSERT_ID(), the id of
+    its first row. The other ids are not derived from it: with innodb_autoinc_lock_mode=2 (the default since 8.0) a
+    concurrent insert can take ids in between. They are read back instead, in the same transaction: every id of this
+    statement is at least the first one, and the REPEATABLE READ snapshot taken by the cart read cannot contain another
+    transaction's orders allocated after it.
+    """
+    dialect = db.get_bind().dialect
+    if dialect.insert_executemany_returning:
+        return {seller_id: order_id for order_id, seller_id in db.execute(insert(Order).returning(Order.id, Order.seller_id), rows)}
+    if dialect.name == "mysql":
+        first_id = db.execute(insert(Order).values(rows)).lastrowid
+        inserted = db.execute(
+            select(Order.seller_id, Order.id).where(
+                Order.buyer_id == rows[0]["buyer_id"],
+                Order.seller_id.in_([row["seller_id"] for row in rows]),
+                Order.id >= first_id,
+            )
+        )
+        return dict(inserted.tuples().all())
+    return {row["seller_id"]: db.execute(insert(Order).values(**row)).inserted_primary_key[0] for row in rows}
+
+
+def reserve_stock(db: Session, quantities: dict[int, int]) -> None:
+    """Take ``quantities`` out of stock in one conditional UPDATE, or roll back and raise 409.
+
+    The decrement and the availability check are the same statement, so concurrent checkouts cannot both take the last
+    unit, and the rows are matched through the primary key in ascending id order, so two carts sharing products lock
+    them in the same order and cannot deadlock. NULL stock means the product is made to order and is never exhausted.
+    """
+    wanted = case(quantities, value=Product.id)
+    reserved = db.execute(
+        update(Product)
+        .where(
+            Product.id.in_(sorted(quantities)),
+            Product.status == ProductStatus.ACTIVE,
+            or_(Product.stock.is_(None), Product.stock >= wanted),
+        )
+        .values(stock=Product.stock - wanted)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if reserved != len(quantities):
+        db.rollback()
+        short = db.execute(
+            select(Product.title)
+            .where(Product.id.in_(sorted(quantities)), or_(Product.status != ProductStatus.ACTIVE, Product.stock < wanted))
+            .order_by(Product.id)
+            .limit(1)
+        ).scalar()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Not enough stock for {short or 'a product in the cart'}")
+    # Core UPDATEs skip the mapper events, so the cached catalog pages showing this stock are retired here.
+    queue_catalog_bump(db)
+
+
+def restore_stock(db: Session, order: Order) -> None:
+    quantities: dict[int, int] = defaultdict(int)
+    for item in order.items:
+        if item.product_id is not None:
+            quantities[item.product_id] += item.qty
+    if not quantities:
+        return
+    db.execute(
+        update(Product)
+        .where(Product.id.in_(sorted(quantities)), Product.stock.is_not(None))
+        .values(stock=Product.stock + case(quantities, value=Product.id))
+        .execution_options(synchronize_session=False)
+    )
+    queue_catalog_bump(db)
+
+
+def load_orders_with_items(db: Session, order_ids: list[int]) -> list[Order]:
+    """Orders with their items in two queries, in the order of ``order_ids``."""
+    rows = db.scalars(select(Order).options(selectinload(Order.items)).where(Order.id.in_(order_ids))).all()
+    by_id = {order.id: order for order in rows}
+    return [by_id[order_id] for order_id in order_ids if order_id in by_id]
+
+
+def list_user_orders(
+    db: Session,
+    user_id: int,
+    as_seller: bool = False,
+    order_status: OrderStatus | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
+) -> tuple[list[Order], str | None]:
+    owner_column = Order.seller_id if as_seller else Order.buyer_id
+    stmt = select(Order).options(selectinload(Order.items)).where(owner_column == user_id)
+    if order_status is not None:
+        stmt = stmt.where(Order.status == order_status)
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, datetime, int)
+        stmt = stmt.where(or_(Order.created_at < created_at, and_(Order.created_at == created_at, Order.id < last_id)))
+
+    rows = db.scalars(stmt.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1)).all()
+    orders = rows[:limit]
+    next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id) if len(rows) > limit else None
+    return orders, next_cursor
 
 
 def update_order_status(db: Session, order_id: int, actor_id: int, next_status: OrderStatus, is_seller: bool) -> Order:
@@ -118,8 +218,18 @@ def update_order_status(db: Session, order_id: int, actor_id: int, next_status:
     if next_status not in allowed.get(order.status, set()):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status transition")
 
-    order.status = next_status
-    db.add(order)
+    # Compare-and-set on the current status so two concurrent transitions cannot both succeed (and restock twice).
+    changed = db.execute(
+        update(Order)
+        .where(Order.id == order.id, Order.status == order.status)
+        .values(status=next_status)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not changed:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order status changed concurrently")
+    if next_status in {OrderStatus.REJECTED, OrderStatus.CANCELED}:
+        restore_stock(db, order)
+    queue_order_transitions(db, [(order.id, next_status)])
     db.commit()
-    db.refresh(order)
-    return order
+    return load_orders_with_items(db, [order.id])[0]
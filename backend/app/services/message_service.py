@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 from datetime import UTC, datetime
+from typing import NamedTuple
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import and_, func, or_, select, update
 from sqlalchemy.orm import Session
 
+from app.core.broker import BrokerEvent, publish_after_commit
+from app.core.pagination import decode_cursor, encode_cursor
 from app.models.conversation import Conversation
 from app.models.message import Message
 from app.models.notification import NotificationType
-from app.services.notification_service import create_notification
+from app.models.product import Product
+from app.models.seller_profile import SellerProfile
+from app.models.user import User
+from app.services.notification_service import queue_notification
 
 
 def get_or_create_conversation(db: Session, buyer_id: int, seller_id: int, product_id: int | None) -> Conversation:
@@ -35,20 +41,130 @@ def ensure_participant(conversation: Conversation, user_id: int) -> None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a participant")
 
 
+class InboxEntry(NamedTuple):
+    conversation: Conversation
+    counterpart_id: int
+    counterpart_name: str
+    product_title: str | None
+    last_message: Message | None
+    unread_count: int
+
+
+def _participant_sides():
+    """(own column, counterpart column) for the buyer side and the seller side of a conversation.
+
+    Each side is read separately so it can range-scan its own (buyer_id|seller_id, updated_at) index; a single OR
+    across both columns defeats both indexes and forces a sort.
+    """
+    return ((Conversation.buyer_id, Conversation.seller_id), (Conversation.seller_id, Conversation.buyer_id))
+
+
+def _newest_first(rows: list, key=lambda row: row) -> list:
+    unique = {key(row).id: row for row in rows}
+    return sorted(unique.values(), key=lambda row: (key(row).updated_at, key(row).id), reverse=True)
+
+
+def _inbox_page(db: Session, user_id: int, cursor: str | None, limit: int) -> list:
+    keyset = None
+    if cursor:
+        updated_at, last_id = decode_cursor(cursor, datetime, int)
+        keyset = or_(Conversation.updated_at < updated_at, and_(Conversation.updated_at == updated_at, Conversation.id < last_id))
+    product_title = select(Product.title).where(Product.id == Conversation.product_id).correlate(Conversation).scalar_subquery()
+
+    rows = []
+    for own_column, counterpart_column in _participant_sides():
+        stmt = (
+            select(
+                Conversation,
+                counterpart_column.label("counterpart_id"),
+                User.email.label("counterpart_email"),
+                SellerProfile.display_name.label("counterpart_display_name"),
+                product_title.label("product_title"),
+            )
+            .join(User, User.id == counterpart_column)
+            .outerjoin(SellerProfile, SellerProfile.user_id == User.id)
+            .where(own_column == user_id)
+        )
+        if keyset is not None:
+            stmt = stmt.where(keyset)
+        rows += db.execute(stmt.order_by(Conversation.updated_at.desc(), Conversation.id.desc()).limit(limit + 1)).all()
+    return _newest_first(rows, key=lambda row: row.Conversation)[: limit + 1]
+
+
+def list_inbox(db: Session, user_id: int, cursor: str | None = None, limit: int = 30) -> tuple[list[InboxEntry], str | None]:
+    """The caller's conversations, most recently active first, with what an inbox row shows.
+
+    Four queries per page whatever its size: one per side of the conversation (with counterpart and product title),
+    then the last message and the unread count of every conversation on the page.
+    """
+    rows = _inbox_page(db, user_id, cursor, limit)
+    page = rows[:limit]
+    if not page:
+        return [], None
+    last = page[-1].Conversation
+    next_cursor = encode_cursor(last.updated_at, last.id) if len(rows) > limit else None
+
+    ids = [row.Conversation.id for row in page]
+    last_ids = select(func.max(Message.id)).where(Message.conversation_id.in_(ids)).group_by(Message.conversation_id)
+    last_messages = {row.conversation_id: row for row in db.scalars(select(Message).where(Message.id.in_(last_ids))).all()}
+    unread = dict(
+        db.execute(
+            select(Message.conversation_id, func.count())
+            .where(Message.conversation_id.in_(ids), Message.is_read.is_(False), Message.sender_id != user_id)
+            .group_by(Message.conversation_id)
+        ).all()
+    )
+
+    return [
+        InboxEntry(
+            conversation=row.Conversation,
+            counterpart_id=row.counterpart_id,
+            counterpart_name=row.counterpart_display_name or row.counterpart_email.split("@")[0],
+            product_title=row.product_title,
+            last_message=last_messages.get(row.Conversation.id),
+            unread_count=unread.get(row.Conversation.id, 0),
+        )
+        for row in page
+    ], next_cursor
+
+
 def list_user_conversations(db: Session, user_id: int) -> list[Conversation]:
-    stmt = select(Conversation).where((Conversation.buyer_id == user_id) | (Conversation.seller_id == user_id))
-    return db.scalars(stmt.order_by(Conversation.updated_at.desc())).all()
+    rows = []
+    for own_column, _counterpart_column in _participant_sides():
+        rows += db.scalars(select(Conversation).where(own_column == user_id).order_by(Conversation.updated_at.desc())).all()
+    return _newest_first(rows)
+
+
+def message_channel(user_id: int) -> str:
+    return f"messages:{user_id}"
+
+
+def message_event(message: Message) -> BrokerEvent:
+    data = {
+        "id": message.id,
+        "conversation_id": message.conversation_id,
+        "sender_id": message.sender_id,
+        "body": message.body,
+        "is_read": message.is_read,
+        "created_at": message.created_at.isoformat(),
+    }
+    return BrokerEvent(event="message", data=data, id=message.id)
 
 
 def create_message(db: Session, conversation: Conversation, sender_id: int, body: str) -> Message:
     ensure_participant(conversation, sender_id)
-    message = Message(conversation_id=conversation.id, sender_id=sender_id, body=body)
+    message = Message(conversation_id=conversation.id, sender_id=sender_id, body=body, is_read=False)
     db.add(message)
     conversation.updated_at = datetime.now(UTC)
     db.add(conversation)
+    db.flush()
 
     receiver_id = conversation.seller_id if sender_id == conversation.buyer_id else conversation.buyer_id
-    create_notification(
+    # Both participants get the event: the sender's other tabs stay in sync too.
+    pushed = message_event(message)
+    publish_after_commit(db, message_channel(receiver_id), pushed)
+    publish_after_commit(db, message_channel(sender_id), pushed)
+    queue_notification(
         db,
         user_id=receiver_id,
         notification_type=NotificationType.NEW_MESSAGE,
@@ -59,21 +175,66 @@ def create_message(db: Session, conversation: Conversation, sender_id: int, body
     return message
 
 
-def list_messages(db: Session, conversation: Conversation, user_id: int, after: datetime | None) -> list[Message]:
+def _message_keyset(db: Session, conversation: Conversation, message_id: int, newer: bool):
+    """Position relative to message ``message_id`` in (created_at, id) order, so it can ride the conversation index.
+
+    The anchor must belong to ``conversation``; an unknown one is a client error rather than an empty page.
+    """
+    created_at = db.scalar(select(Message.created_at).where(Message.id == message_id, Message.conversation_id == conversation.id))
+    if created_at is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown message cursor")
+    if newer:
+        return or_(Message.created_at > created_at, and_(Message.created_at == created_at, Message.id > message_id))
+    return or_(Message.created_at < created_at, and_(Message.created_at == created_at, Message.id < message_id))
+
+
+def list_messages(
+    db: Session,
+    conversation: Conversation,
+    user_id: int,
+    after: datetime | None = None,
+    *,
+    before_id: int | None = None,
+    after_id: int | None = None,
+    limit: int = 50,
+) -> list[Message]:
+    """One page of a conversation, always returned oldest first.
+
+    Without a cursor this is the latest ``limit`` messages; ``before_id`` pages back through older history and
+    ``after_id`` (or the ``after`` timestamp) reads forward from a message the client already has.
+    """
     ensure_participant(conversation, user_id)
+    if before_id is not None and (after_id is not None or after is not None):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Pass either before_id or after_id, not both")
     stmt = select(Message).where(Message.conversation_id == conversation.id)
-    if after:
-        stmt = stmt.where(Message.created_at > after)
-    return db.scalars(stmt.order_by(Message.created_at.asc())).all()
+
+    if after_id is not None or after is not None:
+        if after_id is not None:
+            stmt = stmt.where(_message_keyset(db, conversation, after_id, newer=True))
+        if after is not None:
+            stmt = stmt.where(Message.created_at > after)
+        return db.scalars(stmt.order_by(Message.created_at.asc(), Message.id.asc()).limit(limit)).all()
+
+    if before_id is not None:
+        stmt = stmt.where(_message_keyset(db, conversation, before_id, newer=False))
+    rows = db.scalars(stmt.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)).all()
+    return rows[::-1]
+
+
+def list_messages_since(db: Session, user_id: int, last_id: int, limit: int = 200) -> list[Message]:
+    """Messages in any of the user's conversations with an id above ``last_id``; used to resume a dropped stream."""
+    conversation_ids = select(Conversation.id).where(or_(Conversation.buyer_id == user_id, Conversation.seller_id == user_id))
+    stmt = select(Message).where(Message.conversation_id.in_(conversation_ids), Message.id > last_id)
+    return db.scalars(stmt.order_by(Message.id.asc()).limit(limit)).all()
 
 
 def mark_messages_read(db: Session, conversation: Conversation, user_id: int) -> int:
     ensure_participant(conversation, user_id)
-    rows = db.scalars(
-        select(Message).where(Message.conversation_id == conversation.id, Message.sender_id != user_id, Message.is_read.is_(False))
-    ).all()
-    for row in rows:
-        row.is_read = True
-        db.add(row)
+    changed = db.execute(
+        update(Message)
+        .where(Message.conversation_id == conversation.id, Message.sender_id != user_id, Message.is_read.is_(False))
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
     db.commit()
-    return len(rows)
+    return changed
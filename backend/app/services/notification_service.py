@@ -1,28 +1,188 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from collections import Counter
+from datetime import UTC, datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, case, event, insert, or_, select, update
 from sqlalchemy.orm import Session
 
+from app.core.broker import BrokerEvent, publish_after_commit
+from app.core.pagination import decode_cursor, encode_cursor
 from app.models.notification import Notification, NotificationType
+from app.models.user import User
+from app.services.outbox_service import enqueue, outbox_handler
+
+NOTIFICATION_TOPIC = "notification"
+
+
+def notification_channel(user_id: int) -> str:
+    return f"notifications:{user_id}"
+
+
+def notification_event(notification: Notification) -> BrokerEvent:
+    data = {
+        "id": notification.id,
+        "user_id": notification.user_id,
+        "type": notification.type.value,
+        "payload_json": notification.payload_json,
+        "is_read": notification.is_read,
+        "created_at": notification.created_at.isoformat(),
+    }
+    return BrokerEvent(event="notification", data=data, id=notification.id)
+
+
+def _adjust_unread(user_id: int, delta: int):
+    # updated_at is pinned so counter maintenance does not look like a profile change.
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(unread_notifications=User.unread_notifications + delta, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _adjust_unread_many(deltas: dict[int, int]):
+    return (
+        update(User)
+        .where(User.id.in_(sorted(deltas)))
+        .values(unread_notifications=User.unread_notifications + case(deltas, value=User.id), updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _count_and_publish(session: Session, created: list[Notification]) -> None:
+    # Counters move in the same transaction that writes the rows (one UPDATE however many were inserted) and the
+    # pushes are only sent if that transaction commits.
+    created = sorted(created, key=lambda row: row.id)
+    deltas = Counter(row.user_id for row in created if not row.is_read)
+    if deltas:
+        session.connection().execute(_adjust_unread_many(dict(deltas)))
+    for row in created:
+        publish_after_commit(session, notification_channel(row.user_id), notification_event(row))
+
+
+@event.listens_for(Session, "after_flush")
+def _on_notifications_flushed(session: Session, _flush_context) -> None:
+    # Covers every code path that adds Notification objects to a session and flushes them.
+    created = [obj for obj in session.new if isinstance(obj, Notification)]
+    if created:
+        _count_and_publish(session, created)
 
 
 def create_notification(db: Session, user_id: int, notification_type: NotificationType, payload: dict) -> Notification:
-    notification = Notification(user_id=user_id, type=notification_type, payload_json=payload)
+    notification = Notification(user_id=user_id, type=notification_type, payload_json=payload, is_read=False)
     db.add(notification)
     return notification
 
 
-def list_notifications(db: Session, user_id: int) -> list[Notification]:
-    stmt = select(Notification).where(Notification.user_id == user_id).order_by(Notification.created_at.desc())
-    return db.scalars(stmt).all()
+def create_notifications(db: Session, notification_type: NotificationType, recipients: list[tuple[int, dict]]) -> list[Notification]:
+    """Insert one notification per (user_id, payload) in a single multi-row INSERT ... RETURNING where supported."""
+    rows = [
+        {"user_id": user_id, "type": notification_type, "payload_json": payload, "is_read": False, "created_at": datetime.now(UTC)}
+        for user_id, payload in recipients
+    ]
+    if not rows:
+        return []
+    if not db.get_bind().dialect.insert_executemany_returning:
+        notifications = [Notification(**row) for row in rows]
+        db.add_all(notifications)
+        db.flush()
+        return notifications
+    notifications = list(db.scalars(insert(Notification).returning(Notification), rows).all())
+    _count_and_publish(db, notifications)
+    return notifications
+
+
+def queue_notifications(db: Session, notification_type: NotificationType, recipients: list[tuple[int, dict]]) -> None:
+    """Schedule notifications through the outbox: the caller's transaction pays for one INSERT, the worker does the rest."""
+    enqueue(
+        db,
+        NOTIFICATION_TOPIC,
+        [{"user_id": user_id, "type": notification_type.value, "payload": payload} for user_id, payload in recipients],
+    )
+
+
+def queue_notification(db: Session, user_id: int, notification_type: NotificationType, payload: dict) -> None:
+    queue_notifications(db, notification_type, [(user_id, payload)])
+
+
+@outbox_handler(NOTIFICATION_TOPIC)
+def _deliver_notifications(db: Session, payloads: list[dict]) -> None:
+    by_type: dict[NotificationType, list[tuple[int, dict]]] = {}
+    for item in payloads:
+        by_type.setdefault(NotificationType(item["type"]), []).append((item["user_id"], item["payload"]))
+    for notification_type, recipients in by_type.items():
+        create_notifications(db, notification_type, recipients)
+
+
+def _older_than(cursor: str):
+    created_at, last_id = decode_cursor(cursor, datetime, int)
+    return or_(Notification.created_at < created_at, and_(Notification.created_at == created_at, Notification.id < last_id))
+
+
+def list_notifications(
+    db: Session,
+    user_id: int,
+    notification_type: NotificationType | None = None,
+    is_read: bool | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
+) -> tuple[list[Notification], str | None]:
+    stmt = select(Notification).where(Notification.user_id == user_id)
+    if is_read is not None:
+        stmt = stmt.where(Notification.is_read == is_read)
+    if notification_type is not None:
+        stmt = stmt.where(Notification.type == notification_type)
+    if cursor:
+        stmt = stmt.where(_older_than(cursor))
+
+    rows = db.scalars(stmt.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit + 1)).all()
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
+    return page, next_cursor
+
+
+def get_unread_count(db: Session, user_id: int) -> int:
+    return db.scalar(select(User.unread_notifications).where(User.id == user_id)) or 0
+
+
+def _publish_unread(db: Session, user_id: int) -> None:
+    publish_after_commit(db, notification_channel(user_id), BrokerEvent(event="unread", data={"unread": get_unread_count(db, user_id)}))
 
 
 def mark_notification_read(db: Session, user_id: int, notification_id: int, is_read: bool) -> Notification | None:
-    notification = db.scalar(select(Notification).where(Notification.id == notification_id, Notification.user_id == user_id))
-    if not notification:
-        return None
-    notification.is_read = is_read
-    db.add(notification)
+    changed = db.execute(
+        update(Notification)
+        .where(Notification.id == notification_id, Notification.user_id == user_id, Notification.is_read != is_read)
+        .values(is_read=is_read)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if changed:
+        db.execute(_adjust_unread(user_id, -1 if is_read else 1))
+        _publish_unread(db, user_id)
     db.commit()
-    db.refresh(notification)
-    return notification
+    return db.scalar(select(Notification).where(Notification.id == notification_id, Notification.user_id == user_id))
+
+
+def mark_notifications_read(db: Session, user_id: int, ids: list[int] | None = None, before: str | None = None) -> int:
+    """Mark the given ids, or every unread notification older than the ``before`` cursor, or all of them, in one UPDATE.
+
+    Returns how many notifications changed state.
+    """
+    if ids is not None and before is not None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Pass either ids or before, not both")
+    stmt = update(Notification).where(Notification.user_id == user_id, Notification.is_read.is_(False))
+    if ids is not None:
+        if not ids:
+            return 0
+        stmt = stmt.where(Notification.id.in_(ids))
+    elif before is not None:
+        stmt = stmt.where(_older_than(before))
+
+    changed = db.execute(stmt.values(is_read=True).execution_options(synchronize_session=False)).rowcount
+    if changed:
+        db.execute(_adjust_unread(user_id, -changed))
+        _publish_unread(db, user_id)
+    db.commit()
+    return changed
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.broker import discard_pending_on_error
+from app.core.config import settings
+from app.core.metrics import registry
+from app.models.outbox_event import OutboxEvent, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+OutboxHandler = Callable[[Session, list[dict]], None]
+
+_ENQUEUED_KEY = "outbox_enqueued"
+_handlers: dict[str, OutboxHandler] = {}
+
+# Set after a transaction that enqueued events commits, so an in-process worker can wake up straight away.
+outbox_wakeup = threading.Event()
+
+_processed = registry.counter("outbox_events_total", "Outbox events handled, by topic and outcome.", ["topic", "outcome"])
+_lag = registry.gauge("outbox_lag_seconds", "Age of the oldest deliverable outbox event when the worker last polled.")
+_batch_seconds = registry.histogram("outbox_batch_seconds", "Time to handle one outbox batch.")
+
+
+def outbox_handler(topic: str) -> Callable[[OutboxHandler], OutboxHandler]:
+    """Register the function that carries out events of ``topic``; it receives every payload of a batch at once."""
+
+    def register(handler: OutboxHandler) -> OutboxHandler:
+        _handlers[topic] = handler
+        return handler
+
+    return register
+
+
+def enqueue(db: Session, topic: str, payloads: list[dict]) -> None:
+    """Record side effects in the caller's transaction: one INSERT, delivered only if that transaction commits."""
+    if not payloads:
+        return
+    db.execute(insert(OutboxEvent), [{"topic": topic, "payload_json": payload} for payload in payloads])
+    db.info[_ENQUEUED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_worker(session: Session) -> None:
+    if session.info.pop(_ENQUEUED_KEY, False):
+        outbox_wakeup.set()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueued(session: Session) -> None:
+    session.info.pop(_ENQUEUED_KEY, None)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    seconds = settings.outbox_backoff_base_seconds * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.outbox_backoff_max_seconds))
+
+
+def _record_failure(outbox_event: OutboxEvent, exc: Exception, now: datetime) -> None:
+    outbox_event.attempts += 1
+    outbox_event.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    if outbox_event.attempts >= settings.outbox_max_attempts:
+        outbox_event.status = OutboxStatus.DEAD
+        _processed.labels(topic=outbox_event.topic, outcome="dead").inc()
+        logger.error("Outbox event %s (%s) dead after %s attempts: %s", outbox_event.id, outbox_event.topic, outbox_event.attempts, exc)
+    else:
+        outbox_event.available_at = now + retry_delay(outbox_event.attempts)
+        _processed.labels(topic=outbox_event.topic, outcome="retried").inc()
+        logger.warning("Outbox event %s (%s) failed, attempt %s: %s", outbox_event.id, outbox_event.topic, outbox_event.attempts, exc)
+
+
+def _run_handler(db: Session, handler: OutboxHandler, events: list[OutboxEvent]) -> None:
+    # A SAVEPOINT per attempt, so a failing handler leaves the rest of the batch (and the bookkeeping) intact.
+    with discard_pending_on_error(db), db.begin_nested():
+        handler(db, [outbox_event.payload_json for outbox_event in events])
+
+
+def process_batch(db: Session, batch_size: int | None = None) -> int:
+    """Claim up to ``batch_size`` due events, run their handlers and commit; returns how many events were claimed.
+
+    Events of one topic go to their handler together; if that fails, each event is retried on its own so one bad
+    payload cannot hold back the others. Failures are rescheduled with exponential backoff and dead-lettered after
+    ``outbox_max_attempts``. Rows are claimed with SKIP LOCKED, so several workers can drain the same table.
+    """
+    started = datetime.now(UTC)
+    events = db.scalars(
+        select(OutboxEvent)
+        .where(OutboxEvent.status == OutboxStatus.PENDING, OutboxEvent.available_at <= started)
+        .order_by(OutboxEvent.available_at)
+        .limit(batch_size or settings.outbox_batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not events:
+        db.rollback()
+        _lag.set(0)
+        return 0
+    _lag.set(max((started - _as_utc(events[0].available_at)).total_seconds(), 0))
+
+    by_topic: dict[str, list[OutboxEvent]] = defaultdict(list)
+    for outbox_event in events:
+        by_topic[outbox_event.topic].append(outbox_event)
+
+    batch_started = time.perf_counter()
+    for topic, group in by_topic.items():
+        handler = _handlers.get(topic)
+        if handler is None:
+            for outbox_event in group:
+                _record_failure(outbox_event, LookupError(f"No outbox handler for {topic!r}"), started)
+            continue
+        try:
+            _run_handler(db, handler, group)
+            delivered = group
+        except Exception:
+            delivered = []
+            for outbox_event in group:
+                try:
+                    _run_handler(db, handler, [outbox_event])
+                    delivered.append(outbox_event)
+                except Exception as exc:  # noqa: BLE001 - any handler failure is retried, never fatal
+                    _record_failure(outbox_event, exc, started)
+        for outbox_event in delivered:
+            db.delete(outbox_event)
+        if delivered:
+            _processed.labels(topic=topic, outcome="delivered").inc(len(delivered))
+    db.commit()
+    _batch_seconds.observe(time.perf_counter() - batch_started)
+    return len(events)
+
+
+def drain(db: Session, max_batches: int | None = None) -> int:
+    """Process batches until nothing is due; returns the number of events handled."""
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        claimed = process_batch(db)
+        if not claimed:
+            break
+        total += claimed
+        batches += 1
+    return total
+
+
+def dead_letter_count(db: Session) -> int:
+    return db.scalar(select(func.count()).select_from(OutboxEvent).where(OutboxEvent.status == OutboxStatus.DEAD)) or 0
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes even for timezone-aware columns.
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import UTC, datetime
+
+from sqlalchemy import case, event, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.response_cache import POPULAR_NAMESPACE, queue_catalog_bump
+from app.models.favorite import Favorite
+from app.models.order import OrderItem
+from app.models.outbox_event import OutboxEvent
+from app.models.product import Product
+from app.models.review import Review
+from app.services.outbox_service import enqueue, outbox_handler
+
+POPULARITY_TOPIC = "popularity"
+
+# A new listing starts with a little credit so it can surface before it has any engagement.
+LISTING_WEIGHT = 5.0
+ORDER_UNIT_WEIGHT = 3.0
+REVIEW_WEIGHT = 2.0
+FAVORITE_WEIGHT = 1.0
+
+_UPDATE_CHUNK = 500
+
+
+def time_weight(at: datetime) -> float:
+    """``2 ** ((at - popularity_epoch) / half_life)``: what an event at ``at`` is worth relative to one at the epoch.
+
+    Scores are stored in epoch units, so an event's contribution is fixed when it is recorded and older ones fall
+    behind newer ones without any decay pass; the ranking is the same as for scores decayed to any common instant.
+    """
+    return 2.0 ** _half_lives(at)
+
+
+def _half_lives(at: datetime) -> float:
+    at = at if at.tzinfo else at.replace(tzinfo=UTC)
+    return (at - settings.popularity_epoch).total_seconds() / 3600 / settings.popularity_half_life_hours
+
+
+def current_score(stored: float, now: datetime | None = None) -> float:
+    """A stored score decayed to ``now``, e.g. for display or debugging."""
+    return stored / time_weight(now or datetime.now(UTC))
+
+
+def queue_engagement(db: Session, points: dict[int, float], at: datetime | None = None) -> None:
+    """Record ``{product_id: weight}`` engaged with at ``at`` in the caller's transaction; the worker adds the scores."""
+    factor = time_weight(at or datetime.now(UTC))
+    engaged = sorted((product_id, weight) for product_id, weight in points.items() if product_id and weight)
+    enqueue(db, POPULARITY_TOPIC, [{"product_id": product_id, "points": weight * factor} for product_id, weight in engaged])
+
+
+@event.listens_for(Product, "before_insert")
+def _credit_new_listing(_mapper, _connection, target: Product) -> None:
+    if not target.popularity_score:
+        target.popularity_score = LISTING_WEIGHT * time_weight(target.created_at or datetime.now(UTC))
+
+
+# Order items, reviews and favorites added through the ORM are recorded by the transaction that adds them, so
+# none is missed however late it commits. Checkout inserts its items through Core and records them itself.
+@event.listens_for(Session, "after_flush")
+def _queue_flushed_engagement(session: Session, _flush_context) -> None:
+    points: dict[int, float] = defaultdict(float)
+    for obj in session.new:
+        if isinstance(obj, OrderItem):
+            points[obj.product_id] += ORDER_UNIT_WEIGHT * (obj.qty or 0)
+        elif isinstance(obj, Review):
+            points[obj.product_id] += REVIEW_WEIGHT
+        elif isinstance(obj, Favorite):
+            points[obj.product_id] += FAVORITE_WEIGHT
+    if points:
+        queue_engagement(session, points)
+
+
+@outbox_handler(POPULARITY_TOPIC)
+def _add_scores(db: Session, payloads: list[dict]) -> None:
+    """One UPDATE per chunk of engaged products; products nobody engaged with are never written."""
+    deltas: dict[int, float] = defaultdict(float)
+    for payload in payloads:
+        deltas[payload["product_id"]] += payload["points"]
+    product_ids = sorted(deltas)
+    for start in range(0, len(product_ids), _UPDATE_CHUNK):
+        chunk = {product_id: deltas[product_id] for product_id in product_ids[start : start + _UPDATE_CHUNK]}
+        db.execute(
+            update(Product)
+            .where(Product.id.in_(list(chunk)))
+            .values(
+                popularity_score=Product.popularity_score + case(chunk, value=Product.id),
+                updated_at=Product.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    # Only sort=popular listings depend on the scores; product and seller pages keep their cached entries.
+    queue_catalog_bump(db, POPULAR_NAMESPACE)
+
+
+def rebase_popularity(db: Session, new_epoch: datetime) -> int:
+    """Restate every stored score in ``new_epoch`` units and commit; returns the number of products rescaled.
+
+    Scores are divided by ``time_weight(new_epoch)`` in one UPDATE, and queued engagement the worker has not added yet
+    is divided the same way, so the ranking does not change. The factor is applied as two equal halves so that it stays
+    a normal double even when the epoch moves past the overflow bound. Run with the API and the worker stopped and
+    restart them with ``POPULARITY_EPOCH=new_epoch``; anything recorded in between would be in the old units.
+    """
+    half = 2.0 ** (-_half_lives(new_epoch) / 2)
+    rescaled = db.execute(
+        update(Product)
+        .values(popularity_score=Product.popularity_score * half * half, updated_at=Product.updated_at)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    for outbox_event in db.scalars(select(OutboxEvent).where(OutboxEvent.topic == POPULARITY_TOPIC)):
+        outbox_event.payload_json = {**outbox_event.payload_json, "points": outbox_event.payload_json["points"] * half * half}
+    db.commit()
+    return rescaled
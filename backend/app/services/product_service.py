@@ -1,13 +1,43 @@
 from __future__ import annotations
 
+from datetime import datetime
 from decimal import Decimal
 
 from fastapi import HTTPException, status
-from sqlalchemy import asc, desc, func, or_, select
+from sqlalchemy import and_, asc, desc, event, func, or_, select
 from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.sql.elements import ColumnElement
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
 from app.models.product import Product, ProductStatus
 from app.models.product_image import ProductImage
+from app.services.search_service import apply_search
+
+# Catalog totals keyed by the filter tuple. Any product write in this process clears it; writes made by other
+# workers become visible once the TTL runs out.
+_count_cache = TTLCache(max_entries=settings.catalog_count_cache_size, ttl_seconds=settings.catalog_count_cache_ttl_seconds)
+
+
+@event.listens_for(Product, "after_insert")
+@event.listens_for(Product, "after_update")
+@event.listens_for(Product, "after_delete")
+def _invalidate_catalog_counts(_mapper, _connection, _target: Product) -> None:
+    _count_cache.clear()
+
+
+def _keyset_order(sort: str, relevance: ColumnElement | None) -> tuple[ColumnElement, type, bool] | None:
+    """Sort column, its Python type and direction for keyset pagination; ``None`` when the sort cannot use a cursor."""
+    if sort == "price_asc":
+        return Product.price, Decimal, False
+    if sort == "price_desc":
+        return Product.price, Decimal, True
+    if sort == "popular":
+        return Product.popularity_score, float, True
+    if sort == "relevance" and relevance is not None:
+        return None
+    return Product.created_at, datetime, True
 
 
 def list_public_products(
@@ -19,12 +49,14 @@ def list_public_products(
     sort: str,
     page: int,
     page_size: int,
-) -> tuple[list[Product], int]:
-    stmt = select(Product).options(selectinload(Product.images)).where(Product.status == ProductStatus.ACTIVE)
+    cursor: str | None = None,
+    include_total: bool = True,
+) -> tuple[list[Product], int | None, str | None]:
+    stmt = select(Product).where(Product.status == ProductStatus.ACTIVE)
 
+    relevance = None
     if q:
-        pattern = f"%{q.lower()}%"
-        stmt = stmt.where(or_(func.lower(Product.title).like(pattern), func.lower(Product.description).like(pattern)))
+        stmt, relevance = apply_search(db, stmt, q, by_relevance=sort == "relevance")
     if category_id:
         stmt = stmt.where(Product.category_id == category_id)
     if min_price is not None:
@@ -32,18 +64,40 @@ def list_public_products(
     if max_price is not None:
         stmt = stmt.where(Product.price <= max_price)
 
-    if sort == "price_asc":
-        stmt = stmt.order_by(asc(Product.price))
-    elif sort == "price_desc":
-        stmt = stmt.order_by(desc(Product.price))
-    elif sort == "popular":
-        stmt = stmt.order_by(desc(Product.created_at))
+    total = None
+    if include_total:
+        count_key = (q.strip().lower() if q else None, category_id, min_price, max_price)
+        total = _count_cache.get(count_key)
+        if total is None:
+            total = db.scalar(stmt.with_only_columns(func.count(Product.id))) or 0
+            _count_cache.set(count_key, total)
+
+    keyset = _keyset_order(sort, relevance)
+    if keyset is None:
+        if cursor:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor pagination is not supported for this sort")
+        stmt = stmt.order_by(desc(relevance), desc(Product.created_at), desc(Product.id))
     else:
-        stmt = stmt.order_by(desc(Product.created_at))
-
-    total = db.scalar(select(func.count()).select_from(stmt.subquery())) or 0
-    items = db.scalars(stmt.offset((page - 1) * page_size).limit(page_size)).unique().all()
-    return items, total
+        column, value_type, descending = keyset
+        if cursor:
+            value, last_id = decode_cursor(cursor, value_type, int)
+            if descending:
+                stmt = stmt.where(or_(column < value, and_(column == value, Product.id < last_id)))
+            else:
+                stmt = stmt.where(or_(column > value, and_(column == value, Product.id > last_id)))
+        order = desc if descending else asc
+        stmt = stmt.order_by(order(column), order(Product.id))
+
+    if not cursor:
+        stmt = stmt.offset((page - 1) * page_size)
+    rows = db.scalars(stmt.options(selectinload(Product.images)).limit(page_size + 1)).unique().all()
+    items = rows[:page_size]
+
+    next_cursor = None
+    if keyset is not None and len(rows) > page_size:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, keyset[0].key), last.id)
+    return items, total, next_cursor
 
 
 def create_product(db: Session, seller_id: int, payload: dict) -> Product:
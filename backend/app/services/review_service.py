@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 
 from app.models.notification import NotificationType
 from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
 from app.models.review import Review
-from app.services.notification_service import create_notification
+from app.services.notification_service import queue_notification
 
 
 def create_review(db: Session, user_id: int, product_id: int, rating: int, text: str) -> Review:
@@ -33,7 +34,7 @@ def create_review(db: Session, user_id: int, product_id: int, rating: int, text:
 
     order = db.scalar(select(Order).where(Order.id == order_item.order_id))
     if order:
-        create_notification(
+        queue_notification(
             db,
             user_id=order.seller_id,
             notification_type=NotificationType.NEW_REVIEW,
@@ -48,3 +49,47 @@ def create_review(db: Session, user_id: int, product_id: int, rating: int, text:
 def list_product_reviews(db: Session, product_id: int) -> list[Review]:
     stmt = select(Review).where(Review.product_id == product_id, Review.is_hidden.is_(False)).order_by(Review.created_at.desc())
     return db.scalars(stmt).all()
+
+
+def product_reviews_version(db: Session, product_id: int) -> int:
+    """``Product.reviews_version``: changes with every write to a visible review, so equal versions list the same reviews."""
+    return db.scalar(select(Product.reviews_version).where(Product.id == product_id)) or 0
+
+
+def _lock_review(db: Session, review_id: int) -> Review:
+    # Row lock so concurrent moderation of the same review adjusts the product aggregates once.
+    review = db.scalar(select(Review).where(Review.id == review_id).with_for_update())
+    if not review:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
+    return review
+
+
+def set_review_hidden(db: Session, review_id: int, hidden: bool) -> Review:
+    review = _lock_review(db, review_id)
+    review.is_hidden = hidden
+    db.commit()
+    db.refresh(review)
+    return review
+
+
+def delete_review(db: Session, review_id: int) -> None:
+    db.delete(_lock_review(db, review_id))
+    db.commit()
+
+
+def recompute_ratings(db: Session) -> int:
+    """Rebuild every product's rating aggregates from its visible reviews in one UPDATE; returns rows touched."""
+    visible = Review.is_hidden.is_(False)
+    result = db.execute(
+        update(Product)
+        .values(
+            rating_count=select(func.count(Review.id)).where(Review.product_id == Product.id, visible).scalar_subquery(),
+            rating_sum=select(func.coalesce(func.sum(Review.rating), 0)).where(Review.product_id == Product.id, visible).scalar_subquery(),
+            # The repair is for reviews changed outside the ORM, which the version did not follow either.
+            reviews_version=Product.reviews_version + 1,
+            updated_at=Product.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
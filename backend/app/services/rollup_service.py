@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from datetime import UTC, date, datetime
+from decimal import Decimal
+
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.daily_metric import DailyMetric
+from app.models.marketplace_totals import MarketplaceTotals
+from app.models.order import Order
+from app.models.outbox_event import OutboxEvent
+from app.models.product import Product
+from app.models.review import Review
+from app.models.user import User
+from app.services.outbox_service import enqueue, outbox_handler
+
+METRICS_TOPIC = "daily_metrics"
+
+TOTALS_ID = 1
+
+# Entity counted in the totals -> its column in daily_metrics.
+_DAILY_FIELDS = {
+    "users": "new_users",
+    "sellers": "new_sellers",
+    "products": "new_products",
+    "orders": "orders",
+    "reviews": "reviews",
+}
+_TRACKED = {User: "users", Product: "products", Order: "orders", Review: "reviews"}
+_CASCADED_REVIEWS_KEY = "metrics_cascaded_reviews"
+
+
+def increment_counters(db: Session, model: type, key: dict, deltas: Counter) -> None:
+    """Add ``deltas`` to the rollup row ``key``, creating it on first use (UPDATE, then INSERT, then UPDATE on a race)."""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    stmt = (
+        update(model)
+        .where(*(getattr(model, column) == value for column, value in key.items()))
+        .values({field: getattr(model, field) + value for field, value in deltas.items()})
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(stmt).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(model).values(**key, **deltas))
+    except IntegrityError:
+        db.execute(stmt)
+
+
+def _day(value: datetime | None) -> str:
+    # SQLite hands back naive datetimes even for timezone-aware columns.
+    if value is None:
+        return datetime.now(UTC).date().isoformat()
+    return (value if value.tzinfo else value.replace(tzinfo=UTC)).date().isoformat()
+
+
+def queue_metrics(
+    db: Session, day: str, created: Counter | None = None, removed: Counter | None = None, gmv: Decimal = Decimal("0")
+) -> None:
+    """Record rows created (on ``day``) and removed in the caller's transaction; the worker applies them to the rollups."""
+    created = {name: count for name, count in (created or {}).items() if count}
+    removed = {name: count for name, count in (removed or {}).items() if count}
+    if created or removed or gmv:
+        enqueue(db, METRICS_TOPIC, [{"day": day, "created": created, "removed": removed, "gmv": str(gmv)}])
+
+
+def queue_created_orders(db: Session, rows: list[dict]) -> None:
+    """Count orders inserted through Core (checkout), which the flush hooks below do not see."""
+    if rows:
+        gmv = sum((Decimal(row["total_amount"]) for row in rows), Decimal("0"))
+        queue_metrics(db, _day(None), created=Counter(orders=len(rows)), gmv=gmv)
+
+
+def _seller_product_counts(db: Session, seller_ids: set[int]) -> dict[int, int]:
+    # A locking read sees the latest committed products even if this transaction read the table earlier.
+    rows = db.execute(
+        select(Product.seller_id, func.count(Product.id))
+        .where(Product.seller_id.in_(sorted(seller_ids)))
+        .group_by(Product.seller_id)
+        .with_for_update(read=True)
+    ).all()
+    return dict(rows)
+
+
+@event.listens_for(Session, "before_flush")
+def _lock_sellers_and_cascade_reviews(session: Session, _flush_context, _instances) -> None:
+    touched = [obj for obj in (*session.new, *session.deleted) if isinstance(obj, Product)]
+    if not touched:
+        return
+    # Product writes of one seller take turns on the seller's user row, so "was this the first product" and
+    # "was this the last one" are each answered by exactly one transaction.
+    seller_ids = sorted({product.seller_id for product in touched})
+    session.execute(select(User.id).where(User.id.in_(seller_ids)).order_by(User.id).with_for_update())
+    deleted_ids = sorted(product.id for product in session.deleted if isinstance(product, Product))
+    if deleted_ids:
+        # Reviews go with their product through the foreign key; delete them here so they can be counted out.
+        removed = session.execute(delete(Review).where(Review.product_id.in_(deleted_ids))).rowcount
+        session.info[_CASCADED_REVIEWS_KEY] = session.info.get(_CASCADED_REVIEWS_KEY, 0) + removed
+
+
+# Users, products, orders and reviews written through the ORM are counted in the transaction that writes them.
+@event.listens_for(Session, "after_flush")
+def _queue_flushed_metrics(session: Session, _flush_context) -> None:
+    created_by_day: dict[str, Counter] = defaultdict(Counter)
+    gmv_by_day: dict[str, Decimal] = defaultdict(Decimal)
+    removed: Counter = Counter(reviews=session.info.pop(_CASCADED_REVIEWS_KEY, 0))
+    product_deltas: Counter = Counter()
+    product_days: dict[int, str] = {}
+    for obj in session.new:
+        name = _TRACKED.get(type(obj))
+        if name is None:
+            continue
+        day = _day(obj.created_at)
+        created_by_day[day][name] += 1
+        if isinstance(obj, Order):
+            gmv_by_day[day] += Decimal(obj.total_amount or 0)
+        if isinstance(obj, Product):
+            product_deltas[obj.seller_id] += 1
+            product_days.setdefault(obj.seller_id, day)
+    for obj in session.deleted:
+        name = _TRACKED.get(type(obj))
+        if name is None:
+            continue
+        removed[name] += 1
+        if isinstance(obj, Product):
+            product_deltas[obj.seller_id] -= 1
+
+    if product_deltas:
+        current = _seller_product_counts(session, set(product_deltas))
+        for seller_id, delta in product_deltas.items():
+            now, before = current.get(seller_id, 0), current.get(seller_id, 0) - delta
+            if before == 0 and now > 0:
+                created_by_day[product_days[seller_id]]["sellers"] += 1
+            elif before > 0 and now == 0:
+                removed["sellers"] += 1
+
+    for day in sorted(set(created_by_day) | set(gmv_by_day)):
+        queue_metrics(session, day, created=created_by_day[day], gmv=gmv_by_day[day])
+    if +removed:
+        queue_metrics(session, _day(None), removed=removed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_cascaded_reviews(session: Session) -> None:
+    session.info.pop(_CASCADED_REVIEWS_KEY, None)
+
+
+@outbox_handler(METRICS_TOPIC)
+def _apply_metrics(db: Session, payloads: list[dict]) -> None:
+    daily: dict[date, Counter] = defaultdict(Counter)
+    totals: Counter = Counter()
+    for payload in payloads:
+        day = daily[date.fromisoformat(payload["day"])]
+        for name, count in payload["created"].items():
+            day[_DAILY_FIELDS[name]] += count
+            totals[name] += count
+        for name, count in payload["removed"].items():
+            totals[name] -= count
+        day["gmv"] += Decimal(payload["gmv"])
+    # Sorted keys, so concurrent workers touch rollup rows in the same order.
+    for day, deltas in sorted(daily.items()):
+        increment_counters(db, DailyMetric, {"day": day}, deltas)
+    increment_counters(db, MarketplaceTotals, {"id": TOTALS_ID}, totals)
+
+
+def rebuild_metrics(db: Session) -> int:
+    """Recount ``daily_metrics`` and ``marketplace_totals`` from the source tables and commit; returns the days written.
+
+    The rollups follow every ORM write; run this after bulk edits that bypassed it (seeding, raw SQL, cascaded user
+    deletes). Pending ``daily_metrics`` outbox events are dropped, since the recount already includes their rows.
+    """
+    daily: dict[date, Counter] = defaultdict(Counter)
+
+    def by_day(model: type, field: str, amount=None) -> None:
+        day = func.date(model.created_at)
+        columns = [day, func.count(model.id)] + ([func.coalesce(func.sum(amount), 0)] if amount is not None else [])
+        for row in db.execute(select(*columns).group_by(day)):
+            key = row[0] if isinstance(row[0], date) else date.fromisoformat(str(row[0]))
+            daily[key][field] += row[1]
+            if amount is not None:
+                daily[key]["gmv"] += Decimal(row[2])
+
+    by_day(User, "new_users")
+    by_day(Product, "new_products")
+    by_day(Review, "reviews")
+    by_day(Order, "orders", Order.total_amount)
+    first_listing = select(func.min(Product.created_at).label("created_at")).group_by(Product.seller_id).subquery()
+    first_day = func.date(first_listing.c.created_at)
+    for day, count in db.execute(select(first_day, func.count()).group_by(first_day)):
+        daily[day if isinstance(day, date) else date.fromisoformat(str(day))]["new_sellers"] += count
+
+    db.execute(delete(OutboxEvent).where(OutboxEvent.topic == METRICS_TOPIC))
+    db.execute(delete(DailyMetric))
+    db.execute(delete(MarketplaceTotals))
+    zero = {field: 0 for field in _DAILY_FIELDS.values()} | {"gmv": Decimal("0")}
+    if daily:
+        db.execute(insert(DailyMetric), [{"day": day, **(zero | dict(counts))} for day, counts in sorted(daily.items())])
+    db.execute(
+        insert(MarketplaceTotals).values(
+            id=TOTALS_ID,
+            users=db.scalar(select(func.count(User.id))) or 0,
+            sellers=db.scalar(select(func.count(func.distinct(Product.seller_id)))) or 0,
+            products=db.scalar(select(func.count(Product.id))) or 0,
+            orders=db.scalar(select(func.count(Order.id))) or 0,
+            reviews=db.scalar(select(func.count(Review.id))) or 0,
+        )
+    )
+    db.commit()
+    return len(daily)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import math
+import sqlite3
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+from sqlalchemy import Column, Engine, Integer, MetaData, Select, Table, delete, event, false, insert, select
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.dialects.sqlite.aiosqlite import AsyncAdapt_aiosqlite_connection
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.search_text import normalize_query
+from app.models.product import Product
+
+
+class InvertedIndex:
+    """In-process term -> postings index, used where the database has no FULLTEXT support (SQLite in tests and dev).
+
+    The index follows the products committed through sessions of this process only, so rows written by other
+    processes show up after a restart. Ids of rows that no longer exist are harmless: callers always join with SQL.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._postings: dict[str, dict[int, int]] = {}
+        self._documents: dict[int, Counter[str]] = {}
+        self._vocabulary: list[str] | None = None
+        self._loaded = False
+
+    def index(self, product_id: int, document: str) -> None:
+        with self._lock:
+            self._remove(product_id)
+            terms = Counter(document.split())
+            self._documents[product_id] = terms
+            for term, tf in terms.items():
+                postings = self._postings.setdefault(term, {})
+                if not postings:
+                    self._vocabulary = None
+                postings[product_id] = tf
+
+    def remove(self, product_id: int) -> None:
+        with self._lock:
+            self._remove(product_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._vocabulary = None
+            self._loaded = False
+
+    def ensure_loaded(self, db: Session) -> None:
+        if self._loaded:
+            return
+        rows = db.execute(select(Product.id, Product.search_document)).all()
+        for product_id, document in rows:
+            self.index(product_id, document or "")
+        self._loaded = True
+
+    def search(self, terms: list[str]) -> dict[int, float]:
+        """Score documents matching every term; each query term also matches longer terms it prefixes."""
+        with self._lock:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self._postings)
+            total_docs = max(len(self._documents), 1)
+            scores: dict[int, float] | None = None
+            for term in terms:
+                term_scores: dict[int, float] = {}
+                idx = bisect_left(self._vocabulary, term)
+                while idx < len(self._vocabulary) and self._vocabulary[idx].startswith(term):
+                    postings = self._postings[self._vocabulary[idx]]
+                    idf = math.log(1 + total_docs / len(postings))
+                    for product_id, tf in postings.items():
+                        term_scores[product_id] = term_scores.get(product_id, 0.0) + tf * idf
+                    idx += 1
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {pid: score + term_scores[pid] for pid, score in scores.items() if pid in term_scores}
+                if not scores:
+                    return {}
+            return scores or {}
+
+    def _remove(self, product_id: int) -> None:
+        terms = self._documents.pop(product_id, None)
+        if not terms:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+
+
+fallback_index = InvertedIndex()
+
+
+# Matches of the current query, one connection-local table per connection. Joining it keeps the statement size
+# fixed however many products match, where an IN list and CASE would bind two parameters per match. Rows are
+# numbered in relevance order (best last), so ordering by rank walks the table's rowid instead of sorting.
+_scores = Table(
+    "search_scores",
+    MetaData(),
+    Column("rank", Integer, primary_key=True),
+    Column("product_id", Integer, nullable=False, unique=True),
+    prefixes=["TEMPORARY"],
+)
+_CREATE_SCORES = str(CreateTable(_scores).compile(dialect=sqlite.dialect()))
+_PENDING_KEY = "search_index_pending"
+
+
+# Changes are applied once the transaction commits, so a rolled-back write never leaves postings behind.
+@event.listens_for(Product, "after_insert")
+@event.listens_for(Product, "after_update")
+def _queue_index(_mapper, _connection, target: Product) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, {})[target.id] = target.search_document or ""
+
+
+@event.listens_for(Product, "after_delete")
+def _queue_unindex(_mapper, _connection, target: Product) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, {})[target.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_index(session: Session) -> None:
+    for product_id, document in session.info.pop(_PENDING_KEY, {}).items():
+        if document is None:
+            fallback_index.remove(product_id)
+        else:
+            fallback_index.index(product_id, document)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_index(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+@event.listens_for(Engine, "connect")
+def _create_scores_table(dbapi_connection, _connection_record) -> None:
+    """Give each new SQLite connection its match table, so a search does not issue DDL before every query."""
+    if isinstance(dbapi_connection, sqlite3.Connection | AsyncAdapt_aiosqlite_connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(_CREATE_SCORES)
+        cursor.close()
+
+
+def supports_fulltext(db: Session) -> bool:
+    return db.get_bind().dialect.name == "mysql"
+
+
+def apply_search(db: Session, stmt: Select, q: str, by_relevance: bool = False) -> tuple[Select, ColumnElement | None]:
+    """Restrict ``stmt`` to products matching ``q`` and return a relevance expression to order by.
+
+    MySQL uses the FULLTEXT index on ``products.search_document`` in boolean mode with prefix matching; other
+    dialects fall back to the in-process inverted index, whose matches are loaded into a temporary table of the
+    session's connection, ranked by score and then id, and joined. Queries made only of stop words do not filter
+    anything. Pass ``by_relevance`` when the caller orders by the returned expression.
+    """
+    terms = normalize_query(q)
+    if not terms:
+        return stmt, None
+
+    if supports_fulltext(db):
+        relevance = Product.search_document.match(" ".join(f"+{term}*" for term in terms))
+        return stmt.where(relevance), relevance
+
+    fallback_index.ensure_loaded(db)
+    scores = fallback_index.search(terms)
+    if not scores:
+        return stmt.where(false()), None
+    db.execute(delete(_scores))
+    ranked = sorted(scores, key=lambda product_id: (scores[product_id], product_id))
+    db.execute(insert(_scores), [{"rank": rank, "product_id": product_id} for rank, product_id in enumerate(ranked, 1)])
+    # A relevance page is read off the match table in rank order. "+ 0" hides its product_id index from SQLite, which
+    # would otherwise walk every active product through the status index and then sort the matches.
+    product_id = _scores.c.product_id + 0 if by_relevance else _scores.c.product_id
+    return stmt.join(_scores, product_id == Product.id), _scores.c.rank
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import threading
+from collections import Counter, defaultdict
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+from typing import NamedTuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.order import Order, OrderStatus
+from app.models.product import Product
+from app.models.seller_stats import SellerDailyStats, SellerProductDailyStats
+from app.services.outbox_service import enqueue, outbox_handler
+from app.services.rollup_service import increment_counters
+
+ORDER_TRANSITION_TOPIC = "seller_analytics.order"
+
+MAX_WINDOW_DAYS = 90
+
+_STATUS_COUNTERS = {
+    OrderStatus.REQUESTED: "orders_requested",
+    OrderStatus.ACCEPTED: "orders_accepted",
+    OrderStatus.COMPLETED: "orders_completed",
+    OrderStatus.REJECTED: "orders_rejected",
+    OrderStatus.CANCELED: "orders_canceled",
+}
+
+Deltas = dict[tuple, Counter]
+
+
+def _apply(db: Session, seller_deltas: Deltas, product_deltas: Deltas) -> None:
+    # Sorted keys, so concurrent writers touch rollup rows in the same order.
+    for (seller_id, day), deltas in sorted(seller_deltas.items()):
+        increment_counters(db, SellerDailyStats, {"seller_id": seller_id, "day": day}, deltas)
+    for (seller_id, day, product_id), deltas in sorted(product_deltas.items()):
+        increment_counters(db, SellerProductDailyStats, {"seller_id": seller_id, "day": day, "product_id": product_id}, deltas)
+
+
+def queue_order_transitions(db: Session, transitions: list[tuple[int, OrderStatus]]) -> None:
+    """Record orders entering a status; the rollups are updated by the outbox worker in one pass per batch."""
+    today = datetime.now(UTC).date().isoformat()
+    enqueue(
+        db,
+        ORDER_TRANSITION_TOPIC,
+        [{"order_id": order_id, "status": next_status.value, "day": today} for order_id, next_status in transitions],
+    )
+
+
+@outbox_handler(ORDER_TRANSITION_TOPIC)
+def _apply_order_transitions(db: Session, payloads: list[dict]) -> None:
+    order_ids = sorted({payload["order_id"] for payload in payloads})
+    orders = {order.id: order for order in db.scalars(select(Order).options(selectinload(Order.items)).where(Order.id.in_(order_ids)))}
+    seller_deltas: Deltas = defaultdict(Counter)
+    product_deltas: Deltas = defaultdict(Counter)
+    for payload in payloads:
+        order = orders.get(payload["order_id"])
+        if order is None:
+            continue
+        day = date.fromisoformat(payload["day"])
+        next_status = OrderStatus(payload["status"])
+        seller_deltas[(order.seller_id, day)][_STATUS_COUNTERS[next_status]] += 1
+        if next_status == OrderStatus.ACCEPTED:
+            seller_deltas[(order.seller_id, day)]["revenue"] += order.total_amount
+        for item in order.items:
+            if item.product_id is None:
+                continue
+            product = product_deltas[(order.seller_id, day, item.product_id)]
+            if next_status == OrderStatus.REQUESTED:
+                product["orders"] += 1
+            elif next_status == OrderStatus.ACCEPTED:
+                product["units_sold"] += item.qty
+                product["revenue"] += item.subtotal
+    _apply(db, seller_deltas, product_deltas)
+
+
+class ActivityBuffer:
+    """Product views and cart adds counted in memory and written to the rollups in one flush.
+
+    A view is too cheap an event to pay a write for, so requests only count. The API process's lifespan writes the
+    counts every ``seller_activity_flush_seconds`` and once more on shutdown (``app.worker.ActivityFlusher``). Counts
+    still buffered when the process dies are lost, which these figures can afford.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: Deltas = defaultdict(Counter)
+
+    def add(self, seller_id: int, product_id: int, field: str) -> None:
+        with self._lock:
+            self._pending[(seller_id, datetime.now(UTC).date(), product_id)][field] += 1
+
+    def drain(self) -> Deltas:
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+        return pending
+
+    def clear(self) -> None:
+        self.drain()
+
+
+activity_buffer = ActivityBuffer()
+
+
+def record_product_activity(seller_id: int, product_id: int, field: str) -> None:
+    """Count a product view (``"views"``) or cart add (``"cart_adds"``) in memory; no database work."""
+    activity_buffer.add(seller_id, product_id, field)
+
+
+def flush_product_activity(db: Session) -> int:
+    """Write buffered views and cart adds to both rollups and commit; returns the number of product-days written."""
+    pending = activity_buffer.drain()
+    if not pending:
+        return 0
+    seller_deltas: Deltas = defaultdict(Counter)
+    for (seller_id, day, _product_id), deltas in pending.items():
+        seller_deltas[(seller_id, day)].update(deltas)
+    _apply(db, seller_deltas, pending)
+    db.commit()
+    return len(pending)
+
+
+class SellerAnalytics(NamedTuple):
+    date_from: date
+    date_to: date
+    daily: list[dict]
+    totals: dict
+    top_products: list[dict]
+
+
+def _window(date_from: date | None, date_to: date | None) -> tuple[date, date]:
+    date_to = date_to or datetime.now(UTC).date()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from must not be after date_to")
+    if (date_to - date_from).days >= MAX_WINDOW_DAYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Window is limited to {MAX_WINDOW_DAYS} days")
+    return date_from, date_to
+
+
+def _ratio(numerator: int, denominator: int) -> float | None:
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def get_seller_analytics(
+    db: Session, seller_id: int, date_from: date | None = None, date_to: date | None = None, top: int = 10
+) -> SellerAnalytics:
+    """Daily series, window totals and top products by revenue for one seller.
+
+    The series and the ranking are each one range scan of a rollup's primary key, so the cost depends on the window and
+    the seller's catalog, not on order history. Windows are limited to ``MAX_WINDOW_DAYS``.
+    """
+    date_from, date_to = _window(date_from, date_to)
+    rows = {
+        row.day: row
+        for row in db.scalars(
+            select(SellerDailyStats).where(
+                SellerDailyStats.seller_id == seller_id, SellerDailyStats.day >= date_from, SellerDailyStats.day <= date_to
+            )
+        )
+    }
+    fields = ("views", "cart_adds", *_STATUS_COUNTERS.values())
+    daily = []
+    totals: dict = {field: 0 for field in fields} | {"revenue": Decimal("0")}
+    for offset in range((date_to - date_from).days + 1):
+        day = date_from + timedelta(days=offset)
+        row = rows.get(day)
+        point = {"day": day} | {field: getattr(row, field) if row else 0 for field in fields}
+        point["revenue"] = row.revenue if row else Decimal("0")
+        daily.append(point)
+        for field in (*fields, "revenue"):
+            totals[field] += point[field]
+    totals["view_to_cart"] = _ratio(totals["cart_adds"], totals["views"])
+    totals["cart_to_order"] = _ratio(totals["orders_requested"], totals["cart_adds"])
+
+    revenue = func.sum(SellerProductDailyStats.revenue)
+    ranked = db.execute(
+        select(
+            SellerProductDailyStats.product_id,
+            revenue,
+            func.sum(SellerProductDailyStats.units_sold),
+            func.sum(SellerProductDailyStats.orders),
+            func.sum(SellerProductDailyStats.cart_adds),
+            func.sum(SellerProductDailyStats.views),
+        )
+        .where(
+            SellerProductDailyStats.seller_id == seller_id,
+            SellerProductDailyStats.day >= date_from,
+            SellerProductDailyStats.day <= date_to,
+        )
+        .group_by(SellerProductDailyStats.product_id)
+        .order_by(revenue.desc(), SellerProductDailyStats.product_id)
+        .limit(top)
+    ).all()
+    titles = dict(db.execute(select(Product.id, Product.title).where(Product.id.in_([row[0] for row in ranked]))).all()) if ranked else {}
+    top_products = [
+        {
+            "product_id": product_id,
+            "title": titles.get(product_id, ""),
+            "revenue": product_revenue,
+            "units_sold": units_sold,
+            "orders": orders,
+            "cart_adds": cart_adds,
+            "views": views,
+        }
+        for product_id, product_revenue, units_sold, orders, cart_adds, views in ranked
+    ]
+    return SellerAnalytics(date_from, date_to, daily, totals, top_products)
@@ -0,0 +1,131 @@
+"""Outbox worker: carries out side effects recorded by request transactions.
+
+    python -m app.worker [--once] [--metrics-port 9100]
+
+By default the API process runs the same loop on a background thread (``outbox_inline_worker``). Handlers publish
+pushes to SSE clients, so a separate process refuses to start on the process-local broker: install a shared one with
+``app.core.broker.set_broker`` before calling :func:`main`, and turn the inline worker off.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import anyio
+from sqlalchemy.orm import Session, sessionmaker
+
+import app.services.notification_service  # noqa: F401 - registers the notification outbox handler
+import app.services.popularity_service  # noqa: F401 - registers the popularity outbox handler
+import app.services.rollup_service  # noqa: F401 - registers the daily metrics outbox handler
+from app.core.broker import get_broker
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.session import SessionLocal
+from app.services.outbox_service import drain, outbox_wakeup
+from app.services.seller_analytics_service import flush_product_activity
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    """Drains the outbox until stopped, sleeping ``poll_seconds`` between empty polls or until woken by a commit."""
+
+    def __init__(self, session_factory: sessionmaker[Session] = SessionLocal, poll_seconds: float | None = None) -> None:
+        self.session_factory = session_factory
+        self.poll_seconds = settings.outbox_poll_seconds if poll_seconds is None else poll_seconds
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> int:
+        with self.session_factory() as db:
+            return drain(db)
+
+    def run_forever(self) -> None:
+        while not self._stopping.is_set():
+            outbox_wakeup.clear()
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Outbox worker iteration failed")
+            outbox_wakeup.wait(self.poll_seconds)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.run_forever, name="outbox-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stopping.set()
+        outbox_wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+class ActivityFlusher:
+    """Writes the product views and cart adds buffered in this process (``activity_buffer``) to the seller rollups.
+
+    The buffer lives in the API process that counted the events, so each API process runs :meth:`run_forever` from
+    its lifespan, whether or not the outbox worker runs inline, and calls :meth:`flush` once more on shutdown.
+    """
+
+    def __init__(self, session_factory: sessionmaker[Session] = SessionLocal) -> None:
+        self.session_factory = session_factory
+
+    def flush(self) -> int:
+        try:
+            with self.session_factory() as db:
+                return flush_product_activity(db)
+        except Exception:
+            logger.exception("Could not flush seller activity counts")
+            return 0
+
+    async def run_forever(self) -> None:
+        while True:
+            await anyio.sleep(settings.seller_activity_flush_seconds)
+            await anyio.to_thread.run_sync(self.flush)
+
+
+activity_flusher = ActivityFlusher()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        body = registry.expose().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="drain what is due and exit")
+    parser.add_argument("--metrics-port", type=int, default=None, help="serve Prometheus metrics on this port")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if not get_broker().shared:
+        parser.error("the push broker is process-local, so pushes published here would never reach SSE clients")
+
+    worker = OutboxWorker()
+    if args.once:
+        logger.info("Handled %s outbox events", worker.run_once())
+        return
+
+    if args.metrics_port is not None:
+        server = ThreadingHTTPServer(("0.0.0.0", args.metrics_port), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_args: worker.stop(timeout=0))
+    logger.info("Outbox worker started")
+    worker.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,28 @@
 from __future__ import annotations
 
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator, Iterator
+from contextlib import contextmanager
+from decimal import Decimal
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, select
+from sqlalchemy import create_engine, event, select
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from app.core import idempotency, principal, response_cache
+from app.core.config import settings
 from app.core.security import hash_password
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import DbRunner, ThreadedDbRunner, get_db, get_db_runner
 from app.main import app
+from app.models.product import Product, ProductStatus
 from app.models.role import Role, RoleName
 from app.models.user import User
+from app.services.outbox_service import drain
+from app.services.search_service import fallback_index
+from app.services.seller_analytics_service import activity_buffer
+from app.worker import activity_flusher
 
 SQLALCHEMY_DATABASE_URL = "sqlite+pysqlite:///:memory:"
 
@@ -33,12 +42,29 @@ def override_get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def override_get_db_runner() -> AsyncGenerator[DbRunner, None]:
+    db = TestingSessionLocal()
+    try:
+        yield ThreadedDbRunner(db)
+    finally:
+        db.close()
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_db_runner] = override_get_db_runner
+# Tests drain the outbox explicitly (``drain_outbox``) instead of racing a background thread.
+settings.outbox_inline_worker = False
+activity_flusher.session_factory = TestingSessionLocal
 
 
 @pytest.fixture(autouse=True)
 def setup_database() -> Generator[None, None, None]:
     Base.metadata.create_all(bind=engine)
+    fallback_index.clear()
+    principal.principal_store.clear()
+    idempotency.idempotency_store.clear()
+    activity_buffer.clear()
+    response_cache.response_store.clear()
     with TestingSessionLocal() as db:
         for role_name in RoleName:
             db.add(Role(name=role_name))
@@ -76,8 +102,56 @@ def create_user_factory(db_session: Session):
     return _create
 
 
-def auth_headers(client: TestClient, email: str, password: str) -> dict[str, str]:
-    response = client.post("/api/v1/auth/login", json={"email": email, "password": password})
-    assert response.status_code == 200
-    token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
+@pytest.fixture()
+def product_factory():
+    """``product_factory(seller_id, title, price="1000.00", **fields)`` builds an unsaved ACTIVE product."""
+
+    def _build(seller_id: int, title: str, price: str = "1000.00", **fields) -> Product:
+        defaults = {"description": f"Knitted item: {title}", "status": ProductStatus.ACTIVE, "tags": [], "materials": []}
+        return Product(seller_id=seller_id, title=title, price=Decimal(price), **{**defaults, **fields})
+
+    return _build
+
+
+@contextmanager
+def _count_queries() -> Iterator[list[str]]:
+    statements: list[str] = []
+
+    def before_cursor_execute(_conn, _cursor, statement, _parameters, _context, _executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture()
+def count_queries():
+    """``with count_queries() as statements:`` records every SQL statement sent to the test database."""
+    return _count_queries
+
+
+@pytest.fixture()
+def drain_outbox():
+    """``drain_outbox()`` runs the outbox worker over everything due, as the background worker would."""
+
+    def _drain() -> int:
+        with TestingSessionLocal() as db:
+            return drain(db)
+
+    return _drain
+
+
+@pytest.fixture()
+def auth_headers(client: TestClient):
+    """``auth_headers(email, password)`` logs in through the API and returns the bearer header."""
+
+    def _headers(email: str, password: str) -> dict[str, str]:
+        response = client.post("/api/v1/auth/login", json={"email": email, "password": password})
+        assert response.status_code == 200
+        token = response.json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+
+    return _headers
@@ -1,3 +1,4 @@
+from datetime import UTC, datetime, timedelta
 from decimal import Decimal
 
 from sqlalchemy import select
@@ -7,19 +8,13 @@ from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product import Product, ProductStatus
 from app.models.review import Review
 from app.models.role import RoleName
+from app.services.rollup_service import rebuild_metrics
 
 
-def auth_headers(client, email: str, password: str) -> dict[str, str]:
-    response = client.post("/api/v1/auth/login", json={"email": email, "password": password})
-    assert response.status_code == 200
-    token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
-
-
-def test_admin_users_list_and_ban_unban(client, db_session, create_user_factory):
+def test_admin_users_list_and_ban_unban(client, db_session, create_user_factory, auth_headers):
     admin = create_user_factory("admin@example.com", "StrongPass123", [RoleName.ADMIN, RoleName.BUYER])
     target = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
-    headers = auth_headers(client, admin.email, "StrongPass123")
+    headers = auth_headers(admin.email, "StrongPass123")
 
     list_response = client.get("/api/v1/admin/users", headers=headers)
     assert list_response.status_code == 200
@@ -40,31 +35,13 @@ def test_admin_users_list_and_ban_unban(client, db_session, create_user_factory)
     assert len(audit_rows) >= 2
 
 
-def test_admin_can_moderate_edit_and_archive_product(client, db_session, create_user_factory):
+def test_admin_can_moderate_edit_and_archive_product(client, db_session, create_user_factory, auth_headers, product_factory):
     admin = create_user_factory("admin@example.com", "StrongPass123", [RoleName.ADMIN, RoleName.BUYER])
     seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
-    headers = auth_headers(client, admin.email, "StrongPass123")
+    headers = auth_headers(admin.email, "StrongPass123")
 
-    pending_product = Product(
-        seller_id=seller.id,
-        title="Pending Cardigan",
-        description="Warm knitted cardigan awaiting moderation",
-        price=Decimal("5000.00"),
-        stock=3,
-        tags=["cardigan"],
-        materials=["wool"],
-        status=ProductStatus.PENDING,
-    )
-    active_product = Product(
-        seller_id=seller.id,
-        title="Active Scarf",
-        description="Soft scarf ready for update and archive checks",
-        price=Decimal("1900.00"),
-        stock=5,
-        tags=["scarf"],
-        materials=["cotton"],
-        status=ProductStatus.ACTIVE,
-    )
+    pending_product = product_factory(seller.id, "Pending Cardigan", "5000.00", stock=3, status=ProductStatus.PENDING)
+    active_product = product_factory(seller.id, "Active Scarf", "1900.00", stock=5)
     db_session.add_all([pending_product, active_product])
     db_session.commit()
 
@@ -94,22 +71,13 @@ def test_admin_can_moderate_edit_and_archive_product(client, db_session, create_
     assert refreshed.status == ProductStatus.ARCHIVED
 
 
-def test_admin_can_hide_and_delete_reviews(client, db_session, create_user_factory):
+def test_admin_can_hide_and_delete_reviews(client, db_session, create_user_factory, auth_headers, product_factory):
     admin = create_user_factory("admin@example.com", "StrongPass123", [RoleName.ADMIN, RoleName.BUYER])
     buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
     seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
-    headers = auth_headers(client, admin.email, "StrongPass123")
+    headers = auth_headers(admin.email, "StrongPass123")
 
-    product = Product(
-        seller_id=seller.id,
-        title="Review Product",
-        description="Product to test review moderation endpoints",
-        price=Decimal("1200.00"),
-        stock=2,
-        tags=["review"],
-        materials=["wool"],
-        status=ProductStatus.ACTIVE,
-    )
+    product = product_factory(seller.id, "Review Product", "1200.00", stock=2)
     db_session.add(product)
     db_session.flush()
 
@@ -160,9 +128,96 @@ def test_admin_can_hide_and_delete_reviews(client, db_session, create_user_facto
     assert db_session.scalar(select(Review).where(Review.id == review.id)) is None
 
 
-def test_non_admin_cannot_access_admin_endpoints(client, create_user_factory):
+def test_non_admin_cannot_access_admin_endpoints(client, create_user_factory, auth_headers):
     buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
-    headers = auth_headers(client, buyer.email, "StrongPass123")
+    headers = auth_headers(buyer.email, "StrongPass123")
 
     response = client.get("/api/v1/admin/users", headers=headers)
     assert response.status_code == 403
+
+
+def test_stats_and_trend_are_served_from_the_rollups(
+    client, db_session, create_user_factory, count_queries, drain_outbox, auth_headers, product_factory
+):
+    admin = create_user_factory("admin@example.com", "StrongPass123", [RoleName.ADMIN, RoleName.BUYER])
+    first = create_user_factory("first@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
+    second = create_user_factory("second@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
+    headers = auth_headers(admin.email, "StrongPass123")
+    now = datetime.now(UTC)
+    two_days_ago = now - timedelta(days=2)
+
+    def product(seller_id: int, created_at: datetime) -> Product:
+        return product_factory(seller_id, "Rollup Scarf", "100.00", created_at=created_at)
+
+    def order(amount: str, created_at: datetime) -> Order:
+        return Order(
+            buyer_id=admin.id,
+            seller_id=first.id,
+            status=OrderStatus.REQUESTED,
+            full_name="Buyer",
+            phone="+7999000000",
+            address="Moscow",
+            total_amount=Decimal(amount),
+            created_at=created_at,
+        )
+
+    db_session.add_all([product(first.id, two_days_ago), product(first.id, now), product(second.id, now)])
+    db_session.add_all([order("100.00", two_days_ago), order("50.00", now)])
+    db_session.commit()
+    drain_outbox()
+
+    with count_queries() as statements:
+        stats = client.get("/api/v1/admin/stats", headers=headers)
+    assert stats.status_code == 200
+    assert stats.json() == {"users": 3, "sellers": 2, "products": 3, "orders": 2, "reviews": 0}
+    assert sum("marketplace_totals" in statement for statement in statements) == 1
+
+    # Rows are counted by the transaction that writes them, whatever order the transactions commit in.
+    reviewed = product(second.id, now)
+    db_session.add_all([order("25.00", now), reviewed])
+    db_session.commit()
+    drain_outbox()
+    assert client.get("/api/v1/admin/stats", headers=headers).json()["products"] == 4
+
+    trend = client.get("/api/v1/admin/stats/trend", params={"days": 3}, headers=headers)
+    assert trend.status_code == 200
+    assert [(row["count"], row["gmv"], row["new_products"]) for row in trend.json()] == [
+        (2, "75.00", 3),
+        (0, "0", 0),
+        (1, "100.00", 1),
+    ]
+    assert trend.json()[0]["day"] == now.date().isoformat()
+    assert trend.json()[0]["new_users"] == 3
+
+    item = OrderItem(
+        order_id=db_session.scalar(select(Order.id).limit(1)),
+        product_id=reviewed.id,
+        product_title_snapshot=reviewed.title,
+        product_price_snapshot=reviewed.price,
+        qty=1,
+        subtotal=reviewed.price,
+    )
+    db_session.add(item)
+    db_session.flush()
+    db_session.add(Review(user_id=admin.id, product_id=reviewed.id, order_item_id=item.id, rating=5, text="Counted, then cascaded."))
+    db_session.commit()
+    drain_outbox()
+    assert client.get("/api/v1/admin/stats", headers=headers).json()["reviews"] == 1
+
+    # Hard deletes are subtracted from the totals, with the product's reviews; a seller whose last product goes
+    # stops counting.
+    for product_id in db_session.scalars(select(Product.id).where(Product.seller_id == second.id)).all():
+        assert client.delete(f"/api/v1/admin/products/{product_id}", params={"hard_delete": True}, headers=headers).status_code == 200
+    drain_outbox()
+    assert client.get("/api/v1/admin/stats", headers=headers).json() == {
+        "users": 3,
+        "sellers": 1,
+        "products": 2,
+        "orders": 3,
+        "reviews": 0,
+    }
+    # The daily rows keep what was created that day.
+    assert client.get("/api/v1/admin/stats/trend", params={"days": 1}, headers=headers).json()[0]["new_products"] == 3
+
+    assert rebuild_metrics(db_session) == 2
+    assert client.get("/api/v1/admin/stats", headers=headers).json()["sellers"] == 1
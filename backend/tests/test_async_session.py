@@ -0,0 +1,151 @@
+import asyncio
+import threading
+from collections.abc import AsyncGenerator, Iterator
+
+import pytest
+from fastapi.routing import APIRoute
+from pydantic import ValidationError
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core import serialization
+from app.core.config import Settings
+from app.core.security import create_access_token
+from app.db.base import Base
+from app.db.session import AsyncDbRunner, DbRunner, async_database_url, get_db, get_db_runner
+from app.main import app
+from app.models.role import Role, RoleName
+from app.models.user import User
+from app.services.seller_analytics_service import activity_buffer
+
+
+def test_async_database_url_swaps_in_the_asyncio_driver():
+    assert async_database_url("mysql+pymysql://app:secret@db:3306/handmade") == "mysql+aiomysql://app:secret@db:3306/handmade"
+    assert async_database_url("sqlite+pysqlite:////tmp/app.db") == "sqlite+aiosqlite:////tmp/app.db"
+    with pytest.raises(ValueError):
+        async_database_url("postgresql+psycopg://app@db/handmade")
+
+
+def test_async_driver_is_refused_outside_mysql():
+    assert Settings(database_url="mysql+pymysql://app:secret@db:3306/handmade", database_async=True).database_async
+    with pytest.raises(ValidationError):
+        Settings(database_url="sqlite+pysqlite:////tmp/app.db", database_async=True)
+
+
+def test_only_password_endpoints_use_the_sync_session():
+    def dependencies(dependant) -> set:
+        found = {dependant.call}
+        for sub in dependant.dependencies:
+            found |= dependencies(sub)
+        return found
+
+    sync_routes = {
+        (method, route.path)
+        for route in app.routes
+        if isinstance(route, APIRoute) and get_db in dependencies(route.dependant)
+        for method in route.methods
+    }
+    assert sync_routes == {("POST", "/api/v1/auth/register"), ("POST", "/api/v1/auth/login")}
+
+
+@pytest.fixture()
+def async_database(tmp_path) -> Iterator[sessionmaker]:
+    """Routes every ``get_db_runner`` endpoint through AsyncSession on aiosqlite; yields sync sessions of that file."""
+    pytest.importorskip("aiosqlite")
+    url = f"sqlite+pysqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(sync_engine)
+    with Session(sync_engine) as db:
+        db.add_all([Role(name=role_name) for role_name in RoleName])
+        db.commit()
+
+    # NullPool: connections never outlive the TestClient's event loop.
+    sessions = async_sessionmaker(create_async_engine(async_database_url(url), poolclass=NullPool), autoflush=False)
+
+    async def async_runner() -> AsyncGenerator[DbRunner, None]:
+        async with sessions() as session:
+            yield AsyncDbRunner(session)
+
+    previous = app.dependency_overrides[get_db_runner]
+    app.dependency_overrides[get_db_runner] = async_runner
+    try:
+        yield sessionmaker(sync_engine)
+    finally:
+        app.dependency_overrides[get_db_runner] = previous
+        sync_engine.dispose()
+
+
+def test_public_reads_run_on_async_session(client, async_database, product_factory):
+    with async_database() as db:
+        seller = User(email="seller@example.com", password_hash="-")
+        db.add(seller)
+        db.flush()
+        product = product_factory(seller.id, "Async Scarf", "1500.00")
+        db.add(product)
+        db.commit()
+        seller_id, product_id = seller.id, product.id
+
+    listing = client.get("/api/v1/catalog")
+    assert [item["title"] for item in listing.json()["items"]] == ["Async Scarf"]
+    assert client.get(f"/api/v1/catalog/{product_id}").json()["price"] == "1500.00"
+    assert client.get(f"/api/v1/sellers/{seller_id}").json()["products"][0]["title"] == "Async Scarf"
+    assert client.get(f"/api/v1/reviews/product/{product_id}").json() == []
+    assert client.get("/api/v1/catalog/999999").status_code == 404
+    assert sum(counts["views"] for counts in activity_buffer.drain().values()) == 1
+
+
+def test_authenticated_writes_run_on_async_session(client, async_database, product_factory):
+    with async_database() as db:
+        roles = {role.name: role for role in db.scalars(select(Role))}
+        seller = User(email="seller@example.com", password_hash="-", roles=[roles[RoleName.SELLER]])
+        buyer = User(email="buyer@example.com", password_hash="-", roles=[roles[RoleName.BUYER]])
+        db.add_all([seller, buyer])
+        db.flush()
+        product = product_factory(seller.id, "Async Scarf", "1500.00")
+        db.add(product)
+        db.commit()
+        product_id, buyer_id, seller_id = product.id, buyer.id, seller.id
+    buyer_headers = {"Authorization": f"Bearer {create_access_token(str(buyer_id))}"}
+    seller_headers = {"Authorization": f"Bearer {create_access_token(str(seller_id))}"}
+
+    assert client.get("/api/v1/auth/me", headers=buyer_headers).json()["email"] == "buyer@example.com"
+    assert client.post(f"/api/v1/favorites/{product_id}", headers=buyer_headers).status_code == 201
+    assert client.get("/api/v1/favorites", headers=buyer_headers).json() == [product_id]
+    add_headers = {**buyer_headers, "Idempotency-Key": "add-1"}
+    for _ in range(2):
+        added = client.post("/api/v1/cart/items", json={"product_id": product_id, "qty": 1}, headers=add_headers)
+        assert added.status_code == 201
+    assert added.headers["Idempotent-Replayed"] == "true"
+    checkout = client.post(
+        "/api/v1/orders/checkout",
+        json={"full_name": "Async Buyer", "phone": "+7000000000", "address": "Moscow"},
+        headers=buyer_headers,
+    )
+    assert checkout.status_code == 201
+    assert checkout.json()["orders"][0]["total_amount"] == "1500.00"
+    assert [order["id"] for order in client.get("/api/v1/orders/seller", headers=seller_headers).json()] == [
+        order["id"] for order in checkout.json()["orders"]
+    ]
+    assert client.get("/api/v1/seller/dashboard", headers=seller_headers).json() == {"products": 1, "orders": 1}
+    # The seller's NEW_ORDER notification waits in this database's outbox, which no worker drains.
+    assert client.get("/api/v1/notifications/unread-count", headers=seller_headers).json() == {"unread": 0}
+
+
+def test_public_pages_are_encoded_off_the_event_loop(monkeypatch):
+    encoded_on = []
+    dump_json = serialization.dump_json
+
+    def recording_dump_json(schema, value):
+        encoded_on.append(threading.get_ident())
+        return dump_json(schema, value)
+
+    monkeypatch.setattr(serialization, "dump_json", recording_dump_json)
+
+    async def scenario() -> tuple[bytes, int]:
+        return await serialization.dump_json_off_loop(list[int], [1, 2]), threading.get_ident()
+
+    body, loop_thread = asyncio.run(scenario())
+    assert body == b"[1,2]"
+    assert encoded_on and loop_thread not in encoded_on
@@ -1,5 +1,16 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
 from sqlalchemy import select
+from sqlalchemy.orm import Session
 
+from app.core.deps import get_current_user, get_stream_user
+from app.core.hashing import PasswordHasher
+from app.core.principal import _Generations, invalidate_principal, load_principal, principal_store
+from app.core.security import decode_token, hash_password, password_needs_rehash, verify_password
+from app.db.session import ThreadedDbRunner
+from app.models.role import RoleName
 from app.models.user import User
 
 
@@ -34,3 +45,127 @@ def test_register_login_me_and_ban_flow(client, db_session):
         json={"email": "buyer@example.com", "password": "StrongPass123"},
     )
     assert banned_login.status_code == 403
+
+
+def test_authenticated_requests_use_cached_principal_until_invalidated(
+    client, db_session, create_user_factory, count_queries, auth_headers
+):
+    admin = create_user_factory("admin@example.com", "StrongPass123", [RoleName.ADMIN, RoleName.BUYER])
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    admin_headers = auth_headers(admin.email, "StrongPass123")
+    buyer_headers = auth_headers(buyer.email, "StrongPass123")
+
+    assert client.get("/api/v1/auth/me", headers=buyer_headers).status_code == 200
+    with count_queries() as statements:
+        me = client.get("/api/v1/auth/me", headers=buyer_headers)
+    assert me.json()["roles"] == ["BUYER"]
+    assert statements == []
+
+    became_seller = client.post("/api/v1/auth/roles/seller?enabled=true", headers=buyer_headers)
+    assert sorted(became_seller.json()["roles"]) == ["BUYER", "SELLER"]
+    assert sorted(client.get("/api/v1/auth/me", headers=buyer_headers).json()["roles"]) == ["BUYER", "SELLER"]
+    assert client.get("/api/v1/seller/profile", headers=buyer_headers).status_code == 200
+
+    assert client.post(f"/api/v1/admin/users/{buyer.id}/ban?is_banned=true", headers=admin_headers).status_code == 200
+    assert client.get("/api/v1/auth/me", headers=buyer_headers).status_code == 403
+    assert client.post(f"/api/v1/admin/users/{buyer.id}/ban?is_banned=false", headers=admin_headers).status_code == 200
+    assert client.get("/api/v1/auth/me", headers=buyer_headers).status_code == 200
+
+    user = db_session.get(User, buyer.id)
+    user.is_banned = True
+    db_session.commit()
+    assert client.get("/api/v1/auth/me", headers=buyer_headers).status_code == 403
+
+
+def test_login_rehashes_password_when_bcrypt_cost_changes(client, db_session):
+    user = User(email="old@example.com", password_hash=hash_password("StrongPass123", rounds=4))
+    db_session.add(user)
+    db_session.commit()
+    assert password_needs_rehash(user.password_hash)
+
+    login = client.post("/api/v1/auth/login", json={"email": "old@example.com", "password": "StrongPass123"})
+    assert login.status_code == 200
+    db_session.refresh(user)
+    assert not password_needs_rehash(user.password_hash)
+    assert verify_password("StrongPass123", user.password_hash)
+
+    metrics = client.get("/metrics")
+    assert "password_hash_queue_wait_seconds_count" in metrics.text
+    assert 'password_hash_duration_seconds_count{operation="verify"}' in metrics.text
+
+
+def test_password_hasher_refuses_work_when_queue_stays_full():
+    hasher = PasswordHasher(workers=0, max_pending=1, queue_timeout=0.01)
+    assert hasher._slots.acquire(timeout=1)
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            hasher.verify("StrongPass123", hash_password("StrongPass123", rounds=4))
+    finally:
+        hasher._slots.release()
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "1"}
+    assert hasher.verify("StrongPass123", hash_password("StrongPass123", rounds=4))
+
+
+def test_principal_loaded_before_an_invalidation_is_not_cached(db_session, create_user_factory, monkeypatch):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    scalar = db_session.scalar
+
+    def scalar_then_ban(statement):
+        # The row is read, then another request bans the user and invalidates before this load stores it.
+        user = scalar(statement)
+        invalidate_principal(buyer.id)
+        return user
+
+    monkeypatch.setattr(db_session, "scalar", scalar_then_ban)
+    assert load_principal(db_session, buyer.id).id == buyer.id
+    assert principal_store.get(buyer.id) is None
+
+    monkeypatch.undo()
+    load_principal(db_session, buyer.id)
+    assert principal_store.get(buyer.id) is not None
+
+
+def test_cold_principal_load_hands_its_connection_back(db_session, create_user_factory):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    principal_store.clear()
+    with Session(db_session.get_bind()) as db:
+        assert asyncio.run(get_current_user({"sub": str(buyer.id)}, ThreadedDbRunner(db))).id == buyer.id
+        assert not db.in_transaction()
+
+
+def test_principal_generations_stay_bounded_and_never_go_back():
+    generations = _Generations(max_entries=2)
+    before = {user_id: generations.get(user_id) for user_id in (1, 2, 3)}
+    generations.bump(1)
+    generations.bump(2)
+    generations.bump(3)
+    assert len(generations) == 2
+    # User 1 was evicted, but still reads as invalidated since ``before``.
+    assert all(generations.get(user_id) != before[user_id] for user_id in (1, 2, 3))
+    evicted = generations.get(1)
+    generations.bump(1)
+    assert generations.get(1) > evicted
+
+
+def test_stream_ticket_opens_streams_only_and_ends_with_the_access_token(client, db_session, create_user_factory, auth_headers):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    headers = auth_headers(buyer.email, "StrongPass123")
+    access_token = headers["Authorization"].removeprefix("Bearer ")
+    ticket = client.post("/api/v1/auth/stream-ticket", headers=headers).json()["ticket"]
+
+    # Neither kind of token stands in for the other.
+    assert client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {ticket}"}).status_code == 401
+    assert client.get(f"/api/v1/notifications/stream?ticket={access_token}").status_code == 401
+    assert client.get(f"/api/v1/messages/stream?access_token={access_token}").status_code == 401
+    assert client.post("/api/v1/auth/stream-ticket").status_code == 401
+
+    runner = ThreadedDbRunner(db_session)
+    stream_user = asyncio.run(get_stream_user(None, ticket, runner))
+    assert stream_user.principal.id == buyer.id
+    assert stream_user.expires_at == decode_token(access_token)["exp"]
+    assert stream_user.is_valid()
+
+    invalidate_principal(buyer.id)
+    assert not stream_user.is_valid()
+    assert asyncio.run(get_stream_user(None, ticket, runner)).is_valid()
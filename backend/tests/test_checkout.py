@@ -1,14 +1,28 @@
+import asyncio
+import gc
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
 from decimal import Decimal
 
-from sqlalchemy import select
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
 
+from app.core import idempotency
+from app.core.idempotency import Idempotency, LocalIdempotencyStore, set_idempotency_store
+from app.db.base import Base
 from app.models.cart import Cart, CartItem
 from app.models.notification import Notification
+from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product import Product, ProductStatus
+from app.models.product_image import ProductImage
 from app.models.role import RoleName
+from app.models.user import User
+from app.services.checkout_service import checkout_cart
 
 
-def test_checkout_splits_orders_by_seller(client, db_session, create_user_factory):
+def test_checkout_splits_orders_by_seller(client, db_session, create_user_factory, drain_outbox, auth_headers):
     buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
     seller1 = create_user_factory("seller1@example.com", "StrongPass123", [RoleName.BUYER, RoleName.SELLER])
     seller2 = create_user_factory("seller2@example.com", "StrongPass123", [RoleName.BUYER, RoleName.SELLER])
@@ -33,10 +47,9 @@ def test_checkout_splits_orders_by_seller(client, db_session, create_user_factor
     )
     db_session.add_all([p1, p2])
     db_session.commit()
+    drain_outbox()
 
-    login = client.post("/api/v1/auth/login", json={"email": buyer.email, "password": "StrongPass123"})
-    token = login.json()["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = auth_headers(buyer.email, "StrongPass123")
 
     add_first = client.post("/api/v1/cart/items", json={"product_id": p1.id, "qty": 1}, headers=headers)
     assert add_first.status_code == 201
@@ -57,5 +70,356 @@ def test_checkout_splits_orders_by_seller(client, db_session, create_user_factor
     remaining_items = db_session.scalars(select(CartItem).where(CartItem.cart_id == cart.id)).all()
     assert remaining_items == []
 
+    assert db_session.scalars(select(Notification)).all() == []
+    # One notification and one seller analytics event per order, one for the marketplace rollups and one per product
+    # for its popularity.
+    assert drain_outbox() == 7
     notifications = db_session.scalars(select(Notification)).all()
     assert len(notifications) == 2
+
+
+def _seed_orders(db_session, buyer_id: int, seller_id: int, count: int) -> None:
+    base = datetime(2026, 1, 1, tzinfo=UTC)
+    for idx in range(count):
+        order = Order(
+            buyer_id=buyer_id,
+            seller_id=seller_id,
+            status=OrderStatus.COMPLETED if idx % 2 else OrderStatus.REQUESTED,
+            full_name="Buyer Test",
+            phone="+7000000000",
+            address="Moscow",
+            total_amount=Decimal("30.00"),
+            created_at=base + timedelta(minutes=idx),
+        )
+        order.items = [
+            OrderItem(product_title_snapshot=f"Item {idx}-{n}", product_price_snapshot=Decimal("10.00"), qty=1, subtotal=Decimal("10.00"))
+            for n in range(3)
+        ]
+        db_session.add(order)
+    db_session.commit()
+
+
+def test_order_lists_load_items_in_constant_queries_and_paginate(client, db_session, create_user_factory, count_queries, auth_headers):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.BUYER, RoleName.SELLER])
+    headers = auth_headers(buyer.email, "StrongPass123")
+
+    _seed_orders(db_session, buyer.id, seller.id, 2)
+    assert client.get("/api/v1/orders/my", headers=headers).status_code == 200
+    with count_queries() as few:
+        assert len(client.get("/api/v1/orders/my", headers=headers).json()) == 2
+    _seed_orders(db_session, buyer.id, seller.id, 40)
+    with count_queries() as many:
+        response = client.get("/api/v1/orders/my", headers=headers)
+    assert len(response.json()) == 42
+    assert all(len(order["items"]) == 3 for order in response.json())
+    assert len(many) == len(few)
+
+    seen: list[int] = []
+    cursor = None
+    while True:
+        params = {"limit": 10, "status": "COMPLETED"}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/v1/orders/my", params=params, headers=headers)
+        assert page.status_code == 200
+        assert all(order["status"] == "COMPLETED" for order in page.json())
+        seen.extend(order["id"] for order in page.json())
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 21
+
+    bad_cursor = client.get("/api/v1/orders/my", params={"cursor": "bogus"}, headers=headers)
+    assert bad_cursor.status_code == 400
+
+
+def test_cart_is_served_in_constant_queries_with_sql_total(client, db_session, create_user_factory, count_queries, auth_headers):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.BUYER, RoleName.SELLER])
+    products = [
+        Product(
+            seller_id=seller.id,
+            title=f"Mittens {idx}",
+            description="Warm knitted mittens",
+            price=Decimal("12.50"),
+            status=ProductStatus.ACTIVE,
+            tags=["mittens"],
+            materials=["wool"],
+            images=[
+                ProductImage(image_url=f"/uploads/{idx}-b.jpg", sort_order=1),
+                ProductImage(image_url=f"/uploads/{idx}-a.jpg", sort_order=0),
+            ],
+        )
+        for idx in range(30)
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    headers = auth_headers(buyer.email, "StrongPass123")
+
+    empty = client.get("/api/v1/cart", headers=headers)
+    assert empty.status_code == 200
+    assert empty.json()["items"] == []
+    assert Decimal(empty.json()["total_amount"]) == Decimal("0")
+
+    for product in products:
+        assert client.post("/api/v1/cart/items", json={"product_id": product.id, "qty": 2}, headers=headers).status_code == 201
+
+    with count_queries() as statements:
+        cart = client.get("/api/v1/cart", headers=headers).json()
+    assert len(statements) == 1
+    assert len(cart["items"]) == 30
+    assert Decimal(cart["total_amount"]) == Decimal("750.00")
+    assert cart["items"][0]["image_url"] == "/uploads/0-a.jpg"
+
+    first_item = cart["items"][0]["id"]
+    updated = client.put(f"/api/v1/cart/items/{first_item}", json={"qty": 4}, headers=headers).json()
+    assert Decimal(updated["total_amount"]) == Decimal("775.00")
+    removed = client.delete(f"/api/v1/cart/items/{first_item}", headers=headers).json()
+    assert len(removed["items"]) == 29
+    assert Decimal(removed["total_amount"]) == Decimal("725.00")
+    assert client.delete(f"/api/v1/cart/items/{first_item}", headers=headers).status_code == 404
+
+
+def _checkout_payload() -> dict:
+    return {"full_name": "Buyer Test", "phone": "+7000000000", "address": "Moscow"}
+
+
+def test_checkout_reserves_stock_and_restores_it_on_cancel_or_reject(client, db_session, create_user_factory, auth_headers):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.BUYER, RoleName.SELLER])
+    sweater = Product(
+        seller_id=seller.id,
+        title="Sweater",
+        description="Hand-knit sweater",
+        price=Decimal("90.00"),
+        status=ProductStatus.ACTIVE,
+        tags=["sweater"],
+        materials=["wool"],
+        stock=3,
+    )
+    db_session.add(sweater)
+    db_session.commit()
+    buyer_headers, seller_headers = (auth_headers(email, "StrongPass123") for email in (buyer.email, seller.email))
+
+    def stock() -> int | None:
+        db_session.expire_all()
+        return db_session.get(Product, sweater.id).stock
+
+    assert client.post("/api/v1/cart/items", json={"product_id": sweater.id, "qty": 4}, headers=buyer_headers).status_code == 201
+    too_many = client.post("/api/v1/orders/checkout", json=_checkout_payload(), headers=buyer_headers)
+    assert too_many.status_code == 409
+    assert stock() == 3
+    assert db_session.scalars(select(Order)).all() == []
+
+    item_id = client.get("/api/v1/cart", headers=buyer_headers).json()["items"][0]["id"]
+    client.put(f"/api/v1/cart/items/{item_id}", json={"qty": 2}, headers=buyer_headers)
+    first = client.post("/api/v1/orders/checkout", json=_checkout_payload(), headers=buyer_headers).json()["orders"][0]
+    assert stock() == 1
+    canceled = client.patch(f"/api/v1/orders/{first['id']}/status", json={"status": "CANCELED"}, headers=buyer_headers)
+    assert canceled.status_code == 200
+    assert stock() == 3
+    again = client.patch(f"/api/v1/orders/{first['id']}/status", json={"status": "CANCELED"}, headers=buyer_headers)
+    assert again.status_code == 400
+    assert stock() == 3
+
+    client.post("/api/v1/cart/items", json={"product_id": sweater.id, "qty": 3}, headers=buyer_headers)
+    second = client.post("/api/v1/orders/checkout", json=_checkout_payload(), headers=buyer_headers).json()["orders"][0]
+    assert stock() == 0
+    rejected = client.patch(
+        f"/api/v1/orders/{second['id']}/status", params={"as_seller": True}, json={"status": "REJECTED"}, headers=seller_headers
+    )
+    assert rejected.status_code == 200
+    assert stock() == 3
+
+
+def test_retried_checkout_with_idempotency_key_replays_the_original_orders(
+    client, db_session, create_user_factory, count_queries, auth_headers
+):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.BUYER, RoleName.SELLER])
+    scarf = Product(
+        seller_id=seller.id,
+        title="Scarf",
+        description="Warm knitted scarf",
+        price=Decimal("20.00"),
+        status=ProductStatus.ACTIVE,
+        tags=["scarf"],
+        materials=["wool"],
+    )
+    db_session.add(scarf)
+    db_session.commit()
+    headers = auth_headers(buyer.email, "StrongPass123")
+    add_headers = {**headers, "Idempotency-Key": "add-1"}
+    for _ in range(2):
+        assert client.post("/api/v1/cart/items", json={"product_id": scarf.id, "qty": 2}, headers=add_headers).status_code == 201
+    assert client.get("/api/v1/cart", headers=headers).json()["items"][0]["qty"] == 2
+
+    retry_headers = {**headers, "Idempotency-Key": "checkout-7f3a"}
+    first = client.post("/api/v1/orders/checkout", json=_checkout_payload(), headers=retry_headers)
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+    with count_queries() as statements:
+        retry = client.post("/api/v1/orders/checkout", json=_checkout_payload(), headers=retry_headers)
+    assert statements == []
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert len(db_session.scalars(select(Order)).all()) == 1
+
+    changed = client.post("/api/v1/orders/checkout", json={**_checkout_payload(), "address": "Kazan"}, headers=retry_headers)
+    assert changed.status_code == 422
+    other_buyer = create_user_factory("other@example.com", "StrongPass123", [RoleName.BUYER])
+    other_headers = {**auth_headers(other_buyer.email, "StrongPass123"), "Idempotency-Key": "checkout-7f3a"}
+    assert client.post("/api/v1/orders/checkout", json=_checkout_payload(), headers=other_headers).status_code == 400
+    assert client.post("/api/v1/orders/checkout", json=_checkout_payload(), headers={**headers, "Idempotency-Key": ""}).status_code == 400
+
+
+def test_idempotency_locks_are_per_key_and_dropped_once_released():
+    store = LocalIdempotencyStore(max_entries=10, ttl_seconds=60)
+
+    async def scenario() -> None:
+        first = store.lock((1, "checkout", "a"))
+        assert store.lock((1, "checkout", "a")) is first
+        assert store.lock((1, "checkout", "b")) is not first
+        async with first:
+            # A different key is never held up by one in flight.
+            store.lock((2, "checkout", "a")).acquire_nowait()
+
+    asyncio.run(scenario())
+    gc.collect()
+    assert len(store._locks) == 0
+
+
+def test_concurrent_requests_with_one_idempotency_key_run_the_mutation_once():
+    runs = []
+
+    async def place_orders() -> list[int]:
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return [len(runs)]
+
+    async def scenario() -> list[list[int]]:
+        attempts = [Idempotency("checkout", 1, "retry-1", Response()) for _ in range(3)]
+        return await asyncio.gather(*(attempt.run(place_orders, "same body") for attempt in attempts))
+
+    assert asyncio.run(scenario()) == [[1], [1], [1]]
+    assert len(runs) == 1
+
+
+def test_idempotency_results_go_to_the_installed_store():
+    store = LocalIdempotencyStore(max_entries=10, ttl_seconds=60)
+
+    async def place_orders() -> list[int]:
+        return [7]
+
+    previous = idempotency.idempotency_store
+    set_idempotency_store(store)
+    try:
+        asyncio.run(Idempotency("checkout", 1, "shared-1", Response()).run(place_orders, "body"))
+    finally:
+        set_idempotency_store(previous)
+    assert store.get((1, "checkout", "shared-1")).value == [7]
+    assert previous.get((1, "checkout", "shared-1")) is None
+
+
+def test_checkout_statement_count_does_not_grow_with_sellers_or_items(
+    client, db_session, create_user_factory, count_queries, drain_outbox, auth_headers
+):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    sellers = [create_user_factory(f"seller{idx}@example.com", "StrongPass123", [RoleName.SELLER]) for idx in range(6)]
+    products = [
+        Product(
+            seller_id=sellers[idx % len(sellers)].id,
+            title=f"Mittens {idx}",
+            description="Warm knitted mittens",
+            price=Decimal("12.50"),
+            status=ProductStatus.ACTIVE,
+            tags=["mittens"],
+            materials=["wool"],
+            stock=5,
+        )
+        for idx in range(18)
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    drain_outbox()
+    headers = auth_headers(buyer.email, "StrongPass123")
+
+    def checkout(cart: list[Product]) -> tuple[dict, list[str]]:
+        for product in cart:
+            client.post("/api/v1/cart/items", json={"product_id": product.id, "qty": 2}, headers=headers)
+        with count_queries() as statements:
+            response = client.post("/api/v1/orders/checkout", json=_checkout_payload(), headers=headers)
+        assert response.status_code == 201
+        return response.json(), statements
+
+    small, few = checkout(products[:2])
+    large, many = checkout(products[2:])
+    assert small["total_orders"] == 2
+    assert large["total_orders"] == 6
+    assert len(many) == len(few)
+    assert sum(len(order["items"]) for order in large["orders"]) == 16
+    assert all(Decimal(order["total_amount"]) == Decimal("25.00") * len(order["items"]) for order in large["orders"])
+    db_session.expire_all()
+    assert {product.stock for product in db_session.scalars(select(Product)).all()} == {3}
+    assert drain_outbox() == 36
+    notifications = db_session.scalars(select(Notification).order_by(Notification.id)).all()
+    assert [row.payload_json["order_id"] for row in notifications] == sorted(order["id"] for order in small["orders"] + large["orders"])
+    assert {seller.id: db_session.get(User, seller.id).unread_notifications for seller in sellers} == {
+        seller.id: 2 if idx < 2 else 1 for idx, seller in enumerate(sellers)
+    }
+
+
+def test_parallel_checkouts_of_the_last_unit_sell_it_exactly_once(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'stock.db'}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(engine)
+    buyers = 100
+    with Session(engine) as db:
+        seller = User(email="seller@example.com", password_hash="-")
+        db.add(seller)
+        db.flush()
+        sweater = Product(
+            seller_id=seller.id,
+            title="Last sweater",
+            description="The only one left",
+            price=Decimal("90.00"),
+            status=ProductStatus.ACTIVE,
+            tags=["sweater"],
+            materials=["wool"],
+            stock=1,
+        )
+        db.add(sweater)
+        db.flush()
+        buyer_ids = []
+        for idx in range(buyers):
+            buyer = User(email=f"buyer{idx}@example.com", password_hash="-")
+            db.add(buyer)
+            db.flush()
+            db.add(Cart(user_id=buyer.id, items=[CartItem(product_id=sweater.id, qty=1)]))
+            buyer_ids.append(buyer.id)
+        db.commit()
+        sweater_id = sweater.id
+
+    def attempt(buyer_id: int) -> tuple[int, float]:
+        started = time.perf_counter()
+        with Session(engine) as db:
+            try:
+                checkout_cart(db, buyer_id, _checkout_payload())
+                outcome = 201
+            except HTTPException as exc:
+                outcome = exc.status_code
+        return outcome, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=buyers) as pool:
+        results = list(pool.map(attempt, buyer_ids))
+
+    outcomes = [outcome for outcome, _elapsed in results]
+    assert outcomes.count(201) == 1
+    assert outcomes.count(409) == buyers - 1
+    latencies = sorted(elapsed for _outcome, elapsed in results)
+    assert latencies[int(len(latencies) * 0.99) - 1] < 5.0
+    with Session(engine) as db:
+        assert db.get(Product, sweater_id).stock == 0
+        assert len(db.scalars(select(OrderItem).where(OrderItem.product_id == sweater_id)).all()) == 1
+    engine.dispose()
@@ -0,0 +1,53 @@
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError
+
+from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool, engine_options, instrument_engine
+
+
+def _metric(client, line_prefix: str) -> float:
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_pool_reports_checkouts_waits_and_timeouts(client, tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "db_pool_size", 1)
+    monkeypatch.setattr(settings, "db_max_overflow", 1)
+    monkeypatch.setattr(settings, "db_pool_timeout_seconds", 0.05)
+    monkeypatch.setattr(settings, "db_pool_wait_warning_seconds", 0.04)
+    monkeypatch.setattr(settings, "db_pool_pre_ping", "idle")
+    monkeypatch.setattr(settings, "db_pool_ping_idle_seconds", 0)
+    url = f"sqlite+pysqlite:///{tmp_path / 'pool.db'}"
+    options = engine_options(url)
+    assert (options["poolclass"], options["pool_pre_ping"]) == (InstrumentedQueuePool, False)
+    assert engine_options("sqlite+pysqlite:///:memory:") == {}
+    engine = create_engine(url, **options)
+    instrument_engine(engine)
+
+    waits_before = _metric(client, 'db_pool_checkout_wait_seconds_count{engine="sync"}')
+    timeouts_before = _metric(client, 'db_pool_timeouts_total{engine="sync"}')
+    pings_before = _metric(client, 'db_pool_pings_total{engine="sync",result="ok"}')
+    first, second = engine.connect(), engine.connect()
+    assert _metric(client, 'db_pool_checked_out{engine="sync"}') == 2
+    assert _metric(client, 'db_pool_overflow{engine="sync"}') == 1
+    with caplog.at_level(logging.WARNING, logger="app.db.pool"), pytest.raises(TimeoutError):
+        engine.connect()
+    assert "Waited" in caplog.text
+    assert _metric(client, 'db_pool_timeouts_total{engine="sync"}') == timeouts_before + 1
+
+    first.close()
+    # Back from the pool after sitting idle (threshold 0 here): pinged once before it is handed out.
+    with engine.connect() as again:
+        assert again.execute(text("SELECT 2")).scalar() == 2
+    second.close()
+    assert _metric(client, 'db_pool_pings_total{engine="sync",result="ok"}') == pings_before + 1
+    assert _metric(client, 'db_pool_checkout_wait_seconds_count{engine="sync"}') == waits_before + 4
+    assert _metric(client, 'db_pool_checked_out{engine="sync"}') == 0
+    # The overflow connection is closed once both are back in a pool of one.
+    assert _metric(client, 'db_pool_overflow{engine="sync"}') == 0
+    engine.dispose()
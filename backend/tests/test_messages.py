@@ -1,2 +1,169 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from app.core.broker import BrokerEvent, LocalBroker, get_broker, publish_after_commit
+from app.core.sse import event_stream
+from app.models.conversation import Conversation
+from app.models.role import RoleName
+from app.models.seller_profile import SellerProfile
+from app.services.message_service import create_message, list_messages_since, message_channel
+
+
 def test_placeholder_messages_scope():
     assert True
+
+
+def test_inbox_pages_conversations_with_preview_and_unread_in_fixed_queries(
+    client, db_session, create_user_factory, count_queries, auth_headers
+):
+    me = create_user_factory("me@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
+    others = [create_user_factory(f"other{idx}@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER]) for idx in range(5)]
+    db_session.add(SellerProfile(user_id=others[0].id, display_name="Wool Shop"))
+    started = datetime(2026, 1, 1, tzinfo=UTC)
+    conversations = []
+    for idx, other in enumerate(others):
+        # Alternate sides so the inbox has to merge conversations where the caller is buyer and where they are seller.
+        buyer_id, seller_id = (me.id, other.id) if idx % 2 == 0 else (other.id, me.id)
+        conversation = Conversation(buyer_id=buyer_id, seller_id=seller_id, product_id=None, updated_at=started + timedelta(minutes=idx))
+        conversations.append(conversation)
+    db_session.add_all(conversations)
+    db_session.commit()
+    for conversation, other in zip(conversations[:2], others[:2], strict=True):
+        create_message(db_session, conversation, other.id, "first")
+        create_message(db_session, conversation, other.id, "x" * 300)
+        conversation.updated_at = started + timedelta(hours=1, minutes=conversation.id)
+    db_session.commit()
+
+    headers = auth_headers(me.email, "StrongPass123")
+    client.get("/api/v1/messages/inbox", headers=headers)
+    with count_queries() as statements:
+        first = client.get("/api/v1/messages/inbox", params={"limit": 3}, headers=headers)
+    assert first.status_code == 200
+    assert len(statements) <= 4
+
+    page = first.json()
+    assert [row["id"] for row in page] == [conversations[1].id, conversations[0].id, conversations[4].id]
+    assert page[0]["counterpart_id"] == others[1].id
+    assert page[0]["counterpart_name"] == "other1"
+    assert page[1]["counterpart_name"] == "Wool Shop"
+    assert page[0]["unread_count"] == 2
+    assert len(page[0]["last_message"]["snippet"]) == 140
+    assert page[2]["last_message"] is None
+    assert page[2]["unread_count"] == 0
+
+    second = client.get("/api/v1/messages/inbox", params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]}, headers=headers)
+    assert [row["id"] for row in second.json()] == [conversations[3].id, conversations[2].id]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_message_history_pages_by_message_id_and_marks_read_in_one_update(
+    client, db_session, create_user_factory, count_queries, auth_headers
+):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
+    conversation = Conversation(buyer_id=buyer.id, seller_id=seller.id, product_id=None)
+    db_session.add(conversation)
+    db_session.commit()
+    ids = [create_message(db_session, conversation, seller.id, f"message {idx}").id for idx in range(7)]
+    headers = auth_headers(buyer.email, "StrongPass123")
+    url = f"/api/v1/messages/conversations/{conversation.id}"
+
+    latest = client.get(url, params={"limit": 3}, headers=headers).json()
+    assert [row["id"] for row in latest] == ids[4:]
+    older = client.get(url, params={"limit": 3, "before_id": latest[0]["id"]}, headers=headers).json()
+    assert [row["id"] for row in older] == ids[1:4]
+    newer = client.get(url, params={"limit": 3, "after_id": ids[2]}, headers=headers).json()
+    assert [row["id"] for row in newer] == ids[3:6]
+    assert client.get(url, params={"before_id": ids[3], "after_id": ids[1]}, headers=headers).status_code == 400
+    assert client.get(url, params={"limit": 500}, headers=headers).status_code == 422
+
+    # An anchor from another conversation (or none at all) is rejected instead of paging from an unrelated position.
+    other = Conversation(buyer_id=seller.id, seller_id=buyer.id, product_id=None)
+    db_session.add(other)
+    db_session.commit()
+    foreign_id = create_message(db_session, other, buyer.id, "elsewhere").id
+    assert client.get(url, params={"before_id": foreign_id}, headers=headers).status_code == 400
+    assert client.get(url, params={"after_id": 999999}, headers=headers).status_code == 400
+
+    with count_queries() as statements:
+        marked = client.post(f"{url}/read", headers=headers)
+    assert marked.json()["message"] == "Marked 7 messages as read"
+    assert sum(statement.lstrip().upper().startswith("UPDATE MESSAGES") for statement in statements) == 1
+    assert not any(statement.lstrip().upper().startswith("SELECT MESSAGES") for statement in statements)
+    assert client.post(f"{url}/read", headers=headers).json()["message"] == "Marked 0 messages as read"
+
+
+def test_new_messages_are_pushed_to_both_participants_only_after_commit(client, db_session, create_user_factory):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
+    conversation = Conversation(buyer_id=buyer.id, seller_id=seller.id, product_id=None)
+    db_session.add(conversation)
+    db_session.commit()
+    broker = get_broker()
+
+    async def scenario():
+        buyer_stream = broker.subscribe(message_channel(buyer.id))
+        seller_stream = broker.subscribe(message_channel(seller.id))
+        try:
+            db_session.rollback()
+            publish_after_commit(db_session, message_channel(seller.id), BrokerEvent("message", {"body": "lost"}))
+            db_session.rollback()
+
+            message = await asyncio.to_thread(create_message, db_session, conversation, buyer.id, "Hello")
+            received = await asyncio.wait_for(seller_stream.get(), 1)
+            echoed = await asyncio.wait_for(buyer_stream.get(), 1)
+        finally:
+            buyer_stream.close()
+            seller_stream.close()
+        return message.id, received, echoed
+
+    message_id, received, echoed = asyncio.run(scenario())
+    assert received == echoed
+    assert received.id == message_id
+    assert received.data["body"] == "Hello"
+    assert broker.subscriber_count(message_channel(seller.id)) == 0
+
+    assert [row.id for row in list_messages_since(db_session, seller.id, 0)] == [message_id]
+    assert list_messages_since(db_session, seller.id, message_id) == []
+    assert client.get("/api/v1/messages/stream").status_code == 401
+
+
+def test_event_stream_sends_backlog_live_events_and_heartbeats():
+    broker = LocalBroker(queue_size=2)
+
+    async def scenario():
+        subscription = broker.subscribe("messages:1")
+        stream = event_stream("messages", subscription, [BrokerEvent("message", {"id": 1}, id=1)], heartbeat_seconds=0.05)
+        frames = [await anext(stream), await anext(stream)]
+        for idx in range(2, 5):
+            broker.publish("messages:1", BrokerEvent("message", {"id": idx}, id=idx))
+        await asyncio.sleep(0)
+        frames += [await anext(stream), await anext(stream), await anext(stream)]
+        await stream.aclose()
+        return frames, subscription.dropped
+
+    frames, dropped = asyncio.run(scenario())
+    assert frames[0] == "retry: 3000\n\n"
+    assert frames[1] == 'event: message\nid: 1\ndata: {"id":1}\n\n'
+    # The queue holds two events, so the oldest live event is dropped for this slow consumer.
+    assert dropped == 1
+    assert frames[2:4] == ['event: message\nid: 3\ndata: {"id":3}\n\n', 'event: message\nid: 4\ndata: {"id":4}\n\n']
+    assert frames[4] == ": keep-alive\n\n"
+    assert broker.subscriber_count("messages:1") == 0
+
+
+def test_event_stream_ends_once_it_is_no_longer_open():
+    broker = LocalBroker()
+    state = {"open": True}
+
+    async def scenario():
+        subscription = broker.subscribe("messages:1")
+        stream = event_stream("messages", subscription, heartbeat_seconds=0.01, is_open=lambda: state["open"])
+        frames = [await anext(stream), await anext(stream)]
+        state["open"] = False
+        broker.publish("messages:1", BrokerEvent("message", {"id": 1}, id=1))
+        frames += [frame async for frame in stream]
+        return frames
+
+    assert asyncio.run(scenario()) == ["retry: 3000\n\n", ": keep-alive\n\n"]
+    assert broker.subscriber_count("messages:1") == 0
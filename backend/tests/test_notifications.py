@@ -0,0 +1,108 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from app.core.broker import get_broker
+from app.models.conversation import Conversation
+from app.models.notification import NotificationType
+from app.models.role import RoleName
+from app.services.notification_service import create_notification, notification_channel
+
+
+def test_unread_counter_follows_new_and_read_notifications_without_scanning(
+    client, db_session, create_user_factory, count_queries, drain_outbox, auth_headers
+):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
+    conversation = Conversation(buyer_id=buyer.id, seller_id=seller.id, product_id=None)
+    db_session.add(conversation)
+    db_session.commit()
+    buyer_headers = auth_headers(buyer.email, "StrongPass123")
+    seller_headers = auth_headers(seller.email, "StrongPass123")
+
+    for body in ("Hello", "Are you there?"):
+        sent = client.post(f"/api/v1/messages/conversations/{conversation.id}", json={"body": body}, headers=buyer_headers)
+        assert sent.status_code == 200
+
+    drain_outbox()
+    assert client.get("/api/v1/notifications/unread-count", headers=seller_headers).json() == {"unread": 2}
+    with count_queries() as statements:
+        assert client.get("/api/v1/notifications/unread-count", headers=seller_headers).json() == {"unread": 2}
+    assert len(statements) == 1
+    assert "FROM notifications" not in statements[0]
+    assert client.get("/api/v1/notifications/unread-count", headers=buyer_headers).json() == {"unread": 0}
+
+    first_id = client.get("/api/v1/notifications", headers=seller_headers).json()[0]["id"]
+    for _ in range(2):
+        read = client.post(f"/api/v1/notifications/{first_id}/read", headers=seller_headers)
+        assert read.status_code == 200
+        assert read.json()["is_read"] is True
+    assert client.get("/api/v1/notifications/unread-count", headers=seller_headers).json() == {"unread": 1}
+    assert client.post("/api/v1/notifications/999/read", headers=seller_headers).status_code == 404
+
+
+def test_notifications_are_pushed_after_commit_only(client, db_session, create_user_factory):
+    user = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER])
+
+    async def scenario():
+        subscription = get_broker().subscribe(notification_channel(user.id))
+        try:
+            create_notification(db_session, user.id, NotificationType.NEW_ORDER, {"order_id": 1})
+            await asyncio.to_thread(db_session.flush)
+            await asyncio.to_thread(db_session.rollback)
+            create_notification(db_session, user.id, NotificationType.NEW_ORDER, {"order_id": 2})
+            await asyncio.to_thread(db_session.commit)
+            return await asyncio.wait_for(subscription.get(), 1), subscription.queue.qsize()
+        finally:
+            subscription.close()
+
+    pushed, still_queued = asyncio.run(scenario())
+    assert pushed.event == "notification"
+    assert pushed.data["payload_json"] == {"order_id": 2}
+    assert pushed.data["type"] == "NEW_ORDER"
+    assert still_queued == 0
+    assert client.get("/api/v1/notifications/stream").status_code == 401
+
+    db_session.refresh(user)
+    assert user.unread_notifications == 1
+
+
+def test_notifications_page_by_cursor_filter_and_bulk_mark_read(client, db_session, create_user_factory, auth_headers):
+    user = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER])
+    base = datetime(2026, 1, 1, tzinfo=UTC)
+    for idx in range(30):
+        notification_type = NotificationType.NEW_ORDER if idx % 3 else NotificationType.NEW_REVIEW
+        notification = create_notification(db_session, user.id, notification_type, {"idx": idx})
+        notification.created_at = base + timedelta(minutes=idx)
+    db_session.commit()
+    headers = auth_headers(user.email, "StrongPass123")
+
+    seen: list[int] = []
+    cursor = None
+    while True:
+        params = {"limit": 7, "type": "NEW_ORDER"}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/v1/notifications", params=params, headers=headers)
+        assert page.status_code == 200
+        assert all(item["type"] == "NEW_ORDER" for item in page.json())
+        seen.extend(item["payload_json"]["idx"] for item in page.json())
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted((idx for idx in range(30) if idx % 3), reverse=True)
+
+    newest = client.get("/api/v1/notifications", params={"limit": 5}, headers=headers)
+    marked = client.post("/api/v1/notifications/read", json={"ids": [item["id"] for item in newest.json()[:3]]}, headers=headers)
+    assert marked.json() == {"updated": 3, "unread": 27}
+    again = client.post("/api/v1/notifications/read", json={"ids": [newest.json()[0]["id"]]}, headers=headers)
+    assert again.json() == {"updated": 0, "unread": 27}
+
+    older = client.post("/api/v1/notifications/read", json={"before": newest.headers["X-Next-Cursor"]}, headers=headers)
+    assert older.json() == {"updated": 25, "unread": 2}
+    unread = client.get("/api/v1/notifications", params={"is_read": "false"}, headers=headers).json()
+    assert [item["payload_json"]["idx"] for item in unread] == [26, 25]
+
+    cleared = client.post("/api/v1/notifications/read", json={}, headers=headers)
+    assert cleared.json() == {"updated": 2, "unread": 0}
+    assert client.get("/api/v1/notifications/unread-count", headers=headers).json() == {"unread": 0}
+    assert client.post("/api/v1/notifications/read", json={"ids": [1], "before": "x"}, headers=headers).status_code == 400
@@ -0,0 +1,93 @@
+import sys
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app import worker
+from app.core.config import settings
+from app.models.conversation import Conversation
+from app.models.notification import Notification, NotificationType
+from app.models.outbox_event import OutboxEvent, OutboxStatus
+from app.models.role import RoleName
+from app.services import outbox_service
+from app.services.notification_service import create_notification
+from app.services.outbox_service import dead_letter_count, enqueue, process_batch
+
+
+def test_request_path_pays_one_outbox_insert_and_worker_creates_the_notification(
+    client, db_session, create_user_factory, count_queries, drain_outbox, auth_headers
+):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
+    conversation = Conversation(buyer_id=buyer.id, seller_id=seller.id, product_id=None)
+    db_session.add(conversation)
+    db_session.commit()
+    drain_outbox()
+    headers = auth_headers(buyer.email, "StrongPass123")
+
+    with count_queries() as statements:
+        sent = client.post(f"/api/v1/messages/conversations/{conversation.id}", json={"body": "Hello"}, headers=headers)
+    assert sent.status_code == 200
+    writes = [statement.split("(")[0].strip() for statement in statements if statement.lstrip().startswith(("INSERT", "UPDATE"))]
+    assert writes.count("INSERT INTO outbox_events") == 1
+    assert not any("notifications" in statement or statement.startswith("UPDATE users") for statement in writes)
+
+    assert drain_outbox() == 1
+    notification = db_session.scalar(select(Notification).where(Notification.user_id == seller.id))
+    assert notification.type == NotificationType.NEW_MESSAGE
+    assert notification.payload_json == {"conversation_id": conversation.id, "sender_id": buyer.id}
+    assert db_session.scalars(select(OutboxEvent)).all() == []
+    assert drain_outbox() == 0
+
+
+def test_failing_events_back_off_dead_letter_and_do_not_block_the_batch(db_session, create_user_factory, monkeypatch, drain_outbox):
+    user = create_user_factory("user@example.com", "StrongPass123", [RoleName.BUYER])
+    drain_outbox()
+    handled: list[int] = []
+
+    def flaky(db, payloads):
+        for payload in payloads:
+            # Written before the failure, so the SAVEPOINT has something to roll back.
+            create_notification(db, user.id, NotificationType.NEW_ORDER, {"order_id": payload["n"]})
+            db.flush()
+            if payload["n"] == 2:
+                raise RuntimeError("downstream unavailable")
+        handled.extend(payload["n"] for payload in payloads)
+
+    monkeypatch.setitem(outbox_service._handlers, "test.flaky", flaky)
+    monkeypatch.setattr(settings, "outbox_max_attempts", 3)
+    enqueue(db_session, "test.flaky", [{"n": 1}, {"n": 2}, {"n": 3}])
+    enqueue(db_session, "test.unknown", [{"n": 4}])
+    db_session.commit()
+
+    started = datetime.now(UTC)
+    assert process_batch(db_session) == 4
+    assert sorted(handled) == [1, 3]
+    db_session.expire_all()
+    assert sorted(row.payload_json["order_id"] for row in db_session.scalars(select(Notification)).all()) == [1, 3]
+    failed = db_session.scalar(select(OutboxEvent).where(OutboxEvent.topic == "test.flaky"))
+    assert failed.attempts == 1
+    assert failed.last_error == "RuntimeError: downstream unavailable"
+    assert failed.available_at.replace(tzinfo=UTC) >= started + timedelta(seconds=settings.outbox_backoff_base_seconds)
+    # Not due yet: backoff keeps it out of the next poll.
+    assert process_batch(db_session) == 0
+
+    for attempt in (2, 3):
+        db_session.execute(update(OutboxEvent).values(available_at=datetime.now(UTC) - timedelta(seconds=1)))
+        db_session.commit()
+        assert process_batch(db_session) == 2
+        db_session.expire_all()
+        assert failed.attempts == attempt
+    assert {row.status for row in db_session.scalars(select(OutboxEvent)).all()} == {OutboxStatus.DEAD}
+    assert dead_letter_count(db_session) == 2
+    assert process_batch(db_session) == 0
+    assert outbox_service.retry_delay(30).total_seconds() == settings.outbox_backoff_max_seconds
+
+
+def test_standalone_worker_refuses_the_process_local_broker(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["app.worker", "--once"])
+    with pytest.raises(SystemExit) as exited:
+        worker.main()
+    assert exited.value.code == 2
+    assert "process-local" in capsys.readouterr().err
@@ -1,9 +1,18 @@
+from datetime import UTC, datetime, timedelta
 from decimal import Decimal
 
-from app.core.config import settings
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings, settings
+from app.models.favorite import Favorite
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.outbox_event import OutboxEvent
 from app.models.product import Product, ProductStatus
 from app.models.role import RoleName
 from app.models.seller_profile import SellerProfile
+from app.services.popularity_service import POPULARITY_TOPIC, current_score, queue_engagement, rebase_popularity, time_weight
+from app.services.search_service import fallback_index
 
 
 def test_catalog_lists_only_active_and_supports_filters(client, db_session):
@@ -36,6 +45,11 @@ def test_catalog_lists_only_active_and_supports_filters(client, db_session):
     data = response.json()
     assert data["meta"]["total"] == 1
     assert data["items"][0]["title"] == "Wooden Bowl"
+    # Encoded by the typed pipeline: same shape as the detail endpoint, prices as exact decimal strings.
+    assert response.headers["content-type"] == "application/json"
+    assert (data["items"][0]["price"], data["items"][0]["images"], data["items"][0]["rating_avg"]) == ("25.00", [], None)
+    listing = client.get("/openapi.json").json()["paths"]["/api/v1/catalog"]["get"]["responses"]["200"]
+    assert listing["content"]["application/json"]["schema"]["$ref"].endswith("PaginatedResponse_ProductOut_")
 
     search = client.get("/api/v1/catalog?q=wooden")
     assert search.status_code == 200
@@ -46,7 +60,7 @@ def test_catalog_lists_only_active_and_supports_filters(client, db_session):
     assert empty.json()["meta"]["total"] == 0
 
 
-def test_seller_can_read_update_and_upload_product_images(client, db_session, create_user_factory):
+def test_seller_can_read_update_and_upload_product_images(client, db_session, create_user_factory, auth_headers):
     seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
     db_session.add(
         SellerProfile(
@@ -68,8 +82,7 @@ def test_seller_can_read_update_and_upload_product_images(client, db_session, cr
     db_session.add(product)
     db_session.commit()
 
-    login = client.post("/api/v1/auth/login", json={"email": seller.email, "password": "StrongPass123"})
-    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    headers = auth_headers(seller.email, "StrongPass123")
 
     detail = client.get(f"/api/v1/seller/products/{product.id}", headers=headers)
     assert detail.status_code == 200
@@ -147,3 +160,258 @@ def test_public_seller_profile_returns_active_products(client, db_session, creat
     assert payload["display_name"] == "Seller Public"
     assert len(payload["products"]) == 1
     assert payload["products"][0]["title"] == "Public Product"
+
+
+def test_catalog_search_stems_russian_terms_and_sorts_by_relevance(client, db_session):
+    db_session.add_all(
+        [
+            Product(
+                seller_id=1,
+                title="Сумка из хлопкового шнура",
+                description="Вместительная сумка, в описании есть свитер для примера",
+                price=Decimal("2500.00"),
+                status=ProductStatus.ACTIVE,
+                tags=["сумка"],
+                materials=["хлопок"],
+            ),
+            Product(
+                seller_id=1,
+                title="Свитер оверсайз",
+                description="Тёплый вязаный свитер из мериносовой шерсти",
+                price=Decimal("6500.00"),
+                status=ProductStatus.ACTIVE,
+                tags=["свитер"],
+                materials=["шерсть"],
+            ),
+            Product(
+                seller_id=1,
+                title="Варежки с узором",
+                description="Тёплые варежки ручной работы",
+                price=Decimal("1500.00"),
+                status=ProductStatus.ACTIVE,
+                tags=["варежки"],
+                materials=["кашемир"],
+            ),
+        ]
+    )
+    db_session.commit()
+
+    ranked = client.get("/api/v1/catalog", params={"q": "свитеры", "sort": "relevance"})
+    assert ranked.status_code == 200
+    assert [item["title"] for item in ranked.json()["items"]] == ["Свитер оверсайз", "Сумка из хлопкового шнура"]
+
+    synonym = client.get("/api/v1/catalog", params={"q": "рукавицы"})
+    assert [item["title"] for item in synonym.json()["items"]] == ["Варежки с узором"]
+
+    both_terms = client.get("/api/v1/catalog", params={"q": "тёплый шерстяной"})
+    assert both_terms.json()["meta"]["total"] == 1
+
+
+def test_catalog_search_index_follows_committed_writes_only(client, db_session):
+    kept = Product(
+        seller_id=1,
+        title="Плед клетчатый",
+        description="Плед из шерсти",
+        price=Decimal("4000.00"),
+        status=ProductStatus.ACTIVE,
+    )
+    db_session.add(kept)
+    db_session.commit()
+    assert client.get("/api/v1/catalog", params={"q": "плед"}).json()["meta"]["total"] == 1
+
+    db_session.add(Product(seller_id=1, title="Плед детский", description="Плед", price=Decimal("3000.00"), status=ProductStatus.ACTIVE))
+    kept.title = "Шарф клетчатый"
+    db_session.flush()
+    db_session.rollback()
+
+    assert set(fallback_index.search(["плед"])) == {kept.id}
+    assert fallback_index.search(["шарф"]) == {}
+    assert client.get("/api/v1/catalog", params={"q": "плед"}).json()["meta"]["total"] == 1
+
+    db_session.delete(kept)
+    db_session.commit()
+    assert fallback_index.search(["плед"]) == {}
+
+
+def test_catalog_search_pages_many_matches_by_relevance(client, db_session, count_queries):
+    db_session.add_all(
+        [
+            Product(
+                seller_id=1,
+                title="Носки" + " носки" * (idx % 4),
+                description="Вязаные",
+                price=Decimal("500.00"),
+                status=ProductStatus.ACTIVE,
+            )
+            for idx in range(40)
+        ]
+    )
+    db_session.commit()
+
+    seen: list[int] = []
+    with count_queries() as statements:
+        for page in (1, 2, 3):
+            response = client.get("/api/v1/catalog", params={"q": "носки", "sort": "relevance", "page": page, "page_size": 15})
+            assert response.status_code == 200
+            assert response.json()["meta"]["total"] == 40
+            seen.extend(item["id"] for item in response.json()["items"])
+    assert len(set(seen)) == 40
+    ranking = [(len(db_session.get(Product, product_id).title), product_id) for product_id in seen]
+    assert ranking == sorted(ranking, reverse=True)
+    # The match table is created with each connection, not by every search.
+    assert not [statement for statement in statements if statement.lstrip().upper().startswith("CREATE")]
+
+
+def test_catalog_cursor_pagination_walks_every_active_product_once(client, db_session):
+    base = datetime(2026, 1, 1, tzinfo=UTC)
+    db_session.add_all(
+        [
+            Product(
+                seller_id=1,
+                title=f"Scarf {idx}",
+                description="Knitted scarf for cursor pagination",
+                price=Decimal(1000 + (idx % 3) * 100),
+                status=ProductStatus.ACTIVE,
+                tags=["scarf"],
+                materials=["wool"],
+                created_at=base + timedelta(minutes=idx // 2),
+            )
+            for idx in range(7)
+        ]
+    )
+    db_session.commit()
+
+    for sort in ("new", "price_asc", "price_desc", "popular"):
+        seen: list[int] = []
+        params = {"sort": sort, "page_size": 3}
+        while True:
+            response = client.get("/api/v1/catalog", params=params)
+            assert response.status_code == 200
+            payload = response.json()
+            seen.extend(item["id"] for item in payload["items"])
+            if not payload["meta"]["next_cursor"]:
+                break
+            params = {"sort": sort, "page_size": 3, "cursor": payload["meta"]["next_cursor"], "with_total": False}
+            assert payload["meta"]["total"] in (7, None)
+        assert len(seen) == 7
+        assert len(set(seen)) == 7
+
+    without_total = client.get("/api/v1/catalog", params={"with_total": False})
+    assert without_total.json()["meta"]["total"] is None
+
+    broken = client.get("/api/v1/catalog", params={"cursor": "not-a-cursor"})
+    assert broken.status_code == 400
+
+
+def test_popular_sort_ranks_by_time_weighted_engagement_without_decay_writes(client, db_session, create_user_factory, drain_outbox):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    now = datetime.now(UTC)
+    quiet, ordered, favorited = (
+        Product(
+            seller_id=1,
+            title=title,
+            description="Knitted item for popularity ranking",
+            price=Decimal("1000.00"),
+            status=ProductStatus.ACTIVE,
+            tags=[],
+            materials=[],
+            created_at=now - timedelta(days=30),
+        )
+        for title in ("Quiet", "Ordered", "Favorited")
+    )
+    db_session.add_all([quiet, ordered, favorited])
+    db_session.flush()
+    order = Order(
+        buyer_id=buyer.id,
+        seller_id=1,
+        status=OrderStatus.COMPLETED,
+        full_name="Buyer",
+        phone="+7999000000",
+        address="Moscow",
+        total_amount=Decimal("2000.00"),
+    )
+    db_session.add(order)
+    db_session.flush()
+    db_session.add(
+        OrderItem(
+            order_id=order.id,
+            product_id=ordered.id,
+            product_title_snapshot=ordered.title,
+            product_price_snapshot=ordered.price,
+            qty=2,
+            subtotal=Decimal("2000.00"),
+        )
+    )
+    db_session.commit()
+    # The listing credit is fixed at creation, in epoch units.
+    assert current_score(quiet.popularity_score, now) == pytest.approx(5.0 * 0.5 ** (30 * 24 / settings.popularity_half_life_hours))
+
+    # Cached before the worker runs: the new scores retire sort=popular listings only.
+    client.get("/api/v1/catalog", params={"sort": "popular"})
+    assert client.get("/api/v1/catalog", params={"sort": "new"}).headers["X-Cache"] == "MISS"
+    assert drain_outbox() >= 1
+    assert client.get("/api/v1/catalog", params={"sort": "new"}).headers["X-Cache"] == "HIT"
+    ranked = client.get("/api/v1/catalog", params={"sort": "popular"})
+    assert ranked.headers["X-Cache"] == "MISS"
+    assert [item["title"] for item in ranked.json()["items"]][0] == "Ordered"
+    db_session.expire_all()
+    # Two units ordered just now (2 * 3.0), plus the decayed listing credit.
+    assert current_score(ordered.popularity_score, now) == pytest.approx(6.0, abs=0.01)
+
+    # Engagement one half-life later counts double in epoch units; the order's stored score is never rewritten.
+    later = now + timedelta(hours=settings.popularity_half_life_hours)
+    stored = ordered.popularity_score
+    queue_engagement(db_session, {favorited.id: 3.0}, at=later)
+    db_session.commit()
+    drain_outbox()
+    db_session.expire_all()
+    assert ordered.popularity_score == stored
+    assert current_score(ordered.popularity_score, later) == pytest.approx(3.0, abs=0.01)
+    assert current_score(favorited.popularity_score, later) == pytest.approx(3.0, abs=0.01)
+    db_session.add(Favorite(user_id=buyer.id, product_id=favorited.id))
+    db_session.commit()
+    drain_outbox()
+    ranked = client.get("/api/v1/catalog", params={"sort": "popular"}).json()["items"]
+    assert [item["title"] for item in ranked] == ["Favorited", "Ordered", "Quiet"]
+
+
+def test_popularity_half_life_must_leave_overflow_headroom():
+    for half_life in (0, -72, 1):
+        with pytest.raises(ValidationError):
+            Settings(popularity_half_life_hours=half_life)
+
+
+def test_rebasing_the_popularity_epoch_past_the_overflow_bound_keeps_the_ranking(client, db_session, monkeypatch):
+    # Epoch 1030 half-lives ago: a weight for now no longer fits in a double, but scores recorded ~1000 half-lives in do.
+    now = datetime.now(UTC)
+    monkeypatch.setattr(settings, "popularity_epoch", now - timedelta(hours=1030 * settings.popularity_half_life_hours))
+    with pytest.raises(OverflowError):
+        time_weight(now)
+    scores = {"Steady": 2.0**1010 * 3, "Early": 2.0**1000 * 5, "Launch": 5.0}
+    db_session.add_all(
+        Product(
+            seller_id=1,
+            title=title,
+            description="Knitted item for popularity rebasing",
+            price=Decimal("1000.00"),
+            status=ProductStatus.ACTIVE,
+            tags=[],
+            materials=[],
+            popularity_score=score,
+        )
+        for title, score in scores.items()
+    )
+    db_session.add(OutboxEvent(topic=POPULARITY_TOPIC, payload_json={"product_id": 1, "points": 2.0**1020}))
+    db_session.commit()
+
+    assert rebase_popularity(db_session, now) == 3
+    monkeypatch.setattr(settings, "popularity_epoch", now)
+    db_session.expire_all()
+    rebased = {product.title: product.popularity_score for product in db_session.query(Product)}
+    assert rebased["Steady"] == pytest.approx(3 * 2.0**-20)
+    assert rebased["Early"] == pytest.approx(5 * 2.0**-30)
+    assert 0 <= rebased["Launch"] < 1e-300
+    assert db_session.query(OutboxEvent).filter_by(topic=POPULARITY_TOPIC).one().payload_json["points"] == pytest.approx(2.0**-10)
+    assert time_weight(now) == 1.0
+    ranked = client.get("/api/v1/catalog", params={"sort": "popular"}).json()["items"]
+    assert [item["title"] for item in ranked] == ["Steady", "Early", "Launch"]
@@ -0,0 +1,174 @@
+from collections.abc import Callable
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Engine, event, text
+
+from app.core.pagination import encode_cursor
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.models.notification import NotificationType
+from app.models.product import Product, ProductStatus
+from app.models.role import RoleName
+from app.services.checkout_service import list_user_orders
+from app.services.message_service import list_inbox, list_messages, list_user_conversations, mark_messages_read
+from app.services.notification_service import list_notifications, mark_notifications_read
+from app.services.product_service import list_moderation_queue, list_public_products
+from app.services.search_service import fallback_index
+from app.services.seller_analytics_service import get_seller_analytics
+
+
+def capture_statements(engine: Engine, run: Callable[[], object]) -> list[tuple[str, tuple]]:
+    captured: list[tuple[str, tuple]] = []
+
+    def before_cursor_execute(_conn, _cursor, statement, parameters, _context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((statement, tuple(parameters)))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def query_plan(engine: Engine, statement: str, parameters: tuple) -> list[str]:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[-1] for row in rows]
+
+
+def assert_indexed(engine: Engine, statements: list[tuple[str, tuple]], scannable: tuple[str, ...] = ()) -> None:
+    """Every statement must be answered by an index search: no full scans, no sort into a temp B-tree (filesort).
+
+    Tables in ``scannable`` may be read in full; they hold only the rows the statement needs.
+    """
+    assert statements
+    allowed_scans = tuple(f"SCAN {table}" for table in scannable)
+    for statement, parameters in statements:
+        plan = query_plan(engine, statement, parameters)
+        for step in plan:
+            assert not step.startswith("SCAN ") or step.startswith(allowed_scans), (statement, plan)
+            assert "USE TEMP B-TREE" not in step, (statement, plan)
+
+
+@pytest.fixture()
+def seeded(db_session, create_user_factory):
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
+    product = Product(
+        seller_id=seller.id,
+        title="Plan Scarf",
+        description="Scarf used to check query plans",
+        price=Decimal("1000.00"),
+        status=ProductStatus.ACTIVE,
+        tags=["scarf"],
+        materials=["wool"],
+    )
+    conversation = Conversation(buyer_id=buyer.id, seller_id=seller.id, product_id=None)
+    db_session.add_all([product, conversation])
+    db_session.commit()
+    # Planner statistics stand in for a production-sized database; they are dropped again so other tests are unaffected.
+    db_session.execute(text("ANALYZE"))
+    yield buyer, seller, conversation
+    db_session.execute(text("DELETE FROM sqlite_stat1"))
+    db_session.commit()
+
+
+def test_catalog_query_shapes_use_composite_indexes(db_session, seeded):
+    engine = db_session.get_bind()
+    cursors = {
+        "new": encode_cursor(datetime(2030, 1, 1), 10),
+        "price_asc": encode_cursor(Decimal("10.00"), 10),
+        "price_desc": encode_cursor(Decimal("9000.00"), 10),
+        "popular": encode_cursor(12.5, 10),
+    }
+    for sort, cursor in cursors.items():
+        for category_id in (None, 3):
+            for page_cursor in (None, cursor):
+                statements = capture_statements(
+                    engine,
+                    lambda sort=sort, category_id=category_id, page_cursor=page_cursor: list_public_products(
+                        db_session, None, category_id, None, None, sort, 1, 20, cursor=page_cursor
+                    ),
+                )
+                assert_indexed(engine, statements)
+    min_price = Decimal("10")
+    assert_indexed(engine, capture_statements(engine, lambda: list_public_products(db_session, None, None, min_price, None, "new", 1, 20)))
+    assert_indexed(engine, capture_statements(engine, lambda: list_moderation_queue(db_session, 1, 20)))
+
+
+def test_catalog_search_reads_the_matches_not_the_catalog(db_session, seeded):
+    engine = db_session.get_bind()
+    # Loading the in-process index reads every product once per process; the searches after it must not.
+    fallback_index.ensure_loaded(db_session)
+    for sort in ("relevance", "new", "price_asc", "popular"):
+        for category_id in (None, 3):
+            for page in (1, 2):
+                statements = capture_statements(
+                    engine,
+                    lambda sort=sort, category_id=category_id, page=page: list_public_products(
+                        db_session, "scarf wool", category_id, None, None, sort, page, 20
+                    ),
+                )
+                # The connection's match table is scanned in rank order; products are only looked up.
+                assert_indexed(engine, [entry for entry in statements if "FROM products" in entry[0]], scannable=("search_scores",))
+
+
+def test_seller_listings_walk_the_seller_index(client, db_session, seeded, auth_headers):
+    engine = db_session.get_bind()
+    _buyer, seller, _conversation = seeded
+    headers = auth_headers("seller@example.com", "StrongPass123")
+    statements = capture_statements(engine, lambda: client.get("/api/v1/seller/products", headers=headers))
+    statements += capture_statements(engine, lambda: client.get("/api/v1/seller/products", params={"page": 2}, headers=headers))
+    statements += capture_statements(engine, lambda: client.get(f"/api/v1/sellers/{seller.id}"))
+    assert_indexed(engine, [entry for entry in statements if "FROM products" in entry[0]])
+
+
+def test_order_message_and_notification_query_shapes_use_composite_indexes(db_session, seeded):
+    engine = db_session.get_bind()
+    buyer, seller, conversation = seeded
+    after = datetime(2026, 1, 1, tzinfo=UTC)
+    anchor = Message(conversation_id=conversation.id, sender_id=seller.id, body="Hello", is_read=False)
+    db_session.add(anchor)
+    db_session.commit()
+
+    assert_indexed(engine, capture_statements(engine, lambda: list_user_orders(db_session, buyer.id)))
+    assert_indexed(engine, capture_statements(engine, lambda: list_user_orders(db_session, seller.id, as_seller=True)))
+    assert_indexed(engine, capture_statements(engine, lambda: list_messages(db_session, conversation, buyer.id, None)))
+    assert_indexed(engine, capture_statements(engine, lambda: list_messages(db_session, conversation, buyer.id, after)))
+    assert_indexed(engine, capture_statements(engine, lambda: list_messages(db_session, conversation, buyer.id, before_id=anchor.id)))
+    assert_indexed(engine, capture_statements(engine, lambda: list_messages(db_session, conversation, buyer.id, after_id=anchor.id)))
+    assert_indexed(engine, capture_statements(engine, lambda: mark_messages_read(db_session, conversation, buyer.id)))
+    assert_indexed(engine, capture_statements(engine, lambda: list_user_conversations(db_session, seller.id)))
+    inbox_cursor = encode_cursor(datetime(2030, 1, 1), 10)
+    for inbox_page in (None, inbox_cursor):
+        assert_indexed(engine, capture_statements(engine, lambda inbox_page=inbox_page: list_inbox(db_session, buyer.id, inbox_page)))
+    assert_indexed(engine, capture_statements(engine, lambda: list_notifications(db_session, buyer.id)))
+    page_cursor = encode_cursor(datetime(2030, 1, 1), 10)
+    for is_read in (None, False, True):
+        for notification_type in (None, NotificationType.NEW_ORDER):
+            statements = capture_statements(
+                engine,
+                lambda is_read=is_read, notification_type=notification_type: list_notifications(
+                    db_session, buyer.id, notification_type, is_read, page_cursor
+                ),
+            )
+            assert_indexed(engine, statements)
+    assert_indexed(engine, capture_statements(engine, lambda: mark_notifications_read(db_session, buyer.id)))
+    assert_indexed(engine, capture_statements(engine, lambda: mark_notifications_read(db_session, buyer.id, before=page_cursor)))
+    assert_indexed(engine, capture_statements(engine, lambda: mark_notifications_read(db_session, buyer.id, ids=[1, 2])))
+
+
+def test_seller_analytics_windows_are_primary_key_range_scans(db_session, seeded):
+    engine = db_session.get_bind()
+    _buyer, seller, _conversation = seeded
+    statements = capture_statements(engine, lambda: get_seller_analytics(db_session, seller.id))
+    daily = [entry for entry in statements if "FROM seller_daily_stats" in entry[0]]
+    assert_indexed(engine, daily)
+    for statement, parameters in statements:
+        plan = query_plan(engine, statement, parameters)
+        # The top-product ranking groups the range it scanned; that sort is bounded by the window, not history.
+        assert not any(step.startswith("SCAN ") for step in plan), (statement, plan)
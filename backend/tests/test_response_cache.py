@@ -0,0 +1,120 @@
+from app.core.config import settings
+from app.core.response_cache import CachedResponse, LocalResponseStore
+from app.models.product import Product
+from app.models.role import RoleName
+from app.services.seller_analytics_service import activity_buffer
+
+
+def test_anonymous_pages_are_cached_until_a_product_write_commits(
+    client, db_session, create_user_factory, count_queries, monkeypatch, auth_headers, product_factory
+):
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER])
+    product = product_factory(seller.id, "Mittens", "1200.00")
+    db_session.add(product)
+    db_session.commit()
+
+    first = client.get("/api/v1/catalog", params={"sort": "new", "page": 1})
+    assert first.headers["X-Cache"] == "MISS"
+    with count_queries() as statements:
+        # Same validated parameters in a different spelling and order share the entry.
+        again = client.get("/api/v1/catalog?page=01&sort=new")
+    assert again.headers["X-Cache"] == "HIT"
+    assert statements == []
+    assert again.content == first.content
+
+    for _ in range(2):
+        detail = client.get(f"/api/v1/catalog/{product.id}")
+    assert (detail.headers["X-Cache"], detail.json()["title"]) == ("HIT", "Mittens")
+    # A hit still counts the view.
+    assert sum(counts["views"] for counts in activity_buffer.drain().values()) == 2
+    assert client.get(f"/api/v1/sellers/{seller.id}").headers["X-Cache"] == "MISS"
+    assert client.get(f"/api/v1/sellers/{seller.id}").headers["X-Cache"] == "HIT"
+    # Anyone can send the header, so it is ignored unless turned on.
+    assert client.get("/api/v1/catalog", headers={"X-Cache-Bypass": "1"}).headers["X-Cache"] == "HIT"
+    monkeypatch.setattr(settings, "response_cache_bypass_header", True)
+    assert client.get("/api/v1/catalog", headers={"X-Cache-Bypass": "1"}).headers["X-Cache"] == "BYPASS"
+
+    update = client.put(
+        f"/api/v1/seller/products/{product.id}",
+        json={"title": "Striped mittens"},
+        headers=auth_headers(seller.email, "StrongPass123"),
+    )
+    assert update.status_code == 200
+    listing = client.get("/api/v1/catalog", params={"sort": "new", "page": 1})
+    assert (listing.headers["X-Cache"], listing.json()["items"][0]["title"]) == ("MISS", "Striped mittens")
+    assert client.get(f"/api/v1/catalog/{product.id}").json()["title"] == "Striped mittens"
+    assert client.get(f"/api/v1/sellers/{seller.id}").json()["products"][0]["title"] == "Striped mittens"
+
+    metrics = client.get("/metrics").text
+    assert 'response_cache_requests_total{route="catalog_list",result="hit"}' in metrics
+
+
+def test_checkout_and_cancel_retire_cached_pages_showing_stock(client, db_session, create_user_factory, auth_headers, product_factory):
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER])
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    product = product_factory(seller.id, "Mittens", "1200.00")
+    product.stock = 5
+    db_session.add(product)
+    db_session.commit()
+    headers = auth_headers(buyer.email, "StrongPass123")
+
+    client.get(f"/api/v1/catalog/{product.id}")
+    assert client.get(f"/api/v1/catalog/{product.id}").headers["X-Cache"] == "HIT"
+    assert client.post("/api/v1/cart/items", json={"product_id": product.id, "qty": 2}, headers=headers).status_code == 201
+    checkout = client.post(
+        "/api/v1/orders/checkout", json={"full_name": "Buyer", "phone": "+7000000000", "address": "Moscow"}, headers=headers
+    )
+    assert checkout.status_code == 201
+    # Stock is taken with a Core UPDATE, which the mapper events never see.
+    detail = client.get(f"/api/v1/catalog/{product.id}")
+    assert (detail.headers["X-Cache"], detail.json()["stock"]) == ("MISS", 3)
+
+    order_id = checkout.json()["orders"][0]["id"]
+    assert client.patch(f"/api/v1/orders/{order_id}/status", json={"status": "CANCELED"}, headers=headers).status_code == 200
+    detail = client.get(f"/api/v1/catalog/{product.id}")
+    assert (detail.headers["X-Cache"], detail.json()["stock"]) == ("MISS", 5)
+
+
+def test_public_reads_answer_conditional_requests_with_304(client, db_session, create_user_factory, monkeypatch, product_factory):
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER])
+    product = product_factory(seller.id, "Mittens", "1200.00")
+    db_session.add(product)
+    db_session.commit()
+
+    listing = client.get("/api/v1/catalog")
+    assert listing.headers["cache-control"] == "public, max-age=30, stale-while-revalidate=30"
+    etag = listing.headers["etag"]
+    monkeypatch.setattr(settings, "response_cache_bypass_header", True)
+    for cache_state in ("HIT", "BYPASS"):
+        headers = {"If-None-Match": f'W/"stale", {etag}', "X-Cache-Bypass": "1" if cache_state == "BYPASS" else "0"}
+        revalidated = client.get("/api/v1/catalog", headers=headers)
+        assert (revalidated.status_code, revalidated.content, revalidated.headers["X-Cache"]) == (304, b"", cache_state)
+        assert revalidated.headers["etag"] == etag
+
+    detail = client.get(f"/api/v1/catalog/{product.id}")
+    assert detail.headers["cache-control"] == "public, no-cache"
+    assert client.get(f"/api/v1/catalog/{product.id}", headers={"If-None-Match": detail.headers["etag"]}).status_code == 304
+    # Revalidations still reach the endpoint, so the view is counted.
+    assert sum(counts["views"] for counts in activity_buffer.drain().values()) == 2
+    profile = client.get(f"/api/v1/sellers/{seller.id}")
+    assert client.get(f"/api/v1/sellers/{seller.id}", headers={"If-None-Match": profile.headers["etag"]}).status_code == 304
+
+    db_session.get(Product, product.id).title = "Striped mittens"
+    db_session.commit()
+    changed = client.get("/api/v1/catalog", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_local_store_evicts_by_total_body_size():
+    store = LocalResponseStore(max_bytes=10, ttl_seconds=60)
+    store.set("a", CachedResponse(b"12345"))
+    store.set("b", CachedResponse(b"12345"))
+    store.get("a")
+    store.set("c", CachedResponse(b"123"))
+    assert (store.get("a"), store.get("b"), store.get("c")) == (CachedResponse(b"12345"), None, CachedResponse(b"123"))
+    assert store.size_bytes == 8
+    store.set("huge", CachedResponse(b"x" * 11))
+    assert store.get("huge") is None
+    assert store.bump("catalog") == 1
+    assert store.version("catalog") == 1
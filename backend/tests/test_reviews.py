@@ -1,2 +1,145 @@
+from decimal import Decimal
+
+from sqlalchemy import select, update
+
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product, ProductStatus
+from app.models.review import Review
+from app.models.role import RoleName
+from app.services.review_service import recompute_ratings
+
+
 def test_placeholder_reviews_scope():
     assert True
+
+
+def _purchase(db_session, buyer_id: int, product: Product) -> None:
+    order = Order(
+        buyer_id=buyer_id,
+        seller_id=product.seller_id,
+        status=OrderStatus.COMPLETED,
+        full_name="Buyer Test",
+        phone="+7999000000",
+        address="Moscow",
+        comment=None,
+        total_amount=product.price,
+    )
+    db_session.add(order)
+    db_session.flush()
+    db_session.add(
+        OrderItem(
+            order_id=order.id,
+            product_id=product.id,
+            product_title_snapshot=product.title,
+            product_price_snapshot=product.price,
+            qty=1,
+            subtotal=product.price,
+        )
+    )
+    db_session.commit()
+
+
+def _rating(client, product_id: int) -> tuple[float | None, int]:
+    body = client.get(f"/api/v1/catalog/{product_id}").json()
+    return body["rating_avg"], body["rating_count"]
+
+
+def test_rating_aggregates_follow_reviews_moderation_and_repair(client, db_session, create_user_factory, auth_headers):
+    admin = create_user_factory("admin@example.com", "StrongPass123", [RoleName.ADMIN, RoleName.BUYER])
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
+    buyers = [create_user_factory(f"buyer{idx}@example.com", "StrongPass123", [RoleName.BUYER]) for idx in range(3)]
+    product = Product(
+        seller_id=seller.id,
+        title="Rated Scarf",
+        description="Scarf used to check rating aggregates",
+        price=Decimal("900.00"),
+        stock=None,
+        tags=[],
+        materials=[],
+        status=ProductStatus.ACTIVE,
+    )
+    db_session.add(product)
+    db_session.commit()
+    assert _rating(client, product.id) == (None, 0)
+
+    review_ids = []
+    for buyer, rating in zip(buyers, (5, 4, 2), strict=True):
+        _purchase(db_session, buyer.id, product)
+        response = client.post(
+            f"/api/v1/reviews/product/{product.id}",
+            json={"rating": rating, "text": "Warm and soft, as described."},
+            headers=auth_headers(buyer.email, "StrongPass123"),
+        )
+        assert response.status_code == 200
+        review_ids.append(response.json()["id"])
+    assert _rating(client, product.id) == (3.67, 3)
+    listed = client.get("/api/v1/catalog").json()["items"]
+    assert [(item["rating_avg"], item["rating_count"]) for item in listed] == [(3.67, 3)]
+
+    reviews = client.get(f"/api/v1/reviews/product/{product.id}")
+    assert (len(reviews.json()), reviews.headers["cache-control"]) == (3, "public, max-age=30, stale-while-revalidate=30")
+    etag = reviews.headers["etag"]
+    assert client.get(f"/api/v1/reviews/product/{product.id}", headers={"If-None-Match": etag}).status_code == 304
+
+    headers = auth_headers(admin.email, "StrongPass123")
+    assert client.post(f"/api/v1/admin/reviews/{review_ids[2]}/hide?hidden=true", headers=headers).status_code == 200
+    assert _rating(client, product.id) == (4.5, 2)
+    revalidated = client.get(f"/api/v1/reviews/product/{product.id}", headers={"If-None-Match": etag})
+    assert (revalidated.status_code, len(revalidated.json())) == (200, 2)
+    assert revalidated.headers["etag"] != etag
+    # Hiding twice must not count the review out twice.
+    assert client.post(f"/api/v1/admin/reviews/{review_ids[2]}/hide?hidden=true", headers=headers).status_code == 200
+    assert _rating(client, product.id) == (4.5, 2)
+    assert client.delete(f"/api/v1/admin/reviews/{review_ids[2]}", headers=headers).status_code == 200
+    assert _rating(client, product.id) == (4.5, 2)
+    assert client.delete(f"/api/v1/admin/reviews/{review_ids[0]}", headers=headers).status_code == 200
+    assert _rating(client, product.id) == (4.0, 1)
+    assert client.post(f"/api/v1/admin/reviews/{review_ids[1]}/hide?hidden=true", headers=headers).status_code == 200
+    assert client.post(f"/api/v1/admin/reviews/{review_ids[1]}/hide?hidden=false", headers=headers).status_code == 200
+    assert _rating(client, product.id) == (4.0, 1)
+
+    db_session.execute(update(Product).values(rating_count=42, rating_sum=7))
+    db_session.commit()
+    assert recompute_ratings(db_session) == 1
+    assert _rating(client, product.id) == (4.0, 1)
+
+
+def test_reviews_etag_follows_which_reviews_are_visible(client, db_session, create_user_factory):
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER])
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    product = Product(
+        seller_id=seller.id,
+        title="Mittens",
+        description="Mittens used to check the reviews ETag",
+        price=Decimal("500.00"),
+        tags=[],
+        materials=[],
+        status=ProductStatus.ACTIVE,
+    )
+    db_session.add(product)
+    db_session.commit()
+    for _ in range(4):
+        _purchase(db_session, buyer.id, product)
+    item_ids = db_session.scalars(select(OrderItem.id).order_by(OrderItem.id)).all()
+    reviews = [Review(user_id=buyer.id, product_id=product.id, order_item_id=item_id, rating=5, text="Warm") for item_id in item_ids]
+    db_session.add_all(reviews)
+    db_session.commit()
+    url = f"/api/v1/reviews/product/{product.id}"
+
+    def visible(*shown: Review) -> str:
+        for review in reviews:
+            review.is_hidden = review not in shown
+        db_session.commit()
+        response = client.get(url)
+        assert {row["id"] for row in response.json()} == {review.id for review in shown}
+        return response.headers["etag"]
+
+    # Same count and same id sum, different reviews: a count+sum validator would call these equal.
+    first, second = visible(reviews[0], reviews[3]), visible(reviews[1], reviews[2])
+    assert first != second
+    assert client.get(url, headers={"If-None-Match": first}).status_code == 200
+    assert client.get(url, headers={"If-None-Match": second}).status_code == 304
+
+    reviews[1].text = "Warm and soft"
+    db_session.commit()
+    assert client.get(url, headers={"If-None-Match": second}).status_code == 200
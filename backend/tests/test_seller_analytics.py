@@ -0,0 +1,88 @@
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.main import app
+from app.models.role import RoleName
+from app.models.seller_stats import SellerProductDailyStats
+from app.worker import activity_flusher
+
+
+def test_seller_analytics_follow_views_cart_adds_and_order_transitions(
+    client, db_session, create_user_factory, drain_outbox, auth_headers, product_factory
+):
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER, RoleName.BUYER])
+    buyer = create_user_factory("buyer@example.com", "StrongPass123", [RoleName.BUYER])
+    sweater, socks = product_factory(seller.id, "Sweater", "100.00"), product_factory(seller.id, "Socks", "50.00")
+    db_session.add_all([sweater, socks])
+    db_session.commit()
+    buyer_headers = auth_headers(buyer.email, "StrongPass123")
+    seller_headers = auth_headers(seller.email, "StrongPass123")
+
+    for product_id in (sweater.id, sweater.id, socks.id, socks.id):
+        assert client.get(f"/api/v1/catalog/{product_id}").status_code == 200
+    for product_id, qty in ((sweater.id, 2), (socks.id, 1)):
+        assert client.post("/api/v1/cart/items", json={"product_id": product_id, "qty": qty}, headers=buyer_headers).status_code == 201
+    # Requests only count in memory; the lifespan's periodic flush writes the rollups.
+    assert db_session.scalars(select(SellerProductDailyStats)).all() == []
+    assert activity_flusher.flush() == 2
+    checkout = client.post(
+        "/api/v1/orders/checkout", json={"full_name": "Buyer", "phone": "+7000000000", "address": "Moscow"}, headers=buyer_headers
+    )
+    assert checkout.status_code == 201
+    order_id = checkout.json()["orders"][0]["id"]
+    accepted = client.patch(
+        f"/api/v1/orders/{order_id}/status", params={"as_seller": True}, json={"status": "ACCEPTED"}, headers=seller_headers
+    )
+    assert accepted.status_code == 200
+    # Rollups follow the transitions through the outbox, not the request.
+    assert client.get("/api/v1/seller/dashboard/analytics", headers=seller_headers).json()["totals"]["orders_requested"] == 0
+    drain_outbox()
+
+    response = client.get("/api/v1/seller/dashboard/analytics", params={"top": 5}, headers=seller_headers)
+    assert response.status_code == 200
+    body = response.json()
+    today = datetime.now(UTC).date()
+    assert body["date_to"] == today.isoformat()
+    assert len(body["daily"]) == 30
+    assert body["daily"][-1]["day"] == today.isoformat()
+    totals = body["totals"]
+    assert (totals["views"], totals["cart_adds"], totals["orders_requested"], totals["orders_accepted"]) == (4, 2, 1, 1)
+    assert Decimal(totals["revenue"]) == Decimal("250.00")
+    assert (totals["view_to_cart"], totals["cart_to_order"]) == (0.5, 0.5)
+    assert [(row["title"], Decimal(row["revenue"]), row["units_sold"], row["views"]) for row in body["top_products"]] == [
+        ("Sweater", Decimal("200.00"), 2, 2),
+        ("Socks", Decimal("50.00"), 1, 2),
+    ]
+
+    other_seller = create_user_factory("other@example.com", "StrongPass123", [RoleName.SELLER])
+    other = client.get("/api/v1/seller/dashboard/analytics", headers=auth_headers(other_seller.email, "StrongPass123"))
+    assert other.json()["totals"]["views"] == 0
+    assert other.json()["top_products"] == []
+
+
+def test_seller_analytics_window_is_bounded(client, create_user_factory, auth_headers):
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER])
+    headers = auth_headers(seller.email, "StrongPass123")
+    today = datetime.now(UTC).date()
+
+    widest = {"date_from": (today - timedelta(days=89)).isoformat(), "date_to": today.isoformat()}
+    assert len(client.get("/api/v1/seller/dashboard/analytics", params=widest, headers=headers).json()["daily"]) == 90
+    too_wide = {"date_from": (today - timedelta(days=90)).isoformat(), "date_to": today.isoformat()}
+    assert client.get("/api/v1/seller/dashboard/analytics", params=too_wide, headers=headers).status_code == 400
+    reversed_window = {"date_from": today.isoformat(), "date_to": (today - timedelta(days=1)).isoformat()}
+    assert client.get("/api/v1/seller/dashboard/analytics", params=reversed_window, headers=headers).status_code == 400
+
+
+def test_buffered_activity_is_written_when_the_app_shuts_down(db_session, create_user_factory, product_factory):
+    seller = create_user_factory("seller@example.com", "StrongPass123", [RoleName.SELLER])
+    scarf = product_factory(seller.id, "Scarf", "80.00")
+    db_session.add(scarf)
+    db_session.commit()
+
+    with TestClient(app) as client:
+        assert client.get(f"/api/v1/catalog/{scarf.id}").status_code == 200
+        assert db_session.scalar(select(SellerProductDailyStats.views)) is None
+    assert db_session.scalar(select(SellerProductDailyStats.views).where(SellerProductDailyStats.product_id == scarf.id)) == 1
@@ -0,0 +1,49 @@
+import { onBeforeUnmount, onMounted } from "vue";
+
+import { api, eventStreamUrl } from "../shared/api/client";
+import { endpoints } from "../shared/api/endpoints";
+
+type EventHandlers = Record<string, (data: never) => void>;
+
+export function useEventStream(path: string, handlers: EventHandlers, retryMs = 5000) {
+  let source: EventSource | null = null;
+  let retryId: number | null = null;
+  let closed = false;
+
+  const retry = () => {
+    retryId = window.setTimeout(open, retryMs);
+  };
+
+  const open = async () => {
+    let ticket: string;
+    try {
+      const response = await api.post<{ ticket: string }>(endpoints.auth.streamTicket);
+      ticket = response.data.ticket;
+    } catch {
+      if (!closed) retry();
+      return;
+    }
+    if (closed) return;
+    source = new EventSource(eventStreamUrl(path, ticket), { withCredentials: true });
+    for (const [eventName, handler] of Object.entries(handlers)) {
+      source.addEventListener(eventName, (event) => handler(JSON.parse((event as MessageEvent<string>).data) as never));
+    }
+    source.onerror = () => {
+      // EventSource retries by itself with the same ticket; once that is refused (expired), fetch a new one.
+      if (source?.readyState === EventSource.CLOSED) {
+        source = null;
+        retry();
+      }
+    };
+  };
+
+  onMounted(open);
+
+  onBeforeUnmount(() => {
+    closed = true;
+    if (retryId !== null) {
+      window.clearTimeout(retryId);
+    }
+    source?.close();
+  });
+}
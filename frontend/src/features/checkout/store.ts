@@ -5,14 +5,24 @@ import { api } from "../../shared/api/client";
 import { endpoints } from "../../shared/api/endpoints";
 import type { CheckoutResponse } from "../../shared/types/order";
 
+function newIdempotencyKey(): string {
+  return globalThis.crypto?.randomUUID?.() ?? `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
 export const useCheckoutStore = defineStore("checkout", () => {
   const lastCheckout = ref<CheckoutResponse | null>(null);
   const isLoading = ref(false);
+  // One key per checkout attempt, kept until it succeeds, so a resubmit after a dropped response cannot order twice.
+  let idempotencyKey: string | null = null;
 
   async function checkout(payload: { full_name: string; phone: string; address: string; comment?: string }) {
     isLoading.value = true;
     try {
-      const response = await api.post<CheckoutResponse>(endpoints.checkout, payload);
+      idempotencyKey ??= newIdempotencyKey();
+      const response = await api.post<CheckoutResponse>(endpoints.checkout, payload, {
+        headers: { "Idempotency-Key": idempotencyKey },
+      });
+      idempotencyKey = null;
       lastCheckout.value = response.data;
       return response.data;
     } finally {
@@ -1,38 +1,79 @@
 import { defineStore } from "pinia";
 import { ref } from "vue";
 
-import { api } from "../../shared/api/client";
+import { api, nextCursor } from "../../shared/api/client";
 import { endpoints } from "../../shared/api/endpoints";
-import type { Conversation, Message } from "../../shared/types/message";
+import type { InboxEntry, Message } from "../../shared/types/message";
 
 export const useMessagesStore = defineStore("messages", () => {
-  const conversations = ref<Conversation[]>([]);
+  const conversations = ref<InboxEntry[]>([]);
   const messages = ref<Message[]>([]);
   const selectedConversationId = ref<number | null>(null);
+  const inboxCursor = ref<string | null>(null);
 
   async function fetchConversations() {
-    const response = await api.get<Conversation[]>(endpoints.messages.conversations);
+    const response = await api.get<InboxEntry[]>(endpoints.messages.inbox);
     conversations.value = response.data;
+    inboxCursor.value = nextCursor(response);
+  }
+
+  async function fetchOlderConversations() {
+    if (!inboxCursor.value) return;
+    const response = await api.get<InboxEntry[]>(endpoints.messages.inbox, { params: { cursor: inboxCursor.value } });
+    const known = new Set(conversations.value.map((entry) => entry.id));
+    conversations.value = [...conversations.value, ...response.data.filter((entry) => !known.has(entry.id))];
+    inboxCursor.value = nextCursor(response);
   }
 
   async function fetchMessages(conversationId: number) {
     const response = await api.get<Message[]>(`${endpoints.messages.conversations}/${conversationId}`);
     messages.value = response.data;
     selectedConversationId.value = conversationId;
+    const entry = conversations.value.find((item) => item.id === conversationId);
+    if (entry?.unread_count) {
+      await api.post(`${endpoints.messages.conversations}/${conversationId}/read`);
+      entry.unread_count = 0;
+    }
+  }
+
+  async function fetchOlderMessages() {
+    if (!selectedConversationId.value || messages.value.length === 0) return;
+    const response = await api.get<Message[]>(`${endpoints.messages.conversations}/${selectedConversationId.value}`, {
+      params: { before_id: messages.value[0].id },
+    });
+    messages.value = [...response.data, ...messages.value];
   }
 
   async function sendMessage(conversationId: number, body: string) {
     const response = await api.post<Message>(`${endpoints.messages.conversations}/${conversationId}`, { body });
-    messages.value.push(response.data);
+    receiveMessage(response.data);
+  }
+
+  function receiveMessage(message: Message) {
+    const entry = conversations.value.find((item) => item.id === message.conversation_id);
+    if (entry && entry.last_message?.id !== message.id) {
+      entry.last_message = { ...message, snippet: message.body };
+      entry.updated_at = message.created_at;
+      if (message.conversation_id !== selectedConversationId.value && message.sender_id === entry.counterpart_id) {
+        entry.unread_count += 1;
+      }
+    }
+    if (message.conversation_id !== selectedConversationId.value) return;
+    if (messages.value.some((item) => item.id === message.id)) return;
+    messages.value.push(message);
   }
 
   return {
     conversations,
     messages,
     selectedConversationId,
+    inboxCursor,
     fetchConversations,
+    fetchOlderConversations,
     fetchMessages,
+    fetchOlderMessages,
     sendMessage,
+    receiveMessage,
   };
 });
 
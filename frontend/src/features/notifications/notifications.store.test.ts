@@ -3,23 +3,42 @@ import { createPinia, setActivePinia } from "pinia";
 
 import { useNotificationsStore } from "./store";
 
-const { postMock } = vi.hoisted(() => ({
+const { getMock, postMock } = vi.hoisted(() => ({
+  getMock: vi.fn(async () => ({
+    data: [{ id: 1, user_id: 1, type: "NEW_ORDER", payload_json: {}, is_read: false, created_at: "2026-01-01" }],
+    headers: {} as Record<string, string>,
+  })),
   postMock: vi.fn(async () => ({ data: {} })),
 }));
 
 vi.mock("../../shared/api/client", () => ({
   api: {
-    get: vi.fn(async () => ({
-      data: [{ id: 1, user_id: 1, type: "NEW_ORDER", payload_json: {}, is_read: false, created_at: "2026-01-01" }],
-    })),
+    get: getMock,
     post: postMock,
   },
+  nextCursor: (response: { headers: Record<string, string> }) => response.headers["x-next-cursor"] ?? null,
 }));
 
 describe("notifications store", () => {
   beforeEach(() => {
     setActivePinia(createPinia());
     postMock.mockClear();
+    getMock.mockClear();
+  });
+
+  it("loads older pages with the cursor from the previous response", async () => {
+    getMock.mockResolvedValueOnce({
+      data: [{ id: 2, user_id: 1, type: "NEW_ORDER", payload_json: {}, is_read: false, created_at: "2026-01-02" }],
+      headers: { "x-next-cursor": "c1" },
+    });
+    const store = useNotificationsStore();
+    await store.fetchNotifications();
+    expect(store.cursor).toBe("c1");
+
+    await store.fetchMoreNotifications();
+    expect(getMock).toHaveBeenLastCalledWith(expect.any(String), { params: { cursor: "c1" } });
+    expect(store.items.map((item) => item.id)).toEqual([2, 1]);
+    expect(store.cursor).toBeNull();
   });
 
   it("marks notification as read optimistically", async () => {
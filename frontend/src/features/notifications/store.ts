@@ -1,32 +1,83 @@
 import { defineStore } from "pinia";
-import { computed, ref } from "vue";
+import { ref } from "vue";
 
-import { api } from "../../shared/api/client";
+import { api, nextCursor } from "../../shared/api/client";
 import { endpoints } from "../../shared/api/endpoints";
 import type { NotificationItem } from "../../shared/types/notification";
 
 export const useNotificationsStore = defineStore("notifications", () => {
   const items = ref<NotificationItem[]>([]);
-
-  const unreadCount = computed(() => items.value.filter((item) => !item.is_read).length);
+  const unreadCount = ref(0);
+  const cursor = ref<string | null>(null);
+  const isLoadingMore = ref(false);
 
   async function fetchNotifications() {
-    const response = await api.get<NotificationItem[]>(endpoints.notifications);
+    const response = await api.get<NotificationItem[]>(endpoints.notifications.list);
     items.value = response.data;
+    cursor.value = nextCursor(response);
+  }
+
+  async function fetchMoreNotifications() {
+    if (!cursor.value || isLoadingMore.value) return;
+    isLoadingMore.value = true;
+    try {
+      const response = await api.get<NotificationItem[]>(endpoints.notifications.list, { params: { cursor: cursor.value } });
+      const known = new Set(items.value.map((item) => item.id));
+      items.value = [...items.value, ...response.data.filter((item) => !known.has(item.id))];
+      cursor.value = nextCursor(response);
+    } finally {
+      isLoadingMore.value = false;
+    }
+  }
+
+  async function fetchUnreadCount() {
+    const response = await api.get<{ unread: number }>(endpoints.notifications.unreadCount);
+    unreadCount.value = response.data.unread;
+  }
+
+  function setUnreadCount(payload: { unread: number }) {
+    unreadCount.value = payload.unread;
+  }
+
+  function receiveNotification(item: NotificationItem) {
+    if (items.value.some((existing) => existing.id === item.id)) return;
+    items.value.unshift(item);
+    if (!item.is_read) unreadCount.value += 1;
   }
 
   async function markAsRead(id: number) {
     const existing = items.value.find((item) => item.id === id);
-    if (!existing) return;
+    if (!existing || existing.is_read) return;
     existing.is_read = true;
+    unreadCount.value = Math.max(unreadCount.value - 1, 0);
     try {
-      await api.post(`${endpoints.notifications}/${id}/read`);
+      await api.post(`${endpoints.notifications.list}/${id}/read`);
     } catch (error) {
       existing.is_read = false;
+      unreadCount.value += 1;
       throw error;
     }
   }
 
-  return { items, unreadCount, fetchNotifications, markAsRead };
-});
+  async function markAllAsRead() {
+    const response = await api.post<{ updated: number; unread: number }>(`${endpoints.notifications.list}/read`, {});
+    items.value.forEach((item) => {
+      item.is_read = true;
+    });
+    unreadCount.value = response.data.unread;
+  }
 
+  return {
+    items,
+    unreadCount,
+    cursor,
+    isLoadingMore,
+    fetchNotifications,
+    fetchMoreNotifications,
+    fetchUnreadCount,
+    setUnreadCount,
+    receiveNotification,
+    markAsRead,
+    markAllAsRead,
+  };
+});
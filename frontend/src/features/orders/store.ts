@@ -1,35 +1,74 @@
 import { defineStore } from "pinia";
 import { ref } from "vue";
 
-import { api } from "../../shared/api/client";
+import { api, nextCursor } from "../../shared/api/client";
 import { endpoints } from "../../shared/api/endpoints";
 import type { Order } from "../../shared/types/order";
 
 export const useOrdersStore = defineStore("orders", () => {
   const buyerOrders = ref<Order[]>([]);
   const sellerOrders = ref<Order[]>([]);
+  const buyerCursor = ref<string | null>(null);
+  const sellerCursor = ref<string | null>(null);
   const isLoading = ref(false);
+  const isLoadingMore = ref(false);
 
   async function fetchBuyerOrders() {
     isLoading.value = true;
     try {
       const response = await api.get<Order[]>(endpoints.orders.buyer);
       buyerOrders.value = response.data;
+      buyerCursor.value = nextCursor(response);
     } finally {
       isLoading.value = false;
     }
   }
 
+  async function fetchMoreBuyerOrders() {
+    if (!buyerCursor.value || isLoadingMore.value) return;
+    isLoadingMore.value = true;
+    try {
+      const response = await api.get<Order[]>(endpoints.orders.buyer, { params: { cursor: buyerCursor.value } });
+      buyerOrders.value = [...buyerOrders.value, ...response.data];
+      buyerCursor.value = nextCursor(response);
+    } finally {
+      isLoadingMore.value = false;
+    }
+  }
+
   async function fetchSellerOrders() {
     isLoading.value = true;
     try {
       const response = await api.get<Order[]>(endpoints.orders.seller);
       sellerOrders.value = response.data;
+      sellerCursor.value = nextCursor(response);
     } finally {
       isLoading.value = false;
     }
   }
 
-  return { buyerOrders, sellerOrders, isLoading, fetchBuyerOrders, fetchSellerOrders };
-});
+  async function fetchMoreSellerOrders() {
+    if (!sellerCursor.value || isLoadingMore.value) return;
+    isLoadingMore.value = true;
+    try {
+      const response = await api.get<Order[]>(endpoints.orders.seller, { params: { cursor: sellerCursor.value } });
+      sellerOrders.value = [...sellerOrders.value, ...response.data];
+      sellerCursor.value = nextCursor(response);
+    } finally {
+      isLoadingMore.value = false;
+    }
+  }
 
+  return {
+    buyerOrders,
+    sellerOrders,
+    buyerCursor,
+    sellerCursor,
+    isLoading,
+    isLoadingMore,
+    fetchBuyerOrders,
+    fetchMoreBuyerOrders,
+    fetchSellerOrders,
+    fetchMoreSellerOrders,
+  };
+});
@@ -1,4 +1,4 @@
-import axios from "axios";
+import axios, { type AxiosResponse } from "axios";
 
 export const api = axios.create({
   baseURL: import.meta.env.VITE_API_BASE_URL || "/api/v1",
@@ -11,6 +11,12 @@ export function setAccessToken(token: string | null) {
   accessToken = token;
 }
 
+// EventSource cannot send headers: streams are opened with a short-lived ticket from POST /auth/stream-ticket.
+export function eventStreamUrl(path: string, ticket: string): string {
+  const base = api.defaults.baseURL ?? "";
+  return `${base}${path}?ticket=${encodeURIComponent(ticket)}`;
+}
+
 api.interceptors.request.use((config) => {
   if (accessToken) {
     config.headers = config.headers || {};
@@ -58,3 +64,8 @@ api.interceptors.response.use(
   },
 );
 
+// Keyset-paged list endpoints return the cursor of the next page in this header; null on the last page.
+export function nextCursor(response: AxiosResponse): string | null {
+  const value = response.headers["x-next-cursor"];
+  return typeof value === "string" && value ? value : null;
+}
@@ -5,6 +5,7 @@ export const endpoints = {
     logout: "/auth/logout",
     refresh: "/auth/refresh",
     me: "/auth/me",
+    streamTicket: "/auth/stream-ticket",
     sellerRole: "/auth/roles/seller",
   },
   catalog: "/catalog",
@@ -17,6 +18,7 @@ export const endpoints = {
   seller: {
     products: "/seller/products",
     dashboard: "/seller/dashboard",
+    analytics: "/seller/dashboard/analytics",
     profile: "/seller/profile",
     uploadImage: "/seller/products/upload-image",
     publicById: (sellerId: number) => `/sellers/${sellerId}`,
@@ -33,7 +35,13 @@ export const endpoints = {
   reviewsByProduct: (productId: number) => `/reviews/product/${productId}`,
   messages: {
     conversations: "/messages/conversations",
+    inbox: "/messages/inbox",
+    stream: "/messages/stream",
+  },
+  notifications: {
+    list: "/notifications",
+    unreadCount: "/notifications/unread-count",
+    stream: "/notifications/stream",
   },
-  notifications: "/notifications",
 };
 
@@ -0,0 +1,30 @@
+export interface SellerDailyPoint {
+  day: string;
+  views: number;
+  cart_adds: number;
+  orders_requested: number;
+  orders_accepted: number;
+  orders_completed: number;
+  orders_rejected: number;
+  orders_canceled: number;
+  revenue: string;
+}
+
+export interface SellerAnalytics {
+  date_from: string;
+  date_to: string;
+  totals: Omit<SellerDailyPoint, "day"> & {
+    view_to_cart: number | null;
+    cart_to_order: number | null;
+  };
+  daily: SellerDailyPoint[];
+  top_products: Array<{
+    product_id: number;
+    title: string;
+    revenue: string;
+    units_sold: number;
+    orders: number;
+    cart_adds: number;
+    views: number;
+  }>;
+}
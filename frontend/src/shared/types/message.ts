@@ -7,6 +7,27 @@ export interface Conversation {
   updated_at: string;
 }
 
+export interface InboxMessage {
+  id: number;
+  sender_id: number;
+  snippet: string;
+  is_read: boolean;
+  created_at: string;
+}
+
+export interface InboxEntry {
+  id: number;
+  buyer_id: number;
+  seller_id: number;
+  product_id: number | null;
+  product_title: string | null;
+  counterpart_id: number;
+  counterpart_name: string;
+  last_message: InboxMessage | null;
+  unread_count: number;
+  updated_at: string;
+}
+
 export interface Message {
   id: number;
   conversation_id: number;
@@ -5,6 +5,7 @@ export interface CartItem {
   title: string;
   price: string;
   seller_id: number;
+  image_url?: string | null;
 }
 
 export interface Cart {
@@ -19,6 +19,8 @@ export interface Product {
   status: ProductStatus;
   rejection_reason: string | null;
   created_at: string;
+  rating_avg: number | null;
+  rating_count: number;
   images: ProductImage[];
 }
 
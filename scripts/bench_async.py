@@ -0,0 +1,135 @@
+"""Throughput of the API under many concurrent clients, to compare the sync and async drivers.
+
+Start the API once per mode against the same database and point this at it:
+
+    RESPONSE_CACHE_BYPASS_HEADER=true DATABASE_ASYNC=false uvicorn app.main:app --port 8000    # pymysql, thread pool
+    RESPONSE_CACHE_BYPASS_HEADER=true DATABASE_ASYNC=true  uvicorn app.main:app --port 8000    # aiomysql, AsyncSession
+    PYTHONPATH=/app python /scripts/bench_async.py --base-url http://localhost:8000 --clients 500 --seconds 20
+
+``make bench-async`` does both runs against the compose MySQL (seed it first with ``make seed``).
+
+Each client is a seeded buyer (access token minted from the server's SECRET_KEY) and sends a mix of public catalog
+reads, authenticated reads (me, cart, favorites, orders, unread count) and favorite add/remove writes. Catalog
+requests send ``X-Cache-Bypass: 1``, which the API honours only with ``RESPONSE_CACHE_BYPASS_HEADER=true``, so every
+one reaches the database. With the sync driver at most AnyIO's thread limit (default 40) requests wait on the database
+at once; the async driver is bounded by the connection pool instead.
+
+Results so far, 500 clients for 20 s, client and server sharing one host:
+
+    SQLite file, catalog reads only              sync 93 req/s     async 37 req/s
+    SQLite file, full mix                        sync 68 req/s     async 46 req/s
+    MySQL (compose)                              not run: no MySQL server was available where these were measured
+
+SQLite has no network wait, so those runs only show the async driver's overhead; ``database_async`` therefore
+refuses SQLite URLs and stays off by default until ``make bench-async`` shows it ahead on MySQL.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import Counter
+
+import httpx
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models import Role, RoleName, User
+
+CATALOG_PATHS = ("/api/v1/catalog?sort=new", "/api/v1/catalog?sort=popular", "/api/v1/catalog?sort=price_asc&page=2")
+BUYER_PATHS = ("/api/v1/auth/me", "/api/v1/cart", "/api/v1/favorites", "/api/v1/orders/my", "/api/v1/notifications/unread-count")
+
+
+async def _request(
+    http: httpx.AsyncClient, rng: random.Random, headers: dict[str, str], product_ids: list[int]
+) -> tuple[str, httpx.Response]:
+    roll = rng.random()
+    if roll < 0.3:
+        path = rng.choice(CATALOG_PATHS) if rng.random() < 0.5 else f"/api/v1/catalog/{rng.choice(product_ids)}"
+        return "catalog", await http.get(path, headers={**headers, "X-Cache-Bypass": "1"})
+    if roll < 0.9:
+        return "read", await http.get(rng.choice(BUYER_PATHS), headers=headers)
+    method = http.post if rng.random() < 0.5 else http.delete
+    response = await method(f"/api/v1/favorites/{rng.choice(product_ids)}", headers=headers)
+    return "write", response
+
+
+async def _client(
+    http: httpx.AsyncClient,
+    headers: dict[str, str],
+    product_ids: list[int],
+    deadline: float,
+    latencies: dict[str, list[float]],
+    errors: Counter,
+) -> None:
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        kind = "?"
+        try:
+            kind, response = await _request(http, rng, headers, product_ids)
+            if response.status_code >= 400:
+                errors[f"{kind}: HTTP {response.status_code}"] += 1
+        except httpx.HTTPError as exc:
+            errors[f"{kind}: {type(exc).__name__}"] += 1
+        latencies.setdefault(kind, []).append(time.perf_counter() - started)
+
+
+def _buyer_headers(database_url: str, clients: int) -> list[dict[str, str]]:
+    engine = create_engine(database_url)
+    with Session(engine) as db:
+        buyer_ids = db.scalars(select(User.id).join(User.roles).where(Role.name == RoleName.BUYER, User.is_banned.is_(False))).all()
+    engine.dispose()
+    if not buyer_ids:
+        raise SystemExit("no buyers in the database; seed it first")
+    return [{"Authorization": f"Bearer {create_access_token(str(buyer_ids[i % len(buyer_ids)]))}"} for i in range(clients)]
+
+
+def _summary(kind: str, latencies: list[float], elapsed: float) -> str:
+    latencies.sort()
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    return (
+        f"{kind:<8} {len(latencies) / elapsed:7.1f} req/s  "
+        f"median {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    args = parser.parse_args()
+
+    headers = _buyer_headers(args.database_url, args.clients)
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30.0) as http:
+        listing = await http.get("/api/v1/catalog", params={"page_size": 100})
+        listing.raise_for_status()
+        product_ids = [item["id"] for item in listing.json()["items"]]
+
+        latencies: dict[str, list[float]] = {}
+        errors: Counter = Counter()
+        started = time.perf_counter()
+        deadline = started + args.seconds
+        await asyncio.gather(*(_client(http, headers[i], product_ids, deadline, latencies, errors) for i in range(args.clients)))
+        elapsed = time.perf_counter() - started
+
+    everything = [latency for kind_latencies in latencies.values() for latency in kind_latencies]
+    print(f"clients={args.clients} requests={len(everything)} errors={sum(errors.values())}")
+    print(_summary("total", everything, elapsed))
+    for kind in ("catalog", "read", "write"):
+        if latencies.get(kind):
+            print(_summary(kind, latencies[kind], elapsed))
+    for error, count in errors.most_common():
+        print(f"  {count} x {error}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""Checkout cost for a cart spanning many sellers: statements sent to the database and wall time per checkout.
+
+Run against a scratch database, never a real one:
+
+    PYTHONPATH=/app python /scripts/bench_checkout.py --database-url mysql+pymysql://app:app@db:3306/bench
+
+The default is a file-backed SQLite database in the current directory.
+
+12 sellers, 40 items, median of 20 checkouts:
+
+    SQLite file    11 statements    20.6 ms
+    MySQL          not run yet
+
+On MySQL the orders go out as one multi-row INSERT plus one SELECT of their ids instead of RETURNING, so the count
+there should be one higher and, like SQLite's, independent of the number of sellers.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models import Cart, CartItem, Product, ProductStatus, User
+from app.services.checkout_service import checkout_cart
+
+EMAIL_PREFIX = "bench-checkout"
+PAYLOAD = {"full_name": "Bench Buyer", "phone": "+70000000000", "address": "Moscow", "comment": None}
+
+
+def _seed(db: Session, sellers: int, items: int) -> tuple[int, list[int]]:
+    """Return the buyer id and ``items`` product ids spread round-robin over ``sellers`` sellers."""
+    emails = [f"{EMAIL_PREFIX}-seller-{idx}@example.com" for idx in range(sellers)]
+    missing = set(emails) - set(db.scalars(select(User.email).where(User.email.in_(emails))).all())
+    if missing:
+        db.execute(insert(User), [{"email": email, "password_hash": "-"} for email in sorted(missing)])
+    buyer_email = f"{EMAIL_PREFIX}-buyer@example.com"
+    if not db.scalar(select(User.id).where(User.email == buyer_email)):
+        db.add(User(email=buyer_email, password_hash="-"))
+    db.commit()
+    seller_ids = db.scalars(select(User.id).where(User.email.in_(emails)).order_by(User.id)).all()
+    buyer_id = db.scalar(select(User.id).where(User.email == buyer_email))
+
+    rows = [
+        {
+            "seller_id": seller_ids[idx % sellers],
+            "title": f"Bench item {idx}",
+            "description": "Benchmark product",
+            "price": Decimal("100.00"),
+            "tags": [],
+            "materials": [],
+            "status": ProductStatus.ACTIVE,
+            "stock": None,
+        }
+        for idx in range(items)
+    ]
+    product_ids = list(db.scalars(insert(Product).returning(Product.id), rows).all()) if rows else []
+    db.commit()
+    return buyer_id, product_ids
+
+
+def _fill_cart(db: Session, buyer_id: int, product_ids: list[int]) -> None:
+    cart = db.scalar(select(Cart).where(Cart.user_id == buyer_id))
+    if not cart:
+        cart = Cart(user_id=buyer_id)
+        db.add(cart)
+        db.flush()
+    db.execute(insert(CartItem), [{"cart_id": cart.id, "product_id": product_id, "qty": 1} for product_id in product_ids])
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite+pysqlite:///./bench_checkout.db")
+    parser.add_argument("--sellers", type=int, default=12)
+    parser.add_argument("--items", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url, future=True)
+    Base.metadata.create_all(engine)
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda _conn, _cursor, statement, *_rest: statements.append(statement))
+
+    with Session(engine) as db:
+        buyer_id, product_ids = _seed(db, args.sellers, args.items)
+
+    timings: list[float] = []
+    counts: list[int] = []
+    for _ in range(args.rounds):
+        with Session(engine) as db:
+            _fill_cart(db, buyer_id, product_ids)
+            statements.clear()
+            started = time.perf_counter()
+            orders = checkout_cart(db, buyer_id, dict(PAYLOAD))
+            timings.append((time.perf_counter() - started) * 1000)
+            counts.append(len(statements))
+            assert len(orders) == args.sellers
+            assert sum(len(order.items) for order in orders) == args.items
+
+    print(f"{args.items} items from {args.sellers} sellers, {args.rounds} checkouts")
+    print(f"statements per checkout: {statistics.median(counts):.0f}")
+    print(f"ms per checkout: median {statistics.median(timings):.2f}  min {min(timings):.2f}  max {max(timings):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Cost of sort=popular, and of applying a fixed batch of popularity events, as the order history grows.
+
+Run against a scratch database, never a real one:
+
+    PYTHONPATH=/app python /scripts/bench_popular.py --database-url mysql+pymysql://app:app@db:3306/bench --orders 1000000
+
+The sort reads products.popularity_score through ix_products_status_popularity, so its latency should stay flat
+however many orders exist; the outbox worker only adds the events it is handed to the products they name.
+The default is a file-backed SQLite database in /tmp.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models import Order, OrderItem, OrderStatus, Product, ProductStatus, User
+from app.services.outbox_service import drain
+from app.services.popularity_service import ORDER_UNIT_WEIGHT, queue_engagement
+from app.services.product_service import list_public_products
+
+RNG = random.Random(7)
+EMAIL = "bench-popular@example.com"
+PRODUCTS = 2_000
+BATCH_SIZE = 5_000
+NEW_ORDERS_PER_BATCH = 500
+
+
+def _ensure_catalog(db: Session) -> tuple[int, list[int]]:
+    user_id = db.scalar(select(User.id).where(User.email == EMAIL))
+    if not user_id:
+        db.add(User(email=EMAIL, password_hash="-"))
+        db.commit()
+        user_id = db.scalar(select(User.id).where(User.email == EMAIL))
+    product_ids = db.scalars(select(Product.id).where(Product.seller_id == user_id).order_by(Product.id)).all()
+    if len(product_ids) < PRODUCTS:
+        db.execute(
+            insert(Product),
+            [
+                {
+                    "seller_id": user_id,
+                    "title": f"Bench item {idx}",
+                    "description": "Popularity benchmark item",
+                    "price": Decimal(RNG.randint(900, 9900)),
+                    "tags": [],
+                    "materials": [],
+                    "status": ProductStatus.ACTIVE,
+                    "search_document": "",
+                }
+                for idx in range(len(product_ids), PRODUCTS)
+            ],
+        )
+        db.commit()
+        product_ids = db.scalars(select(Product.id).where(Product.seller_id == user_id).order_by(Product.id)).all()
+    return user_id, list(product_ids)
+
+
+def _add_orders(db: Session, user_id: int, product_ids: list[int], count: int, now: datetime) -> None:
+    while count > 0:
+        size = min(BATCH_SIZE, count)
+        first_id = (db.scalar(select(func.max(Order.id))) or 0) + 1
+        db.execute(
+            insert(Order),
+            [
+                {
+                    "id": first_id + offset,
+                    "buyer_id": user_id,
+                    "seller_id": user_id,
+                    "status": OrderStatus.COMPLETED,
+                    "full_name": "Bench Buyer",
+                    "phone": "+70000000000",
+                    "address": "Moscow",
+                    "total_amount": Decimal("1000.00"),
+                    "created_at": now - timedelta(minutes=RNG.randint(0, 60 * 24 * 90)),
+                }
+                for offset in range(size)
+            ],
+        )
+        db.execute(
+            insert(OrderItem),
+            [
+                {
+                    "order_id": first_id + offset,
+                    "product_id": RNG.choice(product_ids),
+                    "product_title_snapshot": "Bench item",
+                    "product_price_snapshot": Decimal("1000.00"),
+                    "qty": RNG.randint(1, 3),
+                    "subtotal": Decimal("1000.00"),
+                }
+                for offset in range(size)
+            ],
+        )
+        db.commit()
+        count -= size
+
+
+def _apply_new_orders(db: Session, product_ids: list[int]) -> float:
+    """Queue ``NEW_ORDERS_PER_BATCH`` orders' engagement as checkout does and time the worker applying it."""
+    for _ in range(NEW_ORDERS_PER_BATCH):
+        queue_engagement(db, {RNG.choice(product_ids): ORDER_UNIT_WEIGHT * RNG.randint(1, 3)})
+    db.commit()
+    started = time.perf_counter()
+    drain(db)
+    return (time.perf_counter() - started) * 1000
+
+
+def _sort_timings(db: Session, repeats: int) -> list[float]:
+    list_public_products(db, None, None, None, None, "popular", 1, 20, include_total=False)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        list_public_products(db, None, None, None, None, "popular", 1, 20, include_total=False)
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite+pysqlite:////tmp/bench_popular.db")
+    parser.add_argument("--orders", type=int, default=500_000)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url, future=True)
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as db:
+        user_id, product_ids = _ensure_catalog(db)
+        now = datetime.now(UTC)
+        drain(db)
+
+        steps = sorted({size for size in (10_000, 100_000, 250_000, args.orders) if size <= args.orders})
+        print(f"{'orders':>10} {'sort median ms':>15} {'sort p95 ms':>12} {'apply ms':>9}")
+        for size in steps:
+            existing = db.scalar(select(func.count(Order.id)).where(Order.buyer_id == user_id)) or 0
+            _add_orders(db, user_id, product_ids, max(size - existing, 0), now)
+            # The measured batch is the same amount of new activity at every size.
+            apply_ms = _apply_new_orders(db, product_ids)
+
+            timings = _sort_timings(db, args.repeats)
+            p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+            print(f"{size:>10} {statistics.median(timings):>15.2f} {p95:>12.2f} {apply_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""CPU cost of encoding one page of products, before and after the typed response pipeline.
+
+    PYTHONPATH=/app python /scripts/bench_serialization.py --items 100
+
+"dict" reproduces what list endpoints used to do: ``ProductOut.model_validate(row).model_dump()`` per row, then
+FastAPI validating the ``response_model=dict`` payload, walking it with ``jsonable_encoder`` and ``json.dumps``-ing
+it in ``JSONResponse``. "typed" is :func:`app.core.serialization.dump_json`, which validates the rows once and lets
+pydantic-core write the bytes. No database is involved: the rows are transient ORM objects with their images loaded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.serialization import dump_json
+from app.models import Product, ProductImage, ProductStatus
+from app.schemas.common import PaginatedResponse, PaginationMeta
+from app.schemas.product import ProductOut
+
+_DICT = TypeAdapter(dict)
+
+
+def _rows(count: int) -> list[Product]:
+    now = datetime.now(UTC)
+    return [
+        Product(
+            id=idx,
+            seller_id=1 + idx % 17,
+            title=f"Hand-knitted sweater {idx}",
+            description="Merino wool, knitted to order. " * 4,
+            price=Decimal("4990.00") + idx,
+            stock=idx % 5,
+            category_id=1 + idx % 9,
+            tags=["sweater", "merino", "handmade"],
+            materials=["merino wool", "alpaca"],
+            status=ProductStatus.ACTIVE,
+            rejection_reason=None,
+            created_at=now,
+            rating_count=idx % 12,
+            rating_sum=4 * (idx % 12),
+            images=[
+                ProductImage(id=idx * 3 + offset, image_url=f"/media/products/{idx}-{offset}.jpg", sort_order=offset)
+                for offset in range(3)
+            ],
+        )
+        for idx in range(1, count + 1)
+    ]
+
+
+def _dict_pipeline(rows: list[Product], meta: PaginationMeta) -> bytes:
+    payload = {"items": [ProductOut.model_validate(row).model_dump() for row in rows], "meta": meta.model_dump()}
+    return JSONResponse(jsonable_encoder(_DICT.validate_python(payload))).body
+
+
+def _typed_pipeline(rows: list[Product], meta: PaginationMeta) -> bytes:
+    return dump_json(PaginatedResponse[ProductOut], {"items": rows, "meta": meta})
+
+
+def _time(fn: Callable[[], bytes], repeats: int) -> list[float]:
+    fn()
+    timings = []
+    for _ in range(repeats):
+        started = time.process_time()
+        fn()
+        timings.append((time.process_time() - started) * 1_000_000)
+    return sorted(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=500)
+    args = parser.parse_args()
+
+    rows = _rows(args.items)
+    meta = PaginationMeta(page=1, page_size=args.items, total=args.items * 10)
+    results = {
+        "dict": _time(lambda: _dict_pipeline(rows, meta), args.repeats),
+        "typed": _time(lambda: _typed_pipeline(rows, meta), args.repeats),
+    }
+    baseline = statistics.median(results["dict"])
+    print(f"{'pipeline':>9} {'median us':>10} {'p95 us':>9} {'vs dict':>8}")
+    for name, timings in results.items():
+        median = statistics.median(timings)
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        print(f"{name:>9} {median:>10.0f} {p95:>9.0f} {median / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Notification push load test: thousands of SSE clients on one API worker.
+
+Seeds one sender and ``--clients`` recipients (each with a conversation with the sender) straight into the database,
+opens one ``/notifications/stream`` per recipient with a ticket from ``/auth/stream-ticket``, then sends one chat
+message per conversation through the API; every message creates a NEW_MESSAGE notification that must arrive on the
+matching stream.
+
+Run inside the backend container against a server started with a single worker, e.g.
+
+    uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers 1
+    ulimit -n 20000
+    PYTHONPATH=/app python /scripts/load_notifications_sse.py --base-url http://localhost:8000 --clients 5000
+
+The database URL and SECRET_KEY come from the same settings as the server, so the minted tokens are accepted.
+
+Last run: 5000 clients, one worker, SQLite file, client and server sharing one CPU.
+
+    streams    4984/5000 connected; connect (ticket + stream) median 4.6 s, p95 12.1 s; 16 dropped
+    sends      4912/5000 accepted in 154 s; 37 HTTP 500 (SQLite "database is locked"), 51 dropped connections
+    delivery   4896/4912 arrived; median 2.2 s, p95 6.0 s, p99 8.2 s
+
+The misses are the 16 dropped streams. Most of the latency is the shared CPU and SQLite's single writer; the
+earlier 572 ms median was measured with ``?access_token=`` and no ticket round-trip.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+
+import httpx
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import create_access_token, hash_password
+from app.models import Conversation, User
+
+EMAIL_PREFIX = "load-sse"
+
+
+def _seed(database_url: str, clients: int) -> tuple[int, list[tuple[int, int]]]:
+    """Return the sender id and (recipient id, conversation id) pairs, creating whatever is missing."""
+    engine = create_engine(database_url, future=True)
+    with Session(engine) as db:
+        password_hash = hash_password("LoadTest12345", rounds=4)
+        sender = db.scalar(select(User).where(User.email == f"{EMAIL_PREFIX}-sender@example.com"))
+        if not sender:
+            sender = User(email=f"{EMAIL_PREFIX}-sender@example.com", password_hash=password_hash)
+            db.add(sender)
+            db.commit()
+
+        emails = [f"{EMAIL_PREFIX}-{idx}@example.com" for idx in range(clients)]
+        existing = set(db.scalars(select(User.email).where(User.email.in_(emails))).all())
+        missing = [{"email": email, "password_hash": password_hash} for email in emails if email not in existing]
+        if missing:
+            db.execute(insert(User), missing)
+            db.commit()
+        recipient_ids = db.scalars(select(User.id).where(User.email.in_(emails)).order_by(User.id)).all()
+
+        conversations = dict(
+            db.execute(select(Conversation.buyer_id, Conversation.id).where(Conversation.seller_id == sender.id)).all()
+        )
+        new_rows = [
+            {"buyer_id": user_id, "seller_id": sender.id, "product_id": None} for user_id in recipient_ids if user_id not in conversations
+        ]
+        if new_rows:
+            db.execute(insert(Conversation), new_rows)
+            db.commit()
+            conversations = dict(
+                db.execute(select(Conversation.buyer_id, Conversation.id).where(Conversation.seller_id == sender.id)).all()
+            )
+        return sender.id, [(user_id, conversations[user_id]) for user_id in recipient_ids]
+
+
+async def _listen(
+    api: httpx.AsyncClient,
+    streams: httpx.AsyncClient,
+    user_id: int,
+    connecting: asyncio.Semaphore,
+    connected: asyncio.Event,
+    connect_times: list[float],
+    received: dict[int, float],
+    failures: list[str],
+) -> None:
+    headers = {"Authorization": f"Bearer {create_access_token(str(user_id))}"}
+    # Held from the ticket request until the stream is open, so a ticket never waits out its minute in a backlog.
+    await connecting.acquire()
+    started = time.perf_counter()
+    try:
+        # Streams only accept a short-lived ticket in the URL, so each client fetches one right before connecting.
+        issued = await api.post("/api/v1/auth/stream-ticket", headers=headers)
+        if issued.status_code != 200:
+            failures.append(f"stream ticket: HTTP {issued.status_code}")
+            return
+        params = {"ticket": issued.json()["ticket"]}
+        async with streams.stream("GET", "/api/v1/notifications/stream", params=params) as response:
+            if response.status_code != 200:
+                failures.append(f"stream: HTTP {response.status_code}")
+                return
+            event_name = None
+            async for line in response.aiter_lines():
+                if line.startswith("retry:") and not connected.is_set():
+                    connect_times.append(time.perf_counter() - started)
+                    connected.set()
+                    connecting.release()
+                elif line.startswith("event: "):
+                    event_name = line.removeprefix("event: ")
+                elif line.startswith("data: ") and event_name == "notification":
+                    payload = json.loads(line.removeprefix("data: "))["payload_json"]
+                    received[payload["conversation_id"]] = time.perf_counter()
+    except httpx.HTTPError as exc:
+        failures.append(f"stream: {type(exc).__name__}")
+    finally:
+        if not connected.is_set():
+            connecting.release()
+        connected.set()
+
+
+async def _send(
+    client: httpx.AsyncClient,
+    headers: dict[str, str],
+    conversation_id: int,
+    sent: dict[int, float],
+    limit: asyncio.Semaphore,
+    failures: list[str],
+) -> None:
+    async with limit:
+        started = time.perf_counter()
+        try:
+            response = await client.post(f"/api/v1/messages/conversations/{conversation_id}", json={"body": "load test"}, headers=headers)
+        except httpx.HTTPError as exc:
+            failures.append(f"send: {type(exc).__name__}")
+            return
+        if response.status_code != 200:
+            failures.append(f"send: HTTP {response.status_code}")
+            return
+        sent[conversation_id] = started
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def _run(args: argparse.Namespace) -> None:
+    sender_id, pairs = _seed(args.database_url, args.clients)
+    print(f"seeded {len(pairs)} recipients")
+
+    connect_times: list[float] = []
+    received: dict[int, float] = {}
+    sent: dict[int, float] = {}
+    failures: list[str] = []
+    # Tickets and sends go through their own small pool: httpx scans every connection of a pool on each request, and
+    # the stream pool ends up holding thousands.
+    stream_limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    api_limits = httpx.Limits(max_connections=max(args.connect_concurrency, args.send_concurrency))
+    async with (
+        httpx.AsyncClient(base_url=args.base_url, limits=stream_limits, timeout=httpx.Timeout(None, connect=30)) as streams,
+        httpx.AsyncClient(base_url=args.base_url, limits=api_limits, timeout=30) as api,
+    ):
+        connected = [asyncio.Event() for _ in pairs]
+        connecting = asyncio.Semaphore(args.connect_concurrency)
+        listeners = [
+            asyncio.create_task(_listen(api, streams, user_id, connecting, event, connect_times, received, failures))
+            for (user_id, _conversation_id), event in zip(pairs, connected, strict=True)
+        ]
+        await asyncio.gather(*(event.wait() for event in connected))
+        print(f"connected {len(connect_times)}/{len(pairs)} streams, {len(failures)} failures")
+
+        metrics = (await api.get("/metrics")).text
+        open_streams = [line for line in metrics.splitlines() if line.startswith('sse_open_streams{stream="notifications"}')]
+        print("server reports:", open_streams[0] if open_streams else "no sse_open_streams sample")
+
+        headers = {"Authorization": f"Bearer {create_access_token(str(sender_id))}"}
+        limit = asyncio.Semaphore(args.send_concurrency)
+        send_started = time.perf_counter()
+        await asyncio.gather(*(_send(api, headers, conversation_id, sent, limit, failures) for _user_id, conversation_id in pairs))
+        send_elapsed = time.perf_counter() - send_started
+
+        deadline = time.perf_counter() + args.drain_seconds
+        while len(received) < len(pairs) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+        for task in listeners:
+            task.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+
+    latencies = [(received[cid] - sent[cid]) * 1000 for cid in sent if cid in received]
+    print(f"sent {len(sent)}/{len(pairs)} messages in {send_elapsed:.1f}s ({len(sent) / send_elapsed:.0f}/s)")
+    if connect_times:
+        connect_ms = [value * 1000 for value in connect_times]
+        print(f"connect ms: median {statistics.median(connect_ms):.1f}  p95 {_percentile(connect_ms, 0.95):.1f}")
+    if latencies:
+        print(
+            f"delivery ms: median {statistics.median(latencies):.1f}  p95 {_percentile(latencies, 0.95):.1f}  "
+            f"p99 {_percentile(latencies, 0.99):.1f}  max {max(latencies):.1f}"
+        )
+    print(f"delivered {len(latencies)}/{len(sent)}")
+    for failure, count in Counter(failures).most_common():
+        print(f"  {count} x {failure}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--connect-concurrency", type=int, default=100)
+    parser.add_argument("--send-concurrency", type=int, default=50)
+    parser.add_argument("--drain-seconds", type=float, default=30.0)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Move popularity_epoch forward and restate the stored popularity scores in the new epoch's units.
+
+Scores double every half-life after the epoch and overflow a double after ~1000 half-lives, so the epoch has to move
+forward every few years. Stop the API and the worker, rescale, then start them with the new epoch:
+
+    PYTHONPATH=/app python /scripts/rebase_popularity.py 2030-01-01T00:00:00+00:00
+    POPULARITY_EPOCH=2030-01-01T00:00:00+00:00
+
+The ranking is unchanged; only the units of products.popularity_score (and of queued engagement) move.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import UTC, datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.popularity_service import rebase_popularity
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("new_epoch", type=datetime.fromisoformat)
+    new_epoch = parser.parse_args().new_epoch
+    new_epoch = new_epoch if new_epoch.tzinfo else new_epoch.replace(tzinfo=UTC)
+    engine = create_engine(settings.database_url, future=True)
+    with Session(engine) as db:
+        rescaled = rebase_popularity(db, new_epoch)
+    print(f"Rescaled {rescaled} products from {settings.popularity_epoch.isoformat()} to {new_epoch.isoformat()}")
+    print(f"Now start the API and worker with POPULARITY_EPOCH={new_epoch.isoformat()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Recount the admin rollups (daily_metrics, marketplace_totals) from the source tables.
+
+The rollups follow every ORM write through the outbox; run this after bulk edits that bypassed the ORM (raw SQL,
+cascaded user deletes) or whenever the admin numbers look off:
+
+    PYTHONPATH=/app python /scripts/rebuild_metrics.py
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.rollup_service import rebuild_metrics
+
+
+def main() -> None:
+    engine = create_engine(settings.database_url, future=True)
+    with Session(engine) as db:
+        print("Rebuilt daily metrics for", rebuild_metrics(db), "days")
+
+
+if __name__ == "__main__":
+    main()
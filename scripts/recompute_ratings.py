@@ -0,0 +1,25 @@
+"""Rebuild products.rating_count / rating_sum from visible reviews in one set-based UPDATE.
+
+The aggregates are kept up to date as reviews are written; run this after bulk edits that bypassed the ORM
+(raw SQL, cascaded user deletes) or whenever they look off:
+
+    PYTHONPATH=/app python /scripts/recompute_ratings.py
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.review_service import recompute_ratings
+
+
+def main() -> None:
+    engine = create_engine(settings.database_url, future=True)
+    with Session(engine) as db:
+        print("Recomputed ratings for", recompute_ratings(db), "products")
+
+
+if __name__ == "__main__":
+    main()
@@ -34,6 +34,7 @@ from app.models import (
     User,
     UserRole,
 )
+from app.services.rollup_service import rebuild_metrics
 
 TOTAL_USERS = 100
 TOTAL_SELLERS = 12
@@ -397,6 +398,8 @@ def run_seed() -> None:
         create_favorites_and_carts(db, buyers, active_products)
 
         db.commit()
+        # The seed clears and bulk-writes tables outside the ORM, so the admin rollups are recounted afterwards.
+        rebuild_metrics(db)
 
         products_per_category: dict[str, int] = defaultdict(int)
         for product in products: